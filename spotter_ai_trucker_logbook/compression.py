@@ -0,0 +1,113 @@
+"""
+Response compression.
+
+Responses of at least COMPRESSION_MIN_SIZE bytes are compressed with brotli
+(when the Brotli package is installed) or gzip, whichever the client accepts.
+Compressed bodies are cached by the digest of the uncompressed body, so a body
+served again - a cached OSRM route, an unchanged trip - is compressed once
+rather than on every request, which also makes the slower, stronger
+compression levels affordable.
+"""
+
+import gzip
+import hashlib
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = re.compile(
+    r"^(text/|application/(json|javascript|xml|msgpack|vnd\.[\w.+-]+))"
+)
+
+
+def _accepted_encodings(header):
+    """
+    Parses an Accept-Encoding header into a ``{coding: q}`` dict.  Codings
+    with an unparsable q-value are left out.
+    """
+    accepted = {}
+    for item in header.split(","):
+        coding, *params = item.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = None
+        if q is not None:
+            accepted[coding] = max(min(q, 1.0), 0.0)
+    return accepted
+
+
+def _preferred_encoding(request, encodings):
+    """
+    Returns the one of ``encodings`` the client prefers, by q-value and then
+    by the order of ``encodings``, or None when it accepts none of them.
+    """
+    accepted = _accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    best, best_q = None, 0.0
+    for encoding in encodings:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body, encoding):
+    """
+    Returns ``body`` compressed with ``encoding``, from the cache when the
+    same body was compressed before.
+    """
+    key = f"compressed:{encoding}:{hashlib.sha256(body).hexdigest()}"
+    compressed = cache.get(key)
+    if compressed is None:
+        if encoding == "br":
+            compressed = brotli.compress(body, quality=settings.BROTLI_QUALITY)
+        else:
+            compressed = gzip.compress(body, compresslevel=settings.GZIP_LEVEL, mtime=0)
+        cache.set(key, compressed, timeout=settings.COMPRESSION_CACHE_TIMEOUT)
+    return compressed
+
+
+class CompressionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.streaming
+            or response.has_header("Content-Encoding")
+            or len(response.content) < settings.COMPRESSION_MIN_SIZE
+            or not COMPRESSIBLE_TYPES.match(response.get("Content-Type", ""))
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = _preferred_encoding(request, ("br", "gzip") if brotli else ("gzip",))
+        if encoding is None:
+            return response
+
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+        # A strong ETag describes the uncompressed body, weaken it.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
@@ -0,0 +1,34 @@
+"""
+Settings for the app server started by the loadtest command.
+
+The app wipes its database when the views are imported (see delete_all_data),
+so the server runs on a throwaway SQLite database given by LOADTEST_DATABASE
+instead of DATABASE_URL.  Its upstreams are the local stubs, so the upstream
+rate limits are raised far enough not to cap the measured throughput.
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ["LOADTEST_DATABASE"],
+        "OPTIONS": {
+            # Concurrent requests write too: take the write lock up front and
+            # let readers carry on while it is held.
+            "transaction_mode": "IMMEDIATE",
+            "init_command": "PRAGMA journal_mode=WAL;",
+            "timeout": 30,  # Seconds a writer waits for the lock
+        },
+    }
+}
+DATABASES["ratelimit"] = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+DATABASE_REPLICAS = []
+
+UPSTREAM_RATE_LIMIT_BACKEND = "cache"
+UPSTREAM_RATE_LIMITS = {
+    name: {"rate": 10000.0, "burst": 10000, "max_queue": 10000}
+    for name in UPSTREAM_RATE_LIMITS  # noqa: F405
+}
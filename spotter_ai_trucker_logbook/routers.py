@@ -0,0 +1,124 @@
+"""
+Read-replica routing.
+
+Reads made while handling a safe (GET/HEAD/OPTIONS) request go to one of the
+read replicas configured through DATABASE_REPLICA_URLS, picked round-robin per
+request and skipping any replica that is disconnected or lagging more than
+DATABASE_REPLICA_MAX_LAG seconds behind the primary.  Once a request writes
+anything, its remaining reads stick to the primary.  Everything else (unsafe requests, management commands, background
+threads) reads from "default".
+"""
+
+import contextvars
+import itertools
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_routing = contextvars.ContextVar("replica_routing", default=None)
+_round_robin = itertools.count()
+_replica_lag = {}  # alias -> (checked at, lag in seconds)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Picks the replica that serves the reads of a safe request, so all of them
+    see the same snapshot.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        replica = choose_replica() if request.method in SAFE_METHODS else "default"
+        token = _routing.set({"replica": replica, "pinned": False})
+        try:
+            return self.get_response(request)
+        finally:
+            _routing.reset(token)
+
+
+def replica_lag(alias):
+    """
+    Returns how many seconds the replica is behind the primary, checking at
+    most once every DATABASE_REPLICA_LAG_CHECK_INTERVAL seconds per process.
+    An unreachable replica, or one that lost its connection to the primary,
+    counts as infinitely behind.
+    """
+    now = time.monotonic()
+    checked_at, lag = _replica_lag.get(alias, (None, None))
+    if (
+        checked_at is not None
+        and now - checked_at < settings.DATABASE_REPLICA_LAG_CHECK_INTERVAL
+    ):
+        return lag
+
+    connection = connections[alias]
+    if connection.vendor != "postgresql":
+        lag = 0.0
+    else:
+        try:
+            with connection.cursor() as cursor:
+                # An idle replica that has replayed everything it received is
+                # up to date, however old its last replayed transaction is,
+                # as long as it is still streaming from the primary.  One
+                # that lost the primary has replayed everything too, so it
+                # gives NULL.  The receiver's status is hidden from roles
+                # without pg_read_all_stats; a running receiver then counts
+                # as streaming.  A primary (a replica URL pointing at the
+                # same database) is never behind.
+                cursor.execute(
+                    "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+                    "WHEN NOT EXISTS (SELECT 1 FROM pg_stat_wal_receiver "
+                    "WHERE status IS NULL OR status = 'streaming') THEN NULL "
+                    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() "
+                    "THEN 0 ELSE COALESCE(EXTRACT(EPOCH FROM now() - "
+                    "pg_last_xact_replay_timestamp()), 0) END"
+                )
+                lag = cursor.fetchone()[0]
+                lag = float("inf") if lag is None else float(lag)
+        except DatabaseError:
+            lag = float("inf")
+    _replica_lag[alias] = (now, lag)
+    return lag
+
+
+def choose_replica():
+    """
+    Picks the next replica, round-robin, that is within the allowed lag.
+    Falls back to the primary when none is.
+    """
+    replicas = settings.DATABASE_REPLICAS
+    if not replicas:
+        return "default"
+    start = next(_round_robin)
+    for offset in range(len(replicas)):
+        alias = replicas[(start + offset) % len(replicas)]
+        if replica_lag(alias) <= settings.DATABASE_REPLICA_MAX_LAG:
+            return alias
+    return "default"
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing and not routing["pinned"]:
+            return routing["replica"]
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing:
+            # Read-your-writes: the rest of this request uses the primary.
+            routing["pinned"] = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
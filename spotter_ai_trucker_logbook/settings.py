@@ -46,6 +46,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
+    "spotter_ai_trucker_logbook.compression.CompressionMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",  # <- Add this if using WhiteNoise
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -54,6 +55,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "spotter_ai_trucker_logbook.routers.ReplicaRoutingMiddleware",
 ]
 
 ROOT_URLCONF = "spotter_ai_trucker_logbook.urls"
@@ -89,6 +91,30 @@ DATABASES = {
 # The configuration will work if we are not relying on external libraries, but for deployment
 # If you use dj_database_url, it will use that for local
 
+# Read replicas, as a comma-separated list of database URLs.  Safe requests read
+# from them (see routers.py).  To try it locally, point a replica URL at the same
+# database as DATABASE_URL.
+DATABASE_REPLICA_URLS = [
+    url.strip()
+    for url in os.environ.get("DATABASE_REPLICA_URLS", "").split(",")
+    if url.strip()
+]
+DATABASE_REPLICAS = []
+for index, url in enumerate(DATABASE_REPLICA_URLS):
+    alias = f"replica_{index}"
+    DATABASES[alias] = dj_database_url.parse(url)
+    DATABASES[alias]["TEST"] = {"MIRROR": "default"}
+    DATABASE_REPLICAS.append(alias)
+
+# Second connection to the primary, used for the shared upstream rate limiter.
+DATABASES["ratelimit"] = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+
+DATABASE_ROUTERS = ["spotter_ai_trucker_logbook.routers.ReplicaRouter"]
+DATABASE_REPLICA_MAX_LAG = float(
+    os.environ.get("DATABASE_REPLICA_MAX_LAG", 5)
+)  # Seconds a replica may lag before reads skip it
+DATABASE_REPLICA_LAG_CHECK_INTERVAL = 5  # Seconds between lag checks per replica
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -138,3 +164,51 @@ CORS_ORIGIN_WHITELIST = [
     "http://localhost:8000",
     "https://spotter-ai-logbook-react-frontend.vercel.app",
 ]
+
+# Monte Carlo trip simulation
+SIMULATION_WORKERS = int(os.environ.get("SIMULATION_WORKERS", os.cpu_count() or 1))
+SIMULATION_MAX_RUNS = int(os.environ.get("SIMULATION_MAX_RUNS", 2000))
+
+# Shared rate limits for outbound calls (see trucker_logbook/ratelimit.py).
+# Set UPSTREAM_RATE_LIMIT_BACKEND to "cache" to keep the buckets in a shared
+# cache (Redis, Memcached) instead of the database.
+UPSTREAM_RATE_LIMIT_BACKEND = os.environ.get("UPSTREAM_RATE_LIMIT_BACKEND", "database")
+UPSTREAM_RATE_LIMIT_DATABASE = "ratelimit"
+UPSTREAM_RATE_LIMITS = {
+    # Nominatim's usage policy allows at most one request per second.
+    "nominatim": {"rate": 1.0, "burst": 1, "max_queue": 10},
+    "osrm": {"rate": 5.0, "burst": 5, "max_queue": 25},
+}
+UPSTREAM_DEADLINES = {"interactive": 5, "batch": 120}  # Seconds a caller may wait
+UPSTREAM_REQUEST_TIMEOUT = 10  # Seconds before an upstream HTTP call is abandoned
+
+# Upstream services; the loadtest command points these at local stubs.
+NOMINATIM_URL = os.environ.get("NOMINATIM_URL", "https://nominatim.openstreetmap.org")
+OSRM_URL = os.environ.get("OSRM_URL", "https://router.project-osrm.org")
+GEOCODE_CACHE_TIMEOUT = 60 * 60 * 24 * 30  # Places don't move, keep them a month
+
+# Seconds between incremental refreshes of the location autocomplete index
+AUTOCOMPLETE_REFRESH_INTERVAL = 30
+
+# Clients may ask for MessagePack or columnar JSON instead of plain JSON.
+REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": [
+        "rest_framework.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+        "trucker_logbook.renderers.ColumnarJSONRenderer",
+        "trucker_logbook.renderers.MessagePackRenderer",
+    ],
+    "DEFAULT_CONTENT_NEGOTIATION_CLASS": "trucker_logbook.renderers.ContentNegotiation",
+}
+
+# Response compression (see spotter_ai_trucker_logbook/compression.py)
+COMPRESSION_MIN_SIZE = 1024  # Bytes, smaller responses are sent as they are
+COMPRESSION_CACHE_TIMEOUT = 60 * 60  # Seconds a compressed body is kept
+BROTLI_QUALITY = 9
+GZIP_LEVEL = 9
+
+OSRM_CACHE_TIMEOUT = 60 * 60 * 24  # Seconds an OSRM route is reused
+
+# Delta sync (see trucker_logbook/sync.py)
+SYNC_SETTLE_SECONDS = 5  # Rows younger than this are held back
+SYNC_TOMBSTONE_RETENTION_DAYS = 30  # Older deletions are purged by archive_trips
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class TruckerLogbookConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'trucker_logbook'
+
+    def ready(self):
+        # Load the precomputed city matrix once at startup.
+        from .citymatrix import load_city_matrix
+
+        load_city_matrix()
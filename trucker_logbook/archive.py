@@ -0,0 +1,113 @@
+import json
+import zlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import LogArchive, LogEntry, Trip
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# Columns stored in an archive, in the order they are packed.
+ARCHIVE_FIELDS = (
+    "id",
+    "timestamp",
+    "duty_status",
+    "location",
+    "remarks",
+    "latitude",
+    "longitude",
+)
+
+
+def encode_log_entries(log_entries):
+    """
+    Packs log entries into the archive representation: one JSON array per
+    column (timestamps as integer microseconds since the epoch), compressed
+    with zlib.
+    """
+    columns = {field: [] for field in ARCHIVE_FIELDS}
+    for entry in log_entries:
+        for field in ARCHIVE_FIELDS:
+            value = getattr(entry, field)
+            if field == "timestamp":
+                value = (value - EPOCH) // timedelta(microseconds=1)
+            columns[field].append(value)
+    payload = json.dumps(columns, separators=(",", ":")).encode()
+    return zlib.compress(payload, 9)
+
+
+def decode_log_entries(trip, data):
+    """
+    Rebuilds unsaved LogEntry instances (with their original ids) from an
+    archive, ordered by timestamp.
+    """
+    columns = json.loads(zlib.decompress(data))
+    timestamps = [
+        EPOCH + timedelta(microseconds=value) for value in columns["timestamp"]
+    ]
+    return [
+        LogEntry(
+            trip=trip,
+            **{
+                field: timestamps[i] if field == "timestamp" else columns[field][i]
+                for field in ARCHIVE_FIELDS
+            },
+        )
+        for i in range(len(timestamps))
+    ]
+
+
+def archive_trip(trip):
+    """
+    Moves a trip's log entries out of the LogEntry table into a compressed
+    LogArchive row.  Returns the number of entries archived.
+    """
+    with transaction.atomic():
+        trip = Trip.objects.select_for_update().get(pk=trip.pk)
+        log_entries = list(trip.log_entries.all().order_by("timestamp"))
+        entry_ids = [entry.id for entry in log_entries]
+        LogArchive.objects.update_or_create(
+            trip=trip,
+            defaults={
+                "data": encode_log_entries(log_entries),
+                "entry_count": len(log_entries),
+                "first_entry_id": min(entry_ids, default=None),
+                "last_entry_id": max(entry_ids, default=None),
+            },
+        )
+        # Tombstones included, the archive replaces every row of the trip.
+        LogEntry.all_objects.filter(trip=trip).delete()
+        trip.archived_at = timezone.now()
+        trip.save(update_fields=["archived_at"])
+    return len(log_entries)
+
+
+def get_log_entries(trip):
+    """
+    Returns a trip's log entries ordered by timestamp, reading them from the
+    archive when the trip has been archived.
+    """
+    if trip.archived_at:
+        archive = LogArchive.objects.filter(trip=trip).only("data").first()
+        if archive:
+            return decode_log_entries(trip, archive.data)
+    # Not archived, or archived_at was set without an archive: the live rows
+    # are all there is.
+    return trip.log_entries.all().order_by("timestamp")
+
+
+def get_archived_log_entry(pk):
+    """
+    Returns the archived log entry with id ``pk``, or None.  Only the archives
+    whose id range covers ``pk`` are decoded.
+    """
+    archives = LogArchive.objects.select_related("trip").filter(
+        first_entry_id__lte=pk, last_entry_id__gte=pk
+    )
+    for archive in archives:
+        for entry in decode_log_entries(archive.trip, archive.data):
+            if entry.id == pk:
+                return entry
+    return None
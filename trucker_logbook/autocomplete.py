@@ -0,0 +1,155 @@
+"""
+In-memory prefix index of known locations for autocompletion.
+
+Locations come from the city list, previously geocoded log entry locations
+and past trip locations.  They are kept as a sorted array of normalised keys,
+so the completions of a prefix are the contiguous run found by binary search,
+ranked by how often each location was used.  The index is built on the first
+query; after that queries never touch the database, and the index is refreshed
+incrementally, on a background thread, from the rows added since the last
+refresh.
+
+Each process keeps its own index, so every worker of a multi-process server
+builds and refreshes a copy, and a new location can take up to
+AUTOCOMPLETE_REFRESH_INTERVAL seconds to show up in all of them.
+"""
+
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import connection
+
+from .helper import CITIES, clean_location, normalise_location
+from .models import LogEntry, Trip
+
+
+class LocationIndex:
+    def __init__(self):
+        self.keys = []  # Sorted normalised locations
+        self.entries = {}  # key -> {spelling: count}
+        self.counts = {}  # key -> total count
+        self.last_trip_id = 0
+        self.last_log_entry_id = 0
+        self.refreshed_at = None
+        self.lock = threading.Lock()
+        self.refreshing = False
+
+    def add(self, location, count=1):
+        location = clean_location(location)
+        if not location:
+            return
+        key = normalise_location(location)
+        if key not in self.entries:
+            insort(self.keys, key)
+            self.entries[key] = {}
+            self.counts[key] = 0
+        spellings = self.entries[key]
+        spellings[location] = spellings.get(location, 0) + count
+        self.counts[key] += count
+
+    def complete(self, prefix, limit=10):
+        """
+        Returns up to ``limit`` locations starting with ``prefix``, most used
+        first, each in its most common spelling.
+        """
+        prefix = normalise_location(prefix)
+        with self.lock:
+            start = bisect_left(self.keys, prefix)
+            end = bisect_left(self.keys, prefix + "\U0010ffff", start)
+            matches = heapq.nsmallest(
+                limit,
+                (self.keys[i] for i in range(start, end)),
+                key=lambda key: (-self.counts[key], key),
+            )
+            return [
+                {
+                    "location": max(
+                        self.entries[key].items(), key=lambda item: item[1]
+                    )[0],
+                    "count": self.counts[key],
+                }
+                for key in matches
+            ]
+
+    def refresh(self):
+        """
+        Adds the trip and geocoded log entry locations saved since the last
+        refresh.
+        """
+        trips = list(
+            Trip.objects.filter(id__gt=self.last_trip_id)
+            .order_by("id")
+            .values_list("id", "start_location", "pickup_location", "dropoff_location")
+        )
+        log_entries = list(
+            LogEntry.objects.filter(
+                id__gt=self.last_log_entry_id, latitude__isnull=False
+            )
+            .exclude(duty_status="DR")
+            .exclude(location__istartswith="En route")
+            .order_by("id")
+            .values_list("id", "location")
+        )
+        with self.lock:
+            for _, *locations in trips:
+                for location in locations:
+                    self.add(location)
+            for _, location in log_entries:
+                self.add(location)
+            if trips:
+                self.last_trip_id = trips[-1][0]
+            if log_entries:
+                self.last_log_entry_id = log_entries[-1][0]
+            self.refreshed_at = time.monotonic()
+
+    def is_stale(self):
+        return (
+            self.refreshed_at is None
+            or time.monotonic() - self.refreshed_at
+            > settings.AUTOCOMPLETE_REFRESH_INTERVAL
+        )
+
+    def refresh_in_background(self):
+        """
+        Starts a refresh on a background thread, unless one is running.
+        """
+        with self.lock:
+            if self.refreshing:
+                return
+            self.refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                connection.close()
+                self.refreshing = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_location_index():
+    """
+    Returns the process-wide location index, built from the city list and the
+    database on first use and scheduled for a refresh whenever it is stale.
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            index = LocationIndex()
+            with index.lock:
+                for city in CITIES:
+                    index.add(city)
+            index.refresh()
+            _index = index
+            return _index
+    if _index.is_stale():
+        _index.refresh_in_background()
+    return _index
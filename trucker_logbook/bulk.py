@@ -0,0 +1,87 @@
+import io
+from datetime import date, datetime
+
+from django.db import connections, router
+
+
+def _copy_value(value):
+    """
+    Formats a single value for PostgreSQL's text COPY format.
+    """
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _insert_fields(model):
+    return [field for field in model._meta.concrete_fields if not field.primary_key]
+
+
+def copy_insert(model, objs, batch_size=5000, using=None):
+    """
+    Streams unsaved model instances into their table with COPY ... FROM STDIN.
+    Values go through each field's ``pre_save`` and ``get_db_prep_save`` just
+    like ``bulk_create``, but without building an INSERT statement per batch.
+    Only supported on PostgreSQL.
+    """
+    using = using or router.db_for_write(model)
+    connection = connections[using]
+    fields = _insert_fields(model)
+    statement = "COPY {} ({}) FROM STDIN".format(
+        connection.ops.quote_name(model._meta.db_table),
+        ", ".join(connection.ops.quote_name(field.column) for field in fields),
+    )
+
+    written = 0
+    buffer = io.StringIO()
+    with connection.cursor() as cursor:
+        for obj in objs:
+            values = (
+                field.get_db_prep_save(field.pre_save(obj, True), connection)
+                for field in fields
+            )
+            buffer.write("\t".join(_copy_value(value) for value in values))
+            buffer.write("\n")
+            written += 1
+            if written % batch_size == 0:
+                buffer.seek(0)
+                cursor.copy_expert(statement, buffer)
+                buffer = io.StringIO()
+        if buffer.tell():
+            buffer.seek(0)
+            cursor.copy_expert(statement, buffer)
+    return written
+
+
+def bulk_insert(model, objs, batch_size=5000, using=None):
+    """
+    Inserts unsaved model instances as fast as the database allows: COPY on
+    PostgreSQL, batched ``bulk_create`` everywhere else.  Returns the number of
+    rows written.
+    """
+    using = using or router.db_for_write(model)
+    if connections[using].vendor == "postgresql":
+        return copy_insert(model, objs, batch_size=batch_size, using=using)
+
+    written = 0
+    batch = []
+    for obj in objs:
+        batch.append(obj)
+        if len(batch) == batch_size:
+            model.objects.using(using).bulk_create(batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        model.objects.using(using).bulk_create(batch)
+        written += len(batch)
+    return written
@@ -0,0 +1,177 @@
+import math
+import struct
+import sys
+from array import array
+from pathlib import Path
+
+# Precomputed pairwise road distances and driving times between the known
+# cities, built once by the build_city_matrix command and loaded at startup, so
+# planning a trip between known cities needs no geocoding or routing calls.
+#
+# File layout (little-endian):
+#   magic "CMX1", uint32 city count n
+#   n x (uint32 byte length, UTF-8 name)
+#   float32[n] latitudes, float32[n] longitudes
+#   float32[n * n] distances in miles, float32[n * n] durations in hours
+MATRIX_PATH = Path(__file__).resolve().parent / "data" / "city_matrix.bin"
+MAGIC = b"CMX1"
+HEADER = struct.Struct("<4sI")
+
+# The known cities, with approximate city-centre coordinates.  helper.CITIES
+# is derived from this.
+CITY_COORDINATES = {
+    "Atlanta, GA": (33.7490, -84.3880),
+    "Chicago, IL": (41.8781, -87.6298),
+    "Houston, TX": (29.7604, -95.3698),
+    "Phoenix, AZ": (33.4484, -112.0740),
+    "Philadelphia, PA": (39.9526, -75.1652),
+    "San Antonio, TX": (29.4241, -98.4936),
+    "San Diego, CA": (32.7157, -117.1611),
+    "Dallas, TX": (32.7767, -96.7970),
+    "San Jose, CA": (37.3382, -121.8863),
+    "Austin, TX": (30.2672, -97.7431),
+    "Jacksonville, FL": (30.3322, -81.6557),
+    "Fort Worth, TX": (32.7555, -97.3308),
+    "Columbus, OH": (39.9612, -82.9988),
+    "Charlotte, NC": (35.2271, -80.8431),
+    "San Francisco, CA": (37.7749, -122.4194),
+    "Indianapolis, IN": (39.7684, -86.1581),
+    "Seattle, WA": (47.6062, -122.3321),
+    "Denver, CO": (39.7392, -104.9903),
+    "Washington, DC": (38.9072, -77.0369),
+    "Boston, MA": (42.3601, -71.0589),
+}
+
+
+def _little_endian(values):
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+class CityMatrix:
+    """
+    Distance/duration lookups between known cities in O(1).
+    """
+
+    def __init__(self, names, latitudes, longitudes, distances, durations):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.distances = distances
+        self.durations = durations
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def coordinates(self, name):
+        i = self.index[name]
+        return self.latitudes[i], self.longitudes[i]
+
+    def miles(self, origin, destination):
+        n = len(self.names)
+        return self.distances[self.index[origin] * n + self.index[destination]]
+
+    def hours(self, origin, destination):
+        n = len(self.names)
+        return self.durations[self.index[origin] * n + self.index[destination]]
+
+    def plan_path(self, waypoints, max_leg_hours):
+        """
+        Returns the cities to stop at when driving through ``waypoints`` in
+        order, with each leg at most ``max_leg_hours`` where possible.  Every
+        stop is the city that gets closest to the next waypoint within one
+        leg.  The waypoints themselves are included, except the first.
+        """
+        path = []
+        current = waypoints[0]
+        for target in waypoints[1:]:
+            while self.hours(current, target) > max_leg_hours:
+                reachable = [
+                    city
+                    for city in self.names
+                    if city not in (current, target)
+                    and self.hours(current, city) <= max_leg_hours
+                    and self.hours(city, target) < self.hours(current, target)
+                ]
+                if not reachable:
+                    break  # No city in between, drive the long leg
+                current = min(reachable, key=lambda city: self.hours(city, target))
+                path.append(current)
+            if target != current:
+                path.append(target)
+                current = target
+        return path
+
+    def to_bytes(self):
+        encoded = [name.encode() for name in self.names]
+        parts = [HEADER.pack(MAGIC, len(encoded))]
+        for name in encoded:
+            parts.append(struct.pack("<I", len(name)) + name)
+        for column in (self.latitudes, self.longitudes, self.distances, self.durations):
+            parts.append(_little_endian(array("f", column)).tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Not a city matrix file")
+        offset = HEADER.size
+        names = []
+        for _ in range(count):
+            (length,) = struct.unpack_from("<I", data, offset)
+            offset += 4
+            names.append(data[offset : offset + length].decode())
+            offset += length
+
+        columns = []
+        for size in (count, count, count * count, count * count):
+            column = array("f")
+            column.frombytes(data[offset : offset + 4 * size])
+            columns.append(_little_endian(column))
+            offset += 4 * size
+        return cls(names, *columns)
+
+
+def estimate_matrix(coordinates, road_factor=1.25, average_mph=55):
+    """
+    Local stand-in for OSRM: great-circle distance scaled by a typical road
+    detour factor, driven at a constant average speed.
+    """
+    names = list(coordinates)
+    distances = array("f")
+    for origin in names:
+        lat1, lon1 = map(math.radians, coordinates[origin])
+        for destination in names:
+            lat2, lon2 = map(math.radians, coordinates[destination])
+            haversine = (
+                math.sin((lat2 - lat1) / 2) ** 2
+                + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+            )
+            miles = 2 * 3958.8 * math.asin(math.sqrt(haversine))
+            distances.append(miles * road_factor)
+    durations = array("f", (miles / average_mph for miles in distances))
+    return CityMatrix(
+        names,
+        array("f", (coordinates[name][0] for name in names)),
+        array("f", (coordinates[name][1] for name in names)),
+        distances,
+        durations,
+    )
+
+
+_matrices = {}  # Resolved path -> CityMatrix
+
+
+def load_city_matrix(path=MATRIX_PATH):
+    """
+    Returns the city matrix stored at ``path``, reading it from disk on first
+    use.  Returns None when the matrix file hasn't been built.
+    """
+    path = Path(path).resolve()
+    if path not in _matrices and path.exists():
+        _matrices[path] = CityMatrix.from_bytes(path.read_bytes())
+    return _matrices.get(path)
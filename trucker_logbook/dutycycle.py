@@ -0,0 +1,195 @@
+import sys
+from array import array
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import DailySummary, Driver
+
+# Property-carrying drivers may be on duty at most 70 hours in any 8
+# consecutive days (49 CFR 395.3(b)(2)).
+CYCLE_DAYS = 8
+CYCLE_LIMIT_HOURS = 70
+
+
+def _unpack(data):
+    hours = array("f")
+    hours.frombytes(bytes(data) if data else bytes(4 * CYCLE_DAYS))
+    if sys.byteorder == "big":
+        hours.byteswap()
+    return hours
+
+
+def _pack(hours):
+    if sys.byteorder == "big":
+        hours = array("f", hours)
+        hours.byteswap()
+    return hours.tobytes()
+
+
+def _slot(day):
+    return day.toordinal() % CYCLE_DAYS
+
+
+def _load_pending(driver):
+    return {
+        date.fromisoformat(day): hours for day, hours in driver.cycle_pending.items()
+    }
+
+
+def _dump_pending(pending):
+    return {
+        day.isoformat(): hours
+        for day, hours in sorted(pending.items())
+        if abs(hours) > 1e-6
+    }
+
+
+def _advance(hours, anchor, day):
+    """
+    Moves the ring buffer's anchor forward to ``day``, clearing the slots of
+    the days that fall out of the window.  Returns the new anchor.
+    """
+    if anchor is None or (day - anchor).days >= CYCLE_DAYS:
+        for i in range(CYCLE_DAYS):
+            hours[i] = 0
+        return day
+    while anchor < day:
+        anchor += timedelta(days=1)
+        hours[_slot(anchor)] = 0
+    return anchor
+
+
+def _buffer_hours_used(driver, today):
+    anchor = driver.cycle_anchor
+    if anchor is None or (today - anchor).days >= CYCLE_DAYS:
+        return 0.0
+    if today == anchor:
+        return driver.cycle_total
+
+    # Only the days held by both windows count.
+    hours = _unpack(driver.cycle_hours)
+    first = max(today, anchor) - timedelta(days=CYCLE_DAYS - 1)
+    last = min(today, anchor)
+    return sum(
+        hours[_slot(first + timedelta(days=i))] for i in range((last - first).days + 1)
+    )
+
+
+def hours_used(driver, today=None):
+    """
+    Returns the driver's on-duty hours in the 8 days ending ``today``, reading
+    at most eight slots of the ring buffer plus the pending future days that
+    have come since.
+    """
+    if today is None:
+        today = timezone.localdate()
+    first = today - timedelta(days=CYCLE_DAYS - 1)
+    return _buffer_hours_used(driver, today) + sum(
+        hours for day, hours in _load_pending(driver).items() if first <= day <= today
+    )
+
+
+def hours_available(driver, today=None):
+    """
+    Returns how many on-duty hours the driver has left in their 70-hour/8-day
+    cycle.
+    """
+    return max(0.0, CYCLE_LIMIT_HOURS - hours_used(driver, today))
+
+
+def _fill(driver, hours, anchor, pending, days, today):
+    """
+    Adds ``days`` to a driver's ring buffer and pending days.  Days after
+    ``today`` wait in the pending days, so that a trip planned ahead never
+    moves the window past, and clears, the days that still count.  Pending days
+    that have come are moved into the buffer.
+    """
+    days = dict(days)
+    for day in list(pending):
+        if day <= today:
+            days[day] = days.get(day, 0) + pending.pop(day)
+    for day in [day for day in days if day > today]:
+        pending[day] = pending.get(day, 0) + days.pop(day)
+
+    if days:
+        anchor = _advance(hours, anchor, max(days))
+        for day, delta in days.items():
+            if (anchor - day).days < CYCLE_DAYS:
+                hours[_slot(day)] += delta
+    driver.cycle_hours = _pack(hours)
+    driver.cycle_anchor = anchor
+    driver.cycle_total = sum(hours)
+    driver.cycle_pending = _dump_pending(pending)
+
+
+def apply_duty_deltas(deltas, today=None):
+    """
+    Adds on-duty hour changes to the drivers' ring buffers.  ``deltas`` maps
+    driver ids to ``{date: hours}`` dicts.  Days older than a driver's window
+    are dropped, later days up to ``today`` move the window forward and days
+    after it are kept aside until they come.  Every driver row is locked while
+    it is updated.
+    """
+    if today is None:
+        today = timezone.localdate()
+    deltas = {
+        driver_id: days for driver_id, days in deltas.items() if driver_id and days
+    }
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        drivers = list(Driver.objects.select_for_update().filter(id__in=list(deltas)))
+        for driver in drivers:
+            _fill(
+                driver,
+                _unpack(driver.cycle_hours),
+                driver.cycle_anchor,
+                _load_pending(driver),
+                deltas[driver.id],
+                today,
+            )
+        Driver.objects.bulk_update(
+            drivers, ["cycle_hours", "cycle_anchor", "cycle_total", "cycle_pending"]
+        )
+
+
+def summary_deltas(old, new):
+    """
+    Returns the on-duty hour changes between two ``{date: total_lines_3_4}``
+    dicts.
+    """
+    deltas = dict(new)
+    for day, hours in old.items():
+        deltas[day] = deltas.get(day, 0) - hours
+    return {day: delta for day, delta in deltas.items() if delta}
+
+
+def rebuild_duty_cycle(driver_id, today=None):
+    """
+    Recomputes a driver's ring buffer from the daily summaries of their trips,
+    for when trips are assigned to or taken away from them.
+    """
+    if today is None:
+        today = timezone.localdate()
+    with transaction.atomic():
+        driver = Driver.objects.select_for_update().get(pk=driver_id)
+        days = dict(
+            DailySummary.objects.filter(trip__driver=driver)
+            .values("date")
+            .annotate(hours=Sum("total_lines_3_4"))
+            .values_list("date", "hours")
+        )
+        _fill(driver, _unpack(None), None, {}, days, today)
+        driver.save(
+            update_fields=[
+                "cycle_hours",
+                "cycle_anchor",
+                "cycle_total",
+                "cycle_pending",
+            ]
+        )
+    return driver
@@ -0,0 +1,294 @@
+"""
+Streaming import of ELD log exports (CSV or NDJSON).
+
+Rows are read one at a time and validated in fixed-size batches: each batch
+costs one query for the trips it mentions and one for their latest existing
+timestamps, then its valid rows are written with bulk_insert (COPY on
+PostgreSQL).  Only the current batch and one timestamp per trip are held in
+memory.  Daily summaries and timelines of the affected trips are recomputed
+once, after the last batch.
+
+Each row has a trip id (or the import's default trip), an ISO 8601
+timestamp, a duty status, a location and optional remarks, latitude and
+longitude.  A trip's timestamps must increase, within the file and after the
+entries it already has.
+"""
+
+import csv
+import json
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .bulk import bulk_insert
+from .helper import calculate_daily_summary
+from .models import LogEntry, Trip
+from .timeline import build_timeline
+
+FORMATS = ("csv", "ndjson")
+DUTY_STATUSES = {
+    code: code for code, _ in LogEntry._meta.get_field("duty_status").choices
+}
+DUTY_STATUSES.update(
+    {
+        label.upper(): code
+        for code, label in LogEntry._meta.get_field("duty_status").choices
+    }
+)
+DUTY_STATUSES.update({"OFF": "OD", "D": "DR", "DRIVING": "DR", "SLEEPER": "SB"})
+LOCATION_MAX_LENGTH = LogEntry._meta.get_field("location").max_length
+
+
+def detect_format(name="", content_type=""):
+    """
+    Guesses the export format from a file name or content type.
+    """
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in content_type:
+        return "ndjson"
+    if name.endswith(".csv") or "csv" in content_type:
+        return "csv"
+    return None
+
+
+def _lines(stream):
+    """
+    Decodes a binary stream line by line, dropping a UTF-8 byte order mark.
+    """
+    first = True
+    for line in iter(stream.readline, b""):
+        line = line.decode("utf-8", errors="replace")
+        if first:
+            line = line.lstrip("\ufeff")
+            first = False
+        yield line
+
+
+def iter_rows(stream, fmt):
+    """
+    Yields ``(row number, fields or None, error or None)`` for each record of
+    a binary stream.  Row numbers are line numbers in the file.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(_lines(stream))
+        for fields in reader:
+            yield reader.line_num, fields, None
+        return
+
+    for number, line in enumerate(_lines(stream), start=1):
+        if not line.strip():
+            continue
+        try:
+            fields = json.loads(line)
+        except ValueError as e:
+            yield number, None, {"row": f"Invalid JSON: {e}"}
+            continue
+        if not isinstance(fields, dict):
+            yield number, None, {"row": "Expected a JSON object"}
+            continue
+        yield number, fields, None
+
+
+def _text(value):
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+def _parse_timestamp(value):
+    value = _text(value)
+    try:
+        timestamp = parse_datetime(value)
+    except ValueError:
+        timestamp = None
+    if timestamp is None:
+        try:
+            # The format the API itself returns.
+            timestamp = datetime.strptime(value, "%Y-%m-%d | %H:%M:%S")
+        except ValueError:
+            return None
+    if timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp)
+    return timestamp
+
+
+def _parse_coordinate(value, limit):
+    value = _text(value)
+    if not value:
+        return None
+    coordinate = float(value)
+    if not -limit <= coordinate <= limit:
+        raise ValueError
+    return coordinate
+
+
+class LogImport:
+    """
+    State of one import: the trips seen so far and the error report.
+    """
+
+    def __init__(self, default_trip_id=None, max_errors=1000):
+        self.default_trip_id = default_trip_id
+        self.max_errors = max_errors
+        self.trips = {}  # trip id -> None when importable, else the reason
+        self.last_timestamps = {}  # trip id -> latest timestamp
+        self.affected_trip_ids = set()
+        self.imported = 0
+        self.rejected = 0
+        self.errors = []
+
+    def reject(self, number, errors):
+        self.rejected += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": number, "errors": errors})
+
+    def load_trips(self, trip_ids):
+        """
+        Looks up the trips the batch mentions for the first time, with the
+        latest timestamp they already have.
+        """
+        new = set(trip_ids) - set(self.trips)
+        if not new:
+            return
+        for trip_id in new:
+            self.trips[trip_id] = "Trip not found"
+        for trip_id, archived_at in Trip.objects.filter(id__in=new).values_list(
+            "id", "archived_at"
+        ):
+            self.trips[trip_id] = "Trip is archived" if archived_at else None
+        self.last_timestamps.update(
+            LogEntry.objects.filter(trip_id__in=new)
+            .values("trip_id")
+            .annotate(latest=Max("timestamp"))
+            .values_list("trip_id", "latest")
+        )
+
+    def validate(self, fields):
+        """
+        Returns ``(log entry, None)`` for a valid row, else ``(None, errors)``.
+        """
+        errors = {}
+        trip_id = _text(fields.get("trip") or fields.get("trip_id"))
+        try:
+            trip_id = int(trip_id) if trip_id else self.default_trip_id
+        except ValueError:
+            trip_id = None
+        if trip_id is None:
+            errors["trip"] = "A trip id is required"
+        elif self.trips.get(trip_id, "Trip not found"):
+            errors["trip"] = self.trips.get(trip_id, "Trip not found")
+
+        timestamp = _parse_timestamp(fields.get("timestamp"))
+        if timestamp is None:
+            errors["timestamp"] = "Expected an ISO 8601 date and time"
+        elif trip_id is not None and trip_id in self.last_timestamps:
+            if timestamp <= self.last_timestamps[trip_id]:
+                errors["timestamp"] = "Must be later than the trip's previous entry"
+
+        duty_status = DUTY_STATUSES.get(_text(fields.get("duty_status")).upper())
+        if duty_status is None:
+            errors["duty_status"] = "Expected one of OD, SB, DR or ON"
+
+        location = _text(fields.get("location"))
+        if not location:
+            errors["location"] = "A location is required"
+        elif len(location) > LOCATION_MAX_LENGTH:
+            errors["location"] = f"At most {LOCATION_MAX_LENGTH} characters"
+
+        try:
+            latitude = _parse_coordinate(fields.get("latitude"), 90)
+        except ValueError:
+            errors["latitude"] = "Expected a number between -90 and 90"
+        try:
+            longitude = _parse_coordinate(fields.get("longitude"), 180)
+        except ValueError:
+            errors["longitude"] = "Expected a number between -180 and 180"
+
+        if errors:
+            return None, errors
+        self.last_timestamps[trip_id] = timestamp
+        return (
+            LogEntry(
+                trip_id=trip_id,
+                timestamp=timestamp,
+                duty_status=duty_status,
+                location=location,
+                remarks=_text(fields.get("remarks")) or None,
+                latitude=latitude,
+                longitude=longitude,
+            ),
+            None,
+        )
+
+    def import_batch(self, batch):
+        trip_ids = []
+        for _, fields, _ in batch:
+            if fields is not None:
+                trip_id = _text(fields.get("trip") or fields.get("trip_id"))
+                # Not isdigit(): it accepts characters like "²" that int() rejects.
+                if trip_id.isdecimal():
+                    trip_ids.append(int(trip_id))
+        if self.default_trip_id is not None:
+            trip_ids.append(self.default_trip_id)
+        self.load_trips(trip_ids)
+
+        log_entries = []
+        for number, fields, error in batch:
+            if error:
+                self.reject(number, error)
+                continue
+            log_entry, errors = self.validate(fields)
+            if errors:
+                self.reject(number, errors)
+            else:
+                log_entries.append(log_entry)
+
+        with transaction.atomic():
+            self.imported += bulk_insert(LogEntry, log_entries)
+        self.affected_trip_ids.update(entry.trip_id for entry in log_entries)
+
+    def run(self, stream, fmt, batch_size=5000):
+        batch = []
+        for row in iter_rows(stream, fmt):
+            batch.append(row)
+            if len(batch) == batch_size:
+                self.import_batch(batch)
+                batch = []
+        if batch:
+            self.import_batch(batch)
+
+        # Recompute each affected trip once, now that all its rows are in.
+        trips = Trip.objects.filter(id__in=self.affected_trip_ids)
+        for trip in trips:
+            calculate_daily_summary(trip)
+            build_timeline(trip)
+        # The trips have logs now, generate_logs must not replace them.
+        trips.filter(logs_generated_at__isnull=True).update(
+            logs_generated_at=timezone.now()
+        )
+        return self.report()
+
+    def report(self):
+        return {
+            "imported": self.imported,
+            "rejected": self.rejected,
+            "trips": sorted(self.affected_trip_ids),
+            "errors": self.errors,
+            "errors_truncated": self.rejected > len(self.errors),
+        }
+
+
+def import_log_entries(
+    stream, fmt, default_trip_id=None, batch_size=5000, max_errors=1000
+):
+    """
+    Imports the log entries of a binary CSV or NDJSON stream and returns the
+    report: counts, affected trips and the errors of up to ``max_errors``
+    rejected rows.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format {fmt!r}, expected csv or ndjson")
+    log_import = LogImport(default_trip_id=default_trip_id, max_errors=max_errors)
+    return log_import.run(stream, fmt, batch_size=batch_size)
@@ -0,0 +1,151 @@
+import math
+
+# Geohashes interleave longitude and latitude bits, five bits per character, so
+# that points sharing a prefix share a cell.  Precision 9 is a cell of about
+# 5m x 5m, plenty for stop locations.
+GEOHASH_PRECISION = 9
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    characters = []
+    bits = 0
+    bit_count = 0
+    even = True  # Even bits encode longitude
+    while len(characters) < precision:
+        value, interval = (longitude, lon_range) if even else (latitude, lat_range)
+        middle = (interval[0] + interval[1]) / 2
+        if value >= middle:
+            bits = bits * 2 + 1
+            interval[0] = middle
+        else:
+            bits = bits * 2
+            interval[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            characters.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(characters)
+
+
+def cell_size(precision):
+    """
+    Returns the (latitude, longitude) size in degrees of a geohash cell.
+    """
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180 / 2**lat_bits, 360 / 2**lon_bits
+
+
+def longitude_ranges(min_lon, max_lon):
+    """
+    Splits a longitude range crossing the antimeridian into ranges within
+    [-180, 180].  A crossing range either runs past +/-180 (as boxes around a
+    point near it do) or has ``min_lon`` greater than ``max_lon``.
+    """
+    if min_lon > max_lon:
+        return [(min_lon, 180.0), (-180.0, max_lon)]
+    if max_lon - min_lon >= 360:
+        return [(-180.0, 180.0)]
+    if max_lon > 180:
+        return [(min_lon, 180.0), (-180.0, max_lon - 360)]
+    if min_lon < -180:
+        return [(min_lon + 360, 180.0), (-180.0, max_lon)]
+    return [(min_lon, max_lon)]
+
+
+def covering_prefixes(min_lat, min_lon, max_lat, max_lon, max_cells=16):
+    """
+    Returns the geohash prefixes of the cells covering a bounding box, using the
+    finest precision that needs at most ``max_cells`` cells.  A box crossing
+    the antimeridian is covered as its two halves.
+    """
+    ranges = longitude_ranges(min_lon, max_lon)
+    prefixes = set()
+    for low, high in ranges:
+        prefixes.update(
+            _covering_prefixes(
+                min_lat, low, max_lat, high, max(1, max_cells // len(ranges))
+            )
+        )
+    if "" in prefixes:
+        return [""]
+    return sorted(prefixes)
+
+
+def _covering_prefixes(min_lat, min_lon, max_lat, max_lon, max_cells):
+    min_lat, max_lat = max(min_lat, -90.0), min(max_lat, 90.0)
+    min_lon, max_lon = max(min_lon, -180.0), min(max_lon, 180.0)
+
+    best = None
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        lat_size, lon_size = cell_size(precision)
+        lat_cells = math.floor(max_lat / lat_size) - math.floor(min_lat / lat_size) + 1
+        lon_cells = math.floor(max_lon / lon_size) - math.floor(min_lon / lon_size) + 1
+        if lat_cells * lon_cells > max_cells:
+            break
+        best = (precision, lat_size, lon_size, lat_cells, lon_cells)
+    if best is None:
+        # Even single characters need too many cells, scan everything.
+        return [""]
+
+    precision, lat_size, lon_size, lat_cells, lon_cells = best
+    first_lat = math.floor(min_lat / lat_size) * lat_size
+    first_lon = math.floor(min_lon / lon_size) * lon_size
+    prefixes = set()
+    for i in range(lat_cells):
+        for j in range(lon_cells):
+            # Encode each cell's centre, clamped onto the globe.
+            latitude = min(first_lat + (i + 0.5) * lat_size, 90.0)
+            longitude = min(first_lon + (j + 0.5) * lon_size, 180.0)
+            prefixes.add(encode_geohash(latitude, longitude, precision))
+    return sorted(prefixes)
+
+
+def radius_bounding_box(latitude, longitude, radius_km):
+    """
+    Returns (min_lat, min_lon, max_lat, max_lon) enclosing a circle.  Near the
+    antimeridian the longitudes run past +/-180.
+    """
+    lat_delta = radius_km / KM_PER_DEGREE
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    lon_delta = min(radius_km / (KM_PER_DEGREE * cos_lat), 180.0)
+    return (
+        latitude - lat_delta,
+        longitude - lon_delta,
+        latitude + lat_delta,
+        longitude + lon_delta,
+    )
+
+
+def haversine_km(latitude, longitude, latitudes, longitudes):
+    """
+    Great-circle distances in km from one point to every point of the
+    ``latitudes``/``longitudes`` columns, computed in a single pass.
+    """
+    radians = math.radians
+    sin = math.sin
+    cos = math.cos
+    lat0 = radians(latitude)
+    lon0 = radians(longitude)
+    cos_lat0 = cos(lat0)
+    diameter = 2 * EARTH_RADIUS_KM
+    return [
+        diameter
+        * math.asin(
+            min(
+                1.0,
+                math.sqrt(
+                    sin((radians(lat) - lat0) / 2) ** 2
+                    + cos_lat0 * cos(radians(lat)) * sin((radians(lon) - lon0) / 2) ** 2
+                ),
+            )
+        )
+        for lat, lon in zip(latitudes, longitudes)
+    ]
@@ -1,45 +1,70 @@
+import hashlib
+import re
 import requests
 from datetime import timedelta
 import random
+from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
-from .models import Trip, DailySummary, LogEntry, Configuration
-
-# List of possible city-state combinations (expand this list!)
-CITIES = [
-    "Atlanta, GA",
-    "Chicago, IL",
-    "Houston, TX",
-    "Phoenix, AZ",
-    "Philadelphia, PA",
-    "San Antonio, TX",
-    "San Diego, CA",
-    "Dallas, TX",
-    "San Jose, CA",
-    "Austin, TX",
-    "Jacksonville, FL",
-    "Fort Worth, TX",
-    "Columbus, OH",
-    "Charlotte, NC",
-    "San Francisco, CA",
-    "Indianapolis, IN",
-    "Seattle, WA",
-    "Denver, CO",
-    "Washington, DC",
-    "Boston, MA",
-    # Add more
-]
+from .models import Trip, DailySummary, LogEntry, Configuration, Driver
+from .citymatrix import CITY_COORDINATES, load_city_matrix
+from .dutycycle import apply_duty_deltas, summary_deltas
+from .planner import PlannedEntry, plan_trip
+from .ratelimit import UpstreamThrottled, acquire
+
+# List of possible city-state combinations, the cities of the city matrix
+# (add more to CITY_COORDINATES)
+CITIES = list(CITY_COORDINATES)
+
+
+def clean_location(location):
+    """
+    Trims a location and collapses its whitespace, with a single space after
+    each comma.
+    """
+    location = re.sub(r"\s+", " ", location).strip()
+    return re.sub(r"\s*,\s*", ", ", location)
+
+
+def normalise_location(location):
+    """
+    Returns the lookup key of a location, so that spellings differing only in
+    case or spacing match.
+    """
+    return clean_location(location).casefold()
 
 
 def geocode_location(location_string):
     """
     Geocodes a location string using Nominatim.
+    Results are cached by normalised location, so each distinct place is
+    looked up once.  Calls go through the shared rate limiter; when Nominatim
+    can't be called in time the location is treated as not found.
     """
+    key = (
+        "geocode:"
+        + hashlib.sha1(normalise_location(location_string).encode()).hexdigest()
+    )
+    coords = cache.get(key)
+    if coords is not None:
+        return tuple(coords)
+
+    coords = _geocode_location(clean_location(location_string))
+    if coords is not None:
+        cache.set(key, coords, timeout=settings.GEOCODE_CACHE_TIMEOUT)
+    return coords
+
+
+def _geocode_location(location_string):
     try:
+        acquire("nominatim")
         headers = {
             "User-Agent": "TruckerLogbookApp/1.0"
         }  # Replace with your app name/version
-        url = f"https://nominatim.openstreetmap.org/search?q={location_string}&format=json&limit=1"
-        response = requests.get(url, headers=headers)
+        url = f"{settings.NOMINATIM_URL}/search?q={location_string}&format=json&limit=1"
+        response = requests.get(
+            url, headers=headers, timeout=settings.UPSTREAM_REQUEST_TIMEOUT
+        )
         response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
         data = response.json()
         if data:
@@ -52,15 +77,214 @@ def geocode_location(location_string):
         return None  # Handle request errors (e.g., connection errors, timeouts)
     except (KeyError, ValueError) as e:
         return None  # Handle errors related to unexpected response format
+    except UpstreamThrottled:
+        return None  # Rate limited, fail fast rather than wait
+
+
+def _locator(matrix, geocoder, on_progress):
+    """
+    Returns a function giving the (lat, lon) of a location, from the city
+    matrix for known cities and from ``geocoder`` otherwise.  Each location is
+    looked up, and reported to ``on_progress``, once.
+    """
+    found = {}
+
+    def get_lat_lon(location):
+        if location in found:
+            return found[location]
+        if matrix and location in matrix:
+            coords = matrix.coordinates(location)
+        else:
+            coords = geocoder(location)
+        latitude, longitude = coords if coords else (None, None)
+        on_progress(
+            "geocoded",
+            {"location": location, "latitude": latitude, "longitude": longitude},
+        )
+        found[location] = latitude, longitude
+        return latitude, longitude
+
+    return get_lat_lon
+
+
+def _plan_rows(
+    start_date,
+    start_location,
+    pickup_location,
+    dropoff_location,
+    rng,
+    get_lat_lon,
+    configuration,
+    matrix,
+):
+    """
+    Plans a trip with the compiled plan of its configuration.  Returns the
+    PlannedEntry rows, or None when a location has no coordinates.
+    """
+    coordinates = {
+        location: get_lat_lon(location)
+        for location in dict.fromkeys(
+            (start_location, pickup_location, dropoff_location)
+        )
+    }
+    if any(latitude is None for latitude, _ in coordinates.values()):
+        return None
+    return plan_trip(
+        configuration,
+        start_location,
+        pickup_location,
+        dropoff_location,
+        coordinates,
+        trip_start_time(start_date),
+        rng,
+        matrix,
+    )
+
+
+def trip_start_time(start_date):
+    return timezone.make_aware(
+        timezone.datetime.combine(start_date, timezone.datetime.min.time())
+    )
+
+
+def generate_log_rows(
+    start_date,
+    start_location,
+    pickup_location,
+    dropoff_location,
+    rng=None,
+    geocoder=geocode_location,
+    configuration=None,
+):
+    """
+    Same as generate_dummy_logs, but returns PlannedEntry tuples instead of
+    LogEntry instances, for callers that only read the entries or write them
+    as raw rows.
+    """
+    if rng is None:
+        rng = random.Random()
+    on_progress = lambda event, payload: None
+    matrix = load_city_matrix()
+    get_lat_lon = _locator(matrix, geocoder, on_progress)
+    rows = _plan_rows(
+        start_date,
+        start_location,
+        pickup_location,
+        dropoff_location,
+        rng,
+        get_lat_lon,
+        configuration,
+        matrix,
+    )
+    if rows is None:
+        rows = [
+            PlannedEntry(
+                entry.timestamp,
+                entry.duty_status,
+                entry.location,
+                entry.remarks,
+                entry.latitude,
+                entry.longitude,
+            )
+            for entry in generate_random_logs(
+                None,
+                start_date,
+                start_location,
+                pickup_location,
+                dropoff_location,
+                rng,
+                get_lat_lon,
+                on_progress,
+            )
+        ]
+    return rows
 
 
 def generate_dummy_logs(
-    trip, start_date, start_location, pickup_location, dropoff_location
+    trip,
+    start_date,
+    start_location,
+    pickup_location,
+    dropoff_location,
+    rng=None,
+    geocoder=geocode_location,
+    on_progress=None,
+    configuration=None,
 ):
     """
     Generates a complex set of dummy log entries for a multi-day trip.
+
+    Pass a seeded ``random.Random`` as ``rng`` to make the simulation
+    reproducible, and a different ``geocoder`` (e.g. one that always returns
+    None) to skip the Nominatim lookups.  ``on_progress(event, payload)`` is
+    called after each location is geocoded ("geocoded") and with the new log
+    entries after each simulated day ("day_simulated").
+
+    The trip is planned by the compiled plan of its ``configuration`` (see
+    planner.py), with the defaults when there is none.  Known cities take
+    their coordinates and legs from the city matrix rather than from
+    Nominatim.  When a location can't be geocoded we fall back to
+    generate_random_logs.
     """
+    if rng is None:
+        rng = random.Random()
+    if on_progress is None:
+        on_progress = lambda event, payload: None
 
+    matrix = load_city_matrix()
+    get_lat_lon = _locator(matrix, geocoder, on_progress)
+    rows = _plan_rows(
+        start_date,
+        start_location,
+        pickup_location,
+        dropoff_location,
+        rng,
+        get_lat_lon,
+        configuration,
+        matrix,
+    )
+    if rows is None:
+        return generate_random_logs(
+            trip,
+            start_date,
+            start_location,
+            pickup_location,
+            dropoff_location,
+            rng,
+            get_lat_lon,
+            on_progress,
+        )
+
+    # Only now do the rows become model instances.
+    log_entries = [LogEntry(trip=trip, **row._asdict()) for row in rows]
+    day_start = 0
+    day_count = 0
+    for i, entry in enumerate(log_entries + [None]):
+        if i > day_start and (entry is None or entry.remarks == "Start of day"):
+            day_count += 1
+            on_progress(
+                "day_simulated",
+                {"day": day_count, "log_entries": log_entries[day_start:i]},
+            )
+            day_start = i
+    return log_entries
+
+
+def generate_random_logs(
+    trip,
+    start_date,
+    start_location,
+    pickup_location,
+    dropoff_location,
+    rng,
+    get_lat_lon,
+    on_progress,
+):
+    """
+    Generates at most five days of log entries with random driving blocks and
+    stops in random cities.  Used for trips whose locations can't be geocoded,
+    and as the baseline of the benchmark_planner command.
+    """
     log_entries = []
     current_time = timezone.make_aware(
         timezone.datetime.combine(start_date, timezone.datetime.min.time())
@@ -72,37 +296,30 @@ def generate_dummy_logs(
 
     # Helper lambda to add a random amount of minutes to current_time
     add_random_minutes = lambda hours: timedelta(
-        minutes=random.randint(0, int(hours * 60))
+        minutes=rng.randint(0, int(hours * 60))
     )
 
-    # Helper function to get lat/lon for a location
-    def get_lat_lon(location):
-        coords = geocode_location(location)
-        if coords:
-            return coords[0], coords[1]
-        else:
-            return None, None
-
     start_lat, start_lon = get_lat_lon(start_location)
     pickup_lat, pickup_lon = get_lat_lon(pickup_location)
     dropoff_lat, dropoff_lon = get_lat_lon(dropoff_location)
 
     def generate_intermediate_location():
         """Generates a random intermediate location from the CITIES list, not equal to current locations"""
-        intermediate_location = random.choice(CITIES)
+        intermediate_location = rng.choice(CITIES)
         while intermediate_location in [
             current_location,
             start_location,
             pickup_location,
             dropoff_location,
         ]:
-            intermediate_location = random.choice(CITIES)
+            intermediate_location = rng.choice(CITIES)
         return intermediate_location
 
     while (
         current_location != dropoff_location and day_count < 5
     ):  # Simulate a 5-day trip at most
         day_count += 1
+        day_start = len(log_entries)
         # Start of Day
         log_entries.append(
             LogEntry(
@@ -130,7 +347,7 @@ def generate_dummy_logs(
         current_time += add_random_minutes(0.5)
 
         # Driving for the first half of the day
-        driving_hours1 = random.uniform(3, 4)  # 3-4 hours driving
+        driving_hours1 = rng.uniform(3, 4)  # 3-4 hours driving
         log_entries.append(
             LogEntry(
                 trip=trip,
@@ -165,7 +382,7 @@ def generate_dummy_logs(
         current_time += timedelta(minutes=30)
 
         # Driving for the second half of the day
-        driving_hours2 = random.uniform(3, 4)
+        driving_hours2 = rng.uniform(3, 4)
         log_entries.append(
             LogEntry(
                 trip=trip,
@@ -216,7 +433,7 @@ def generate_dummy_logs(
         current_time += timedelta(hours=8)
 
         # Driving for the third half of the day
-        driving_hours3 = random.uniform(2, 3)
+        driving_hours3 = rng.uniform(2, 3)
         log_entries.append(
             LogEntry(
                 trip=trip,
@@ -249,7 +466,7 @@ def generate_dummy_logs(
             total_driving_hours = 0
 
         # On-Duty not driving (Pick Up)
-        on_duty_hours = random.uniform(0.5, 1)
+        on_duty_hours = rng.uniform(0.5, 1)
         log_entries.append(
             LogEntry(
                 trip=trip,
@@ -285,6 +502,10 @@ def generate_dummy_logs(
         current_location = end_of_day_location
         total_driving_hours = 0
         total_on_duty_hours = 0
+        on_progress(
+            "day_simulated",
+            {"day": day_count, "log_entries": log_entries[day_start:]},
+        )
 
     # Delivery Location
     log_entries.append(
@@ -298,12 +519,101 @@ def generate_dummy_logs(
             longitude=dropoff_lon,
         )
     )
+    on_progress("day_simulated", {"day": day_count, "log_entries": log_entries[-1:]})
     return log_entries
 
 
+def compute_daily_summaries(log_entries):
+    """
+    Calculates the daily summary totals for a trip's log entries, which must be
+    ordered by timestamp.  Returns a dict mapping each date to the field values
+    of its DailySummary.
+    """
+    # Group log entries by date
+    daily_logs = {}
+    for entry in log_entries:
+        date = entry.timestamp.date()
+        if date not in daily_logs:
+            daily_logs[date] = []
+        daily_logs[date].append(entry)
+
+    summaries = {}
+    # Iterate through each day
+    for date, entries in daily_logs.items():
+        # Initialize values
+        total_miles_driving = 0
+        total_off_duty_hours = 0
+        total_sleeper_berth_hours = 0
+        total_driving_hours = 0
+        total_on_duty_hours = 0
+
+        # Get previous day's summary to increment total miles driving
+        previous_summary = summaries.get(date - timedelta(days=1))
+        if previous_summary:
+            total_miles_driving = previous_summary["total_miles_driving"]
+
+        # Iterate through each log entry to get totals.
+        for i in range(len(entries)):
+            entry = entries[i]
+            if i > 0:
+                previous_entry = entries[i - 1]
+                time_diff = entry.timestamp - previous_entry.timestamp
+                hours = time_diff.total_seconds() / 3600
+
+                if previous_entry.duty_status == "OD":
+                    total_off_duty_hours += hours
+                elif previous_entry.duty_status == "SB":
+                    total_sleeper_berth_hours += hours
+                elif previous_entry.duty_status == "DR":
+                    total_driving_hours += hours
+                    # TODO: This requires us to get the miles from the MAP API.
+                    total_miles_driving += (
+                        100  # Dummy value until we have that API working
+                    )
+                elif previous_entry.duty_status == "ON":
+                    total_on_duty_hours += hours
+
+        summaries[date] = {
+            "total_miles_driving": total_miles_driving,
+            "total_off_duty_hours": total_off_duty_hours,
+            "total_sleeper_berth_hours": total_sleeper_berth_hours,
+            "total_driving_hours": total_driving_hours,
+            "total_on_duty_hours": total_on_duty_hours,
+            "total_lines_3_4": total_driving_hours + total_on_duty_hours,
+        }
+    return summaries
+
+
+def calculate_daily_summary(trip):
+    """
+    Calculates and saves the daily summary information for a trip, and passes
+    the change in on-duty hours on to the trip's driver.
+    """
+    log_entries = trip.log_entries.all().order_by("timestamp")
+    if not log_entries:
+        return
+
+    previous = dict(
+        DailySummary.objects.filter(trip=trip).values_list("date", "total_lines_3_4")
+    )
+    summaries = compute_daily_summaries(log_entries)
+
+    # Create or update the daily summary objects
+    for date, totals in summaries.items():
+        DailySummary.objects.update_or_create(trip=trip, date=date, defaults=totals)
+
+    if trip.driver_id:
+        current = {**previous}
+        current.update(
+            (date, totals["total_lines_3_4"]) for date, totals in summaries.items()
+        )
+        apply_duty_deltas({trip.driver_id: summary_deltas(previous, current)})
+
+
 def delete_all_data():
     # Delete it.
     Trip.objects.all().delete()
-    LogEntry.objects.all().delete()
-    DailySummary.objects.all().delete()
+    LogEntry.all_objects.all().delete()
+    DailySummary.all_objects.all().delete()
     Configuration.objects.all().delete()
+    Driver.objects.all().delete()
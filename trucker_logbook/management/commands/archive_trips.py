@@ -0,0 +1,64 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+from trucker_logbook.archive import archive_trip
+from trucker_logbook.models import Trip
+from trucker_logbook.partitions import drop_empty_partitions, ensure_log_partitions
+from trucker_logbook.sync import purge_tombstones
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves the log entries of trips that started more than --older-than-days "
+        "ago into compressed archives, purges expired sync tombstones, then "
+        "maintains the monthly LogEntry partitions on PostgreSQL. Meant to run "
+        "daily."
+    )
+    # The system checks import views, which wipe the database on import (see
+    # delete_all_data).
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=180,
+            help="Archive trips whose start date is older than this many days.",
+        )
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=3,
+            help="Number of future monthly partitions to keep created.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the trips that would be archived.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = date.today() - timedelta(days=options["older_than_days"])
+        trips = Trip.objects.filter(
+            start_date__lt=cutoff, archived_at__isnull=True
+        ).order_by("id")
+
+        if options["dry_run"]:
+            self.stdout.write(f"{trips.count()} trips would be archived")
+            return
+
+        trip_count = 0
+        entry_count = 0
+        for trip in trips.iterator():
+            entry_count += archive_trip(trip)
+            trip_count += 1
+        self.stdout.write(f"Archived {entry_count} log entries from {trip_count} trips")
+
+        self.stdout.write(f"Purged {purge_tombstones()} sync tombstones")
+
+        for name in ensure_log_partitions(options["months_ahead"]):
+            self.stdout.write(f"Partition {name} is in place")
+        for name in drop_empty_partitions(before=cutoff.replace(day=1)):
+            self.stdout.write(f"Dropped empty partition {name}")
+        self.stdout.write(self.style.SUCCESS("Done"))
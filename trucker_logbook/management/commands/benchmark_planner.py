@@ -0,0 +1,107 @@
+import random
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from trucker_logbook.citymatrix import CITY_COORDINATES, load_city_matrix
+from trucker_logbook.helper import (
+    _locator,
+    generate_dummy_logs,
+    generate_log_rows,
+    generate_random_logs,
+    trip_start_time,
+)
+from trucker_logbook.planner import compile_plan, plan_settings, plan_trip
+
+# (name, start, pickup, dropoff)
+TRIPS = (
+    ("short", "Dallas, TX", "Fort Worth, TX", "Austin, TX"),
+    ("long", "San Jose, CA", "Phoenix, AZ", "Jacksonville, FL"),
+)
+
+
+def coordinates_only(location):
+    """
+    Geocoder for the off-matrix runs: the known coordinates, without Nominatim.
+    """
+    return CITY_COORDINATES.get(location)
+
+
+class Command(BaseCommand):
+    help = (
+        "Times the compiled trip planner against the random log loop it "
+        "replaces, on a short and a long trip, without touching the database."
+    )
+
+    # The system checks import views, which wipe the database on import (see
+    # delete_all_data).
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=2000,
+            help="Trips generated per measurement.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        runs = options["runs"]
+        seed = options["seed"]
+        start_date = date(2025, 1, 6)
+        start_time = trip_start_time(start_date)
+        matrix = load_city_matrix()
+        plan = plan_settings()
+        compile_plan.cache_clear()
+
+        silent = lambda event, payload: None
+
+        for name, start, pickup, dropoff in TRIPS:
+            cases = {
+                "random loop (LogEntry)": lambda rng: generate_random_logs(
+                    None,
+                    start_date,
+                    start,
+                    pickup,
+                    dropoff,
+                    rng,
+                    _locator(matrix, coordinates_only, silent),
+                    silent,
+                ),
+                "planner (tuples)": lambda rng: generate_log_rows(
+                    start_date, start, pickup, dropoff, rng=rng
+                ),
+                "planner (LogEntry)": lambda rng: generate_dummy_logs(
+                    None, start_date, start, pickup, dropoff, rng=rng
+                ),
+                # Legs estimated from coordinates, as for locations outside
+                # the city matrix.
+                "planner off-matrix (tuples)": lambda rng: plan_trip(
+                    plan,
+                    start,
+                    pickup,
+                    dropoff,
+                    CITY_COORDINATES,
+                    start_time,
+                    rng,
+                ),
+            }
+            self.stdout.write(f"{name} trip: {start} -> {pickup} -> {dropoff}")
+            for label, generate in cases.items():
+                rng = random.Random(seed)
+                entries = 0
+                started = time.perf_counter()
+                for _ in range(runs):
+                    entries += len(generate(rng))
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"  {label:<30} {elapsed / runs * 1e6:9.1f} us/trip "
+                    f"{entries / runs:6.1f} entries/trip"
+                )
+
+        info = compile_plan.cache_info()
+        self.stdout.write(
+            f"Compiled plans: {info.currsize} ({info.hits} hits, {info.misses} misses)"
+        )
@@ -0,0 +1,108 @@
+from array import array
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from trucker_logbook.citymatrix import (
+    CITY_COORDINATES,
+    MATRIX_PATH,
+    CityMatrix,
+    estimate_matrix,
+)
+from trucker_logbook.ratelimit import (
+    BATCH,
+    UpstreamThrottled,
+    acquire,
+    upstream_priority,
+)
+
+METERS_PER_MILE = 1609.344
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds the pairwise distance/duration matrix of the known cities used "
+        "by the log planner, from a single OSRM table request or a local "
+        "estimate."
+    )
+    # The system checks import views, which wipe the database on import (see
+    # delete_all_data).
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--source",
+            choices=["osrm", "stub"],
+            default="osrm",
+            help="Query OSRM, or estimate road distances locally (offline).",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=600,
+            help="Seconds to wait for the OSRM rate limiter before giving up.",
+        )
+        parser.add_argument(
+            "--output",
+            default=str(MATRIX_PATH),
+            help="Where to write the matrix file.",
+        )
+
+    def handle(self, *args, **options):
+        if options["source"] == "stub":
+            matrix = estimate_matrix(CITY_COORDINATES)
+        else:
+            matrix = self.fetch_osrm_matrix(options["timeout"])
+
+        with open(options["output"], "wb") as f:
+            f.write(matrix.to_bytes())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote a {len(matrix.names)}x{len(matrix.names)} city matrix "
+                f"to {options['output']}"
+            )
+        )
+
+    def fetch_osrm_matrix(self, timeout):
+        names = list(CITY_COORDINATES)
+        coordinates = ";".join(
+            f"{CITY_COORDINATES[name][1]},{CITY_COORDINATES[name][0]}" for name in names
+        )
+        url = (
+            f"{settings.OSRM_URL}/table/v1/driving/{coordinates}"
+            "?annotations=distance,duration"
+        )
+        try:
+            # Batch priority: wait for a token interactive requests don't need.
+            with upstream_priority(BATCH):
+                acquire("osrm", timeout=timeout)
+        except UpstreamThrottled:
+            raise CommandError(
+                f"OSRM stayed rate limited for {timeout:g}s, try again later or "
+                "with a longer --timeout"
+            )
+        try:
+            response = requests.get(url, timeout=settings.UPSTREAM_REQUEST_TIMEOUT)
+            response.raise_for_status()
+            table = response.json()
+        except requests.RequestException as e:
+            raise CommandError(f"OSRM table request failed: {e}")
+
+        return CityMatrix(
+            names,
+            array("f", (CITY_COORDINATES[name][0] for name in names)),
+            array("f", (CITY_COORDINATES[name][1] for name in names)),
+            array(
+                "f",
+                (
+                    meters / METERS_PER_MILE
+                    for row in table["distances"]
+                    for meters in row
+                ),
+            ),
+            array(
+                "f",
+                (seconds / 3600 for row in table["durations"] for seconds in row),
+            ),
+        )
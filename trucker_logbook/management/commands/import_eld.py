@@ -0,0 +1,85 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from trucker_logbook.eld_import import FORMATS, detect_format, import_log_entries
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports log entries from a CSV or NDJSON ELD export, streaming it in "
+        "batches, and reports the rows that were rejected."
+    )
+
+    # The system checks import views, which wipe the database on import (see
+    # delete_all_data).
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Export file, or - for standard input.")
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            default=None,
+            help="Export format, guessed from the file extension by default.",
+        )
+        parser.add_argument(
+            "--trip",
+            type=int,
+            default=None,
+            help="Trip of the rows that don't name one.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows validated and written per batch.",
+        )
+        parser.add_argument(
+            "--max-errors",
+            type=int,
+            default=1000,
+            help="Number of rejected rows listed in the report.",
+        )
+        parser.add_argument(
+            "--report",
+            default=None,
+            help="Write the full JSON report to this file.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or detect_format(name=path)
+        if fmt is None:
+            raise CommandError("Can't tell the export format, pass --format")
+
+        started = time.monotonic()
+        stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+        try:
+            report = import_log_entries(
+                stream,
+                fmt,
+                default_trip_id=options["trip"],
+                batch_size=options["batch_size"],
+                max_errors=options["max_errors"],
+            )
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+        elapsed = time.monotonic() - started
+
+        if options["report"]:
+            with open(options["report"], "w") as f:
+                json.dump(report, f, indent=2)
+        for error in report["errors"][:20]:
+            self.stdout.write(f"Row {error['row']}: {error['errors']}")
+        if report["rejected"] > 20:
+            self.stdout.write(f"... {report['rejected'] - 20} more rejected rows")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {report['imported']} rows for {len(report['trips'])} "
+                f"trips in {elapsed:.1f}s, rejected {report['rejected']}"
+            )
+        )
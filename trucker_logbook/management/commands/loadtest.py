@@ -0,0 +1,309 @@
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from trucker_logbook.helper import CITIES
+from trucker_logbook.simulation import percentiles
+from trucker_logbook.upstream_stubs import start_stub_server
+
+STREETS = ("Main St", "Oak Ave", "Industrial Blvd", "Commerce Dr", "Depot Rd")
+
+
+class Command(BaseCommand):
+    help = (
+        "Load tests the API end to end, offline: starts stub Nominatim and OSRM "
+        "servers, runs the app against them and drives concurrent user flows "
+        "(check existing, create, generate, list logs, summaries, route), then "
+        "reports throughput and latency percentiles per endpoint. The app runs "
+        "on Django's development server with a throwaway SQLite database and "
+        "the upstream rate limits raised, so the numbers compare changes to the "
+        "app rather than predict production capacity."
+    )
+
+    # The system checks import views, which wipe the database on import (see
+    # delete_all_data).
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users", type=int, default=10, help="Number of concurrent users."
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=5,
+            help="Number of trip flows each user runs.",
+        )
+        parser.add_argument(
+            "--base-url",
+            default=None,
+            help=(
+                "Test an already running app instead of starting one. It must "
+                "be configured with the printed NOMINATIM_URL and OSRM_URL, and "
+                "with UPSTREAM_RATE_LIMITS raised (Nominatim's allows one request "
+                "per second). Its database is wiped when it starts."
+            ),
+        )
+        parser.add_argument(
+            "--port",
+            type=int,
+            default=8765,
+            help="Port of the app server started for the test.",
+        )
+        parser.add_argument(
+            "--nominatim-port", type=int, default=0, help="Nominatim stub port."
+        )
+        parser.add_argument("--osrm-port", type=int, default=0, help="OSRM stub port.")
+        parser.add_argument(
+            "--nominatim-latency-ms",
+            type=float,
+            default=150,
+            help="Mean Nominatim stub response time.",
+        )
+        parser.add_argument(
+            "--osrm-latency-ms",
+            type=float,
+            default=80,
+            help="Mean OSRM stub response time.",
+        )
+        parser.add_argument(
+            "--jitter-ms",
+            type=float,
+            default=30,
+            help="Standard deviation of the stub response times.",
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0.01,
+            help="Fraction of stub responses that fail with a 503.",
+        )
+        parser.add_argument(
+            "--unknown-locations",
+            type=float,
+            default=0.2,
+            help=(
+                "Fraction of trips with a street address among their locations, "
+                "which has to be geocoded."
+            ),
+        )
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        stub_options = {
+            "jitter": options["jitter_ms"] / 1000,
+            "error_rate": options["error_rate"],
+            "seed": options["seed"],
+        }
+        nominatim = start_stub_server(
+            port=options["nominatim_port"],
+            latency=options["nominatim_latency_ms"] / 1000,
+            **stub_options,
+        )
+        osrm = start_stub_server(
+            port=options["osrm_port"],
+            latency=options["osrm_latency_ms"] / 1000,
+            **stub_options,
+        )
+        self.stdout.write(f"NOMINATIM_URL={nominatim.url}")
+        self.stdout.write(f"OSRM_URL={osrm.url}")
+
+        server = None
+        workdir = None
+        base_url = options["base_url"]
+        try:
+            if base_url is None:
+                base_url = f"http://127.0.0.1:{options['port']}"
+                workdir = tempfile.mkdtemp(prefix="loadtest-")
+                server = self.start_app(
+                    options["port"], nominatim.url, osrm.url, workdir
+                )
+            self.wait_until_ready(base_url)
+            self.run_flows(base_url, options)
+            if server:
+                self.stdout.write(
+                    "Measured against a single development server process; "
+                    "compare runs with each other, not with production."
+                )
+        finally:
+            if server:
+                server.terminate()
+                server.wait()
+            if workdir:
+                shutil.rmtree(workdir, ignore_errors=True)
+            nominatim.shutdown()
+            osrm.shutdown()
+
+    def start_app(self, port, nominatim_url, osrm_url, workdir):
+        # Never DATABASE_URL: the app wipes its database when it starts.
+        database = os.path.join(workdir, "db.sqlite3")
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": "spotter_ai_trucker_logbook.loadtest_settings",
+            "LOADTEST_DATABASE": database,
+            "NOMINATIM_URL": nominatim_url,
+            "OSRM_URL": osrm_url,
+        }
+        manage = [sys.executable, os.path.join(settings.BASE_DIR, "manage.py")]
+        self.stdout.write(f"Migrating the load test database at {database}")
+        migrate = subprocess.run(
+            [*manage, "migrate", "--skip-checks", "--verbosity", "0"],
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if migrate.returncode:
+            raise CommandError(
+                f"Migrating the load test database failed:\n{migrate.stderr}"
+            )
+        self.stdout.write(f"Starting the development server on port {port}")
+        return subprocess.Popen(
+            [*manage, "runserver", f"127.0.0.1:{port}", "--noreload", "--skip-checks"],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def wait_until_ready(self, base_url, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                requests.get(f"{base_url}/api/drivers/", timeout=1)
+                return
+            except requests.RequestException:
+                time.sleep(0.2)
+        raise CommandError(f"The app at {base_url} didn't come up")
+
+    def run_flows(self, base_url, options):
+        results = {}  # endpoint -> list of (seconds, ok)
+        lock = threading.Lock()
+        rng = random.Random(options["seed"])
+        seeds = [rng.randrange(2**32) for _ in range(options["users"])]
+
+        def call(session, method, endpoint, path, **kwargs):
+            started = time.perf_counter()
+            try:
+                response = session.request(
+                    method, f"{base_url}{path}", timeout=60, **kwargs
+                )
+                ok = response.status_code < 400
+            except requests.RequestException:
+                response, ok = None, False
+            elapsed = time.perf_counter() - started
+            with lock:
+                results.setdefault(f"{method} {endpoint}", []).append((elapsed, ok))
+            return response if ok else None
+
+        def location(user_rng, city):
+            if user_rng.random() < options["unknown_locations"]:
+                street = user_rng.choice(STREETS)
+                return f"{user_rng.randint(1, 9999)} {street}, {city}"
+            return city
+
+        def user(seed):
+            user_rng = random.Random(seed)
+            session = requests.Session()
+            for _ in range(options["iterations"]):
+                trip = {
+                    key: location(user_rng, city)
+                    for key, city in zip(
+                        ("start_location", "pickup_location", "dropoff_location"),
+                        user_rng.sample(CITIES, 3),
+                    )
+                }
+                trip["start_date"] = str(
+                    date.today() + timedelta(days=user_rng.randint(0, 30))
+                )
+                trip["current_cycle_hours"] = user_rng.randint(0, 60)
+
+                call(
+                    session,
+                    "POST",
+                    "/api/trips/check_existing/",
+                    "/api/trips/check_existing/",
+                    json=trip,
+                )
+                response = call(
+                    session, "POST", "/api/trips/", "/api/trips/", json=trip
+                )
+                if response is None:
+                    continue
+                trip_id = response.json()["id"]
+                call(
+                    session,
+                    "POST",
+                    "/api/trips/{id}/generate_logs/",
+                    f"/api/trips/{trip_id}/generate_logs/",
+                )
+                response = call(
+                    session,
+                    "GET",
+                    "/api/trips/{id}/logs/",
+                    f"/api/trips/{trip_id}/logs/",
+                )
+                call(
+                    session,
+                    "GET",
+                    "/api/trips/{id}/daily_summary/",
+                    f"/api/trips/{trip_id}/daily_summary/",
+                )
+
+                # Route between the first and last located entries, as the
+                # map does.
+                points = [
+                    f"{entry['longitude']},{entry['latitude']}"
+                    for entry in (response.json() if response else [])
+                    if entry["latitude"] is not None
+                ]
+                if len(points) >= 2:
+                    call(
+                        session,
+                        "GET",
+                        "/api/get-osrm-route/",
+                        "/api/get-osrm-route/",
+                        params={"start": points[0], "end": points[-1]},
+                    )
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["users"]) as executor:
+            for future in [executor.submit(user, seed) for seed in seeds]:
+                future.result()
+        elapsed = time.perf_counter() - started
+
+        self.report(results, elapsed)
+
+    def report(self, results, elapsed):
+        header = (
+            f"{'endpoint':<40} {'requests':>8} {'errors':>6} {'req/s':>7} "
+            f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}"
+        )
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        total = 0
+        for endpoint, calls in results.items():
+            latencies = percentiles(
+                [seconds * 1000 for seconds, _ in calls], points=(50, 90, 99)
+            )
+            errors = sum(1 for _, ok in calls if not ok)
+            total += len(calls)
+            self.stdout.write(
+                f"{endpoint:<40} {len(calls):>8} {errors:>6} "
+                f"{len(calls) / elapsed:>7.1f} {latencies['p50']:>8.1f} "
+                f"{latencies['p90']:>8.1f} {latencies['p99']:>8.1f}"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{total} requests in {elapsed:.1f}s, {total / elapsed:.1f} req/s"
+            )
+        )
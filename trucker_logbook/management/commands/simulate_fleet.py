@@ -0,0 +1,249 @@
+import json
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from trucker_logbook.bulk import bulk_insert
+from trucker_logbook.dutycycle import apply_duty_deltas, summary_deltas
+from trucker_logbook.helper import CITIES
+from trucker_logbook.models import (
+    Configuration,
+    DailySummary,
+    LogArchive,
+    LogEntry,
+    Trip,
+    TripTimeline,
+)
+from trucker_logbook.planner import plan_settings
+from trucker_logbook.simulation import simulate_trip_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates simulated logs for every trip, sharding the trips across "
+        "worker processes and streaming the rows into the database."
+    )
+    # The system checks import the URLconf, and importing views wipes the
+    # database (see delete_all_data), which would throw the fleet away.
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of simulation worker processes.",
+        )
+        parser.add_argument(
+            "--shard-size",
+            type=int,
+            default=200,
+            help="Number of trips simulated per worker task.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows per COPY / bulk_create batch.",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=None,
+            help="Base seed; trip N is simulated with seed + N.",
+        )
+        parser.add_argument(
+            "--create-trips",
+            type=int,
+            default=0,
+            help="Create this many random trips between known cities first.",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            default=".simulate_fleet.checkpoint",
+            help="File recording the last trip written, used to resume.",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore an existing checkpoint and start from the first trip.",
+        )
+
+    def handle(self, *args, **options):
+        if options["create_trips"]:
+            self.create_trips(options["create_trips"], options["batch_size"])
+
+        checkpoint = options["checkpoint"]
+        last_trip_id = 0
+        if not options["restart"] and os.path.exists(checkpoint):
+            with open(checkpoint) as f:
+                last_trip_id = json.load(f)["last_trip_id"]
+            self.stdout.write(f"Resuming after trip {last_trip_id}")
+
+        seed = options["seed"]
+        trips = (
+            Trip.objects.filter(id__gt=last_trip_id)
+            .order_by("id")
+            .values_list(
+                "id",
+                "start_date",
+                "start_location",
+                "pickup_location",
+                "dropoff_location",
+            )
+        )
+
+        def with_plans(shard):
+            """
+            Adds each trip's PlanSettings to its task, with one query for the
+            configurations of the whole shard.
+            """
+            plans = {
+                configuration.trip_id: plan_settings(configuration)
+                for configuration in Configuration.objects.filter(
+                    trip_id__in=[trip[0] for trip in shard]
+                ).order_by("-id")
+            }
+            default = plan_settings()
+            return [(*trip[:5], plans.get(trip[0], default), trip[5]) for trip in shard]
+
+        def shards():
+            shard = []
+            for trip in trips.iterator(chunk_size=options["shard_size"]):
+                trip_seed = seed + trip[0] if seed is not None else None
+                shard.append((*trip, trip_seed))
+                if len(shard) == options["shard_size"]:
+                    yield with_plans(shard)
+                    shard = []
+            if shard:
+                yield with_plans(shard)
+
+        started = time.monotonic()
+        trip_count = 0
+        row_count = 0
+        with ProcessPoolExecutor(max_workers=options["workers"]) as executor:
+            # Keep a bounded window of shards in flight and write them back in
+            # submission order, so memory stays flat and the checkpoint is
+            # always the highest trip id whose rows have been committed.
+            pending = deque()
+            shard_iter = shards()
+            while True:
+                while len(pending) < options["workers"] * 2:
+                    shard = next(shard_iter, None)
+                    if shard is None:
+                        break
+                    pending.append(executor.submit(simulate_trip_rows, shard))
+                if not pending:
+                    break
+
+                results = pending.popleft().result()
+                row_count += self.write_shard(results, options["batch_size"])
+                trip_count += len(results)
+                last_trip_id = results[-1][0]
+                with open(checkpoint, "w") as f:
+                    json.dump({"last_trip_id": last_trip_id}, f)
+
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f"{trip_count} trips, {row_count} rows, "
+                    f"{row_count / elapsed:.0f} rows/s"
+                )
+
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(
+            self.style.SUCCESS(f"Generated {row_count} rows for {trip_count} trips")
+        )
+
+    def write_shard(self, results, batch_size):
+        """
+        Replaces the logs and daily summaries of every trip in the shard in a
+        single transaction.
+        """
+        trip_ids = [trip_id for trip_id, _, _ in results]
+        log_entries = (
+            LogEntry(
+                trip_id=trip_id,
+                timestamp=timestamp,
+                duty_status=duty_status,
+                location=location,
+                remarks=remarks,
+                latitude=latitude,
+                longitude=longitude,
+            )
+            for trip_id, rows, _ in results
+            for timestamp, duty_status, location, remarks, latitude, longitude in rows
+        )
+        summaries = (
+            DailySummary(trip_id=trip_id, date=day, **totals)
+            for trip_id, _, daily_totals in results
+            for day, totals in daily_totals.items()
+        )
+        with transaction.atomic():
+            duty_deltas = self.duty_deltas(results)
+            # Replaced rows are soft-deleted, so sync clients drop them.
+            LogEntry.objects.filter(trip_id__in=trip_ids).soft_delete()
+            LogArchive.objects.filter(trip_id__in=trip_ids).delete()
+            # Stale timeline snapshots are rebuilt on their next read.
+            TripTimeline.objects.filter(trip_id__in=trip_ids).delete()
+            # Mark the trips as generated, so generate_logs and the trip bundle
+            # don't regenerate over the simulated rows.
+            Trip.objects.filter(id__in=trip_ids).update(
+                archived_at=None, logs_generated_at=timezone.now()
+            )
+            DailySummary.objects.filter(trip_id__in=trip_ids).soft_delete()
+            written = bulk_insert(LogEntry, log_entries, batch_size=batch_size)
+            written += bulk_insert(DailySummary, summaries, batch_size=batch_size)
+            apply_duty_deltas(duty_deltas)
+        return written
+
+    def duty_deltas(self, results):
+        """
+        Returns the on-duty hour changes the shard makes to each driver's
+        cycle, from the summaries it replaces and the new ones.
+        """
+        driver_ids = dict(
+            Trip.objects.filter(
+                id__in=[trip_id for trip_id, _, _ in results], driver__isnull=False
+            ).values_list("id", "driver_id")
+        )
+        previous = {}
+        for driver_id, day, hours in DailySummary.objects.filter(
+            trip_id__in=list(driver_ids)
+        ).values_list("trip__driver_id", "date", "total_lines_3_4"):
+            previous.setdefault(driver_id, {}).setdefault(day, 0)
+            previous[driver_id][day] += hours
+        current = {}
+        for trip_id, _, daily_totals in results:
+            if trip_id in driver_ids:
+                days = current.setdefault(driver_ids[trip_id], {})
+                for day, totals in daily_totals.items():
+                    days[day] = days.get(day, 0) + totals["total_lines_3_4"]
+        return {
+            driver_id: summary_deltas(
+                previous.get(driver_id, {}), current.get(driver_id, {})
+            )
+            for driver_id in set(driver_ids.values())
+        }
+
+    def create_trips(self, count, batch_size):
+        rng = random.Random()
+        today = date.today()
+        trips = (
+            Trip(
+                start_location=start,
+                pickup_location=pickup,
+                dropoff_location=dropoff,
+                start_date=today - timedelta(days=rng.randint(0, 365)),
+            )
+            for start, pickup, dropoff in (rng.sample(CITIES, 3) for _ in range(count))
+        )
+        bulk_insert(Trip, trips, batch_size=batch_size)
+        self.stdout.write(f"Created {count} trips")
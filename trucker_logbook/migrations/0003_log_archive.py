@@ -0,0 +1,44 @@
+# Generated by Django 5.1.7 on 2026-10-19 12:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trucker_logbook", "0002_trip_logs_generated_at_idempotencykey"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trip",
+            name="archived_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="LogArchive",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("data", models.BinaryField()),
+                ("entry_count", models.PositiveIntegerField(default=0)),
+                ("archived_at", models.DateTimeField(auto_now=True)),
+                (
+                    "trip",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="log_archive",
+                        to="trucker_logbook.trip",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,72 @@
+from datetime import date
+
+from django.db import migrations
+
+TABLE = "trucker_logbook_logentry"
+OLD_TABLE = "trucker_logbook_logentry_unpartitioned"
+
+
+def add_months(month, count):
+    years, month_index = divmod(month.month - 1 + count, 12)
+    return date(month.year + years, month_index + 1, 1)
+
+
+def partition_log_entries(apps, schema_editor):
+    """
+    Rebuilds the LogEntry table as a table range-partitioned by month on
+    "timestamp", with a default partition for anything outside the monthly
+    ones.  PostgreSQL requires the partition key in the primary key, so the key
+    becomes (id, timestamp); Django keeps treating "id" as the primary key.
+    Other backends keep the plain table and rely on LogArchive for retention.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    execute = schema_editor.execute
+    execute(f"ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}")
+    execute(
+        f"CREATE TABLE {TABLE} (LIKE {OLD_TABLE} INCLUDING DEFAULTS "
+        f'INCLUDING IDENTITY INCLUDING STORAGE) PARTITION BY RANGE ("timestamp")'
+    )
+    execute(f'ALTER TABLE {TABLE} ADD PRIMARY KEY (id, "timestamp")')
+    execute(
+        f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_trip_id_fk_partitioned "
+        f"FOREIGN KEY (trip_id) REFERENCES trucker_logbook_trip (id) "
+        f"DEFERRABLE INITIALLY DEFERRED"
+    )
+    execute(f"CREATE INDEX {TABLE}_trip_id_partitioned ON {TABLE} (trip_id)")
+    execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+
+    # One partition per month from the oldest entry to three months ahead.
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'SELECT MIN("timestamp") FROM {OLD_TABLE}')
+        oldest = cursor.fetchone()[0]
+    month = (oldest.date() if oldest else date.today()).replace(day=1)
+    last_month = add_months(date.today().replace(day=1), 3)
+    while month <= last_month:
+        execute(
+            f"CREATE TABLE {TABLE}_y{month.year}m{month.month:02d} "
+            f"PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)",
+            [month.isoformat(), add_months(month, 1).isoformat()],
+        )
+        month = add_months(month, 1)
+
+    execute(f"INSERT INTO {TABLE} SELECT * FROM {OLD_TABLE}")
+    execute(
+        f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), "
+        f"COALESCE(MAX(id), 0) + 1, false) FROM {TABLE}"
+    )
+    execute(f"DROP TABLE {OLD_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trucker_logbook", "0003_log_archive"),
+    ]
+
+    operations = [
+        # Reversing leaves the partitioned table in place; Django reads and
+        # writes it exactly like the plain table.
+        migrations.RunPython(partition_log_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.7 on 2026-10-19 12:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trucker_logbook", "0004_partition_logentry"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TripTimeline",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("data", models.BinaryField()),
+                ("entry_count", models.PositiveIntegerField(default=0)),
+                ("built_at", models.DateTimeField(auto_now=True)),
+                (
+                    "trip",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="timeline",
+                        to="trucker_logbook.trip",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.7 on 2026-10-19 12:54
+
+import trucker_logbook.models
+from django.db import migrations
+
+from trucker_logbook.geo import encode_geohash
+
+
+def backfill_geohashes(apps, schema_editor):
+    LogEntry = apps.get_model("trucker_logbook", "LogEntry")
+    batch = []
+    entries = LogEntry.objects.filter(
+        latitude__isnull=False, longitude__isnull=False
+    ).only("id", "latitude", "longitude")
+    for entry in entries.iterator(chunk_size=2000):
+        entry.geohash = encode_geohash(entry.latitude, entry.longitude)
+        batch.append(entry)
+        if len(batch) == 2000:
+            LogEntry.objects.bulk_update(batch, ["geohash"])
+            batch = []
+    if batch:
+        LogEntry.objects.bulk_update(batch, ["geohash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trucker_logbook", "0005_trip_timeline"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="logentry",
+            name="geohash",
+            field=trucker_logbook.models.GeohashField(
+                blank=True, db_index=True, editable=False, max_length=9, null=True
+            ),
+        ),
+        migrations.RunPython(backfill_geohashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.7 on 2026-10-19 13:27
+
+import json
+import zlib
+
+from django.db import migrations, models
+
+
+def record_entry_ids(apps, schema_editor):
+    """
+    Fills in the id range of the archives written before it was recorded.
+    """
+    LogArchive = apps.get_model("trucker_logbook", "LogArchive")
+    for archive in LogArchive.objects.filter(first_entry_id__isnull=True).iterator():
+        entry_ids = json.loads(zlib.decompress(archive.data))["id"]
+        if entry_ids:
+            archive.first_entry_id = min(entry_ids)
+            archive.last_entry_id = max(entry_ids)
+            archive.save(update_fields=["first_entry_id", "last_entry_id"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trucker_logbook", "0009_sync_tracking"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="logarchive",
+            name="first_entry_id",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="logarchive",
+            name="last_entry_id",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="logarchive",
+            index=models.Index(
+                fields=["first_entry_id", "last_entry_id"], name="logarchive_entry_ids"
+            ),
+        ),
+        migrations.RunPython(record_entry_ids, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2026-10-19 13:35
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trucker_logbook", "0010_logarchive_entry_ids"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="configuration",
+            name="fuel_stop_frequency",
+            field=models.FloatField(
+                default=1000, validators=[django.core.validators.MinValueValidator(1)]
+            ),
+        ),
+        migrations.AlterField(
+            model_name="configuration",
+            name="minimum_rest_stop",
+            field=models.FloatField(
+                default=0.5, validators=[django.core.validators.MinValueValidator(0)]
+            ),
+        ),
+        migrations.AlterField(
+            model_name="configuration",
+            name="pickup_dropoff_time",
+            field=models.FloatField(
+                default=1, validators=[django.core.validators.MinValueValidator(0)]
+            ),
+        ),
+    ]
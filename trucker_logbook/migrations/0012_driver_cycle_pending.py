@@ -0,0 +1,49 @@
+# Generated by Django 5.1.7 on 2026-10-19 13:45
+
+from django.db import migrations, models
+from django.db.models import Sum
+from django.utils import timezone
+
+
+def rebuild_future_anchors(apps, schema_editor):
+    """
+    Rebuilds the duty cycle of the drivers whose window a future trip moved
+    past today, which cleared the days before it.
+    """
+    from trucker_logbook.dutycycle import _fill, _unpack
+
+    Driver = apps.get_model("trucker_logbook", "Driver")
+    DailySummary = apps.get_model("trucker_logbook", "DailySummary")
+    today = timezone.localdate()
+    for driver in Driver.objects.filter(cycle_anchor__gt=today).iterator():
+        days = dict(
+            DailySummary.objects.filter(trip__driver=driver, deleted_at__isnull=True)
+            .values("date")
+            .annotate(hours=Sum("total_lines_3_4"))
+            .values_list("date", "hours")
+        )
+        _fill(driver, _unpack(None), None, {}, days, today)
+        driver.save(
+            update_fields=[
+                "cycle_hours",
+                "cycle_anchor",
+                "cycle_total",
+                "cycle_pending",
+            ]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trucker_logbook", "0011_configuration_validators"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="driver",
+            name="cycle_pending",
+            field=models.JSONField(default=dict, editable=False),
+        ),
+        migrations.RunPython(rebuild_future_anchors, migrations.RunPython.noop),
+    ]
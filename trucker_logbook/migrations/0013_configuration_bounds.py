@@ -0,0 +1,43 @@
+# Generated by Django 5.1.7 on 2026-10-19 13:48
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trucker_logbook", "0012_driver_cycle_pending"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="configuration",
+            name="fuel_stop_frequency",
+            field=models.FloatField(
+                default=1000, validators=[django.core.validators.MinValueValidator(100)]
+            ),
+        ),
+        migrations.AlterField(
+            model_name="configuration",
+            name="minimum_rest_stop",
+            field=models.FloatField(
+                default=0.5,
+                validators=[
+                    django.core.validators.MinValueValidator(0),
+                    django.core.validators.MaxValueValidator(2),
+                ],
+            ),
+        ),
+        migrations.AlterField(
+            model_name="configuration",
+            name="pickup_dropoff_time",
+            field=models.FloatField(
+                default=1,
+                validators=[
+                    django.core.validators.MinValueValidator(0),
+                    django.core.validators.MaxValueValidator(24),
+                ],
+            ),
+        ),
+    ]
@@ -1,8 +1,80 @@
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.utils import timezone
+
+from .geo import GEOHASH_PRECISION, encode_geohash
 
 # Create your models here.
 
 
+class GeohashField(models.CharField):
+    """
+    Geohash of the instance's latitude/longitude.  It is recomputed in
+    ``pre_save``, which runs on save() as well as on bulk_create().
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("max_length", GEOHASH_PRECISION)
+        kwargs.setdefault("blank", True)
+        kwargs.setdefault("null", True)
+        kwargs.setdefault("editable", False)
+        super().__init__(*args, **kwargs)
+
+    def pre_save(self, model_instance, add):
+        value = None
+        if model_instance.latitude is not None and model_instance.longitude is not None:
+            value = encode_geohash(model_instance.latitude, model_instance.longitude)
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    def soft_delete(self):
+        """
+        Marks the rows as deleted, leaving tombstones for delta sync clients.
+        """
+        now = timezone.now()
+        return self.update(deleted_at=now, updated_at=now)
+
+
+class LiveManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """
+    Default manager of soft-deleted models, hiding their tombstones.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class Driver(models.Model):
+    """
+    A driver, whose trips share one Hours of Service duty cycle.
+
+    The on-duty hours (lines 3 + 4) of the last eight days are kept as a ring
+    buffer of eight float32 values indexed by date, updated incrementally as the
+    daily summaries of the driver's trips change; see dutycycle.py.  Hours of
+    days still in the future wait in cycle_pending until their day comes.
+    """
+
+    name = models.CharField(max_length=255)
+    cycle_hours = models.BinaryField(
+        default=bytes(32), editable=False
+    )  # float32[8] on-duty hours, slot = date.toordinal() % 8
+    cycle_anchor = models.DateField(
+        blank=True, null=True, editable=False
+    )  # Latest date held in the ring buffer
+    cycle_total = models.FloatField(
+        default=0, editable=False
+    )  # Sum of the ring buffer, the hours used in the 8 days up to cycle_anchor
+    cycle_pending = models.JSONField(
+        default=dict, editable=False
+    )  # On-duty hours of future days, {"YYYY-MM-DD": hours}
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
 class Trip(models.Model):
     """
     Represents an entire trip.
@@ -18,6 +90,19 @@ class Trip(models.Model):
     created_at = models.DateTimeField(
         auto_now_add=True
     )  # Timestamp of when the trip was created
+    logs_generated_at = models.DateTimeField(
+        blank=True, null=True
+    )  # Timestamp of the last completed log generation
+    archived_at = models.DateTimeField(
+        blank=True, null=True
+    )  # Set once the trip's log entries were moved to a LogArchive
+    driver = models.ForeignKey(
+        Driver,
+        related_name="trips",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+    )
 
     def __str__(self):
         return f"Trip from {self.start_location} to {self.dropoff_location} on {self.start_date}"
@@ -46,6 +131,21 @@ class LogEntry(models.Model):
     longitude = models.FloatField(
         blank=True, null=True
     )  # Optional: For map integration
+    geohash = GeohashField(db_index=True)  # Spatial index for stop searches
+    updated_at = models.DateTimeField(auto_now=True)  # Delta sync cursor
+    deleted_at = models.DateTimeField(
+        blank=True, null=True
+    )  # Set instead of deleting the row, see sync.py
+
+    objects = LiveManager()
+    all_objects = SoftDeleteQuerySet.as_manager()  # Including tombstones
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["trip", "updated_at", "id"], name="logentry_trip_updated"
+            )
+        ]
 
     def __str__(self):
         formatted_timestamp = self.timestamp.strftime(
@@ -54,6 +154,53 @@ class LogEntry(models.Model):
         return f"{formatted_timestamp} | {self.duty_status} | {self.location}"
 
 
+class LogArchive(models.Model):
+    """
+    Compressed copy of the log entries of a trip that was moved out of the
+    LogEntry table by the archive_trips command.  See archive.py for the format.
+    """
+
+    trip = models.OneToOneField(
+        Trip, related_name="log_archive", on_delete=models.CASCADE
+    )
+    data = models.BinaryField()  # zlib-compressed, column-oriented JSON
+    entry_count = models.PositiveIntegerField(default=0)
+    first_entry_id = models.BigIntegerField(
+        blank=True, null=True
+    )  # Lowest log entry id in the archive
+    last_entry_id = models.BigIntegerField(
+        blank=True, null=True
+    )  # Highest log entry id in the archive
+    archived_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["first_entry_id", "last_entry_id"],
+                name="logarchive_entry_ids",
+            )
+        ]
+
+    def __str__(self):
+        return f"Archived logs for trip {self.trip_id}"
+
+
+class TripTimeline(models.Model):
+    """
+    Packed binary snapshot of all of a trip's log entries, so whole-trip reads
+    cost a single row fetch.  Rebuilt whenever the trip's logs change; see
+    timeline.py for the format.
+    """
+
+    trip = models.OneToOneField(Trip, related_name="timeline", on_delete=models.CASCADE)
+    data = models.BinaryField()
+    entry_count = models.PositiveIntegerField(default=0)
+    built_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Timeline for trip {self.trip_id}"
+
+
 class DailySummary(models.Model):
     """
     Stores the daily summary information for the log sheet recap section.
@@ -70,6 +217,20 @@ class DailySummary(models.Model):
     total_lines_3_4 = models.FloatField(
         default=0
     )  # Sum of driving and on duty not driving
+    updated_at = models.DateTimeField(auto_now=True)  # Delta sync cursor
+    deleted_at = models.DateTimeField(
+        blank=True, null=True
+    )  # Set instead of deleting the row, see sync.py
+
+    objects = LiveManager()
+    all_objects = SoftDeleteQuerySet.as_manager()  # Including tombstones
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["trip", "updated_at", "id"], name="dailysummary_trip_updated"
+            )
+        ]
 
     def __str__(self):
         return f"Daily Summary for {self.date}"
@@ -82,8 +243,50 @@ class Configuration(models.Model):
     """
 
     trip = models.ForeignKey(Trip, on_delete=models.CASCADE)
-    fuel_stop_frequency = models.FloatField(default=1000)  # Miles between fuel stops
-    pickup_dropoff_time = models.FloatField(default=1)  # Hours for pickup and dropoff
+    fuel_stop_frequency = models.FloatField(
+        default=1000, validators=[MinValueValidator(100)]
+    )  # Miles between fuel stops
+    pickup_dropoff_time = models.FloatField(
+        default=1, validators=[MinValueValidator(0), MaxValueValidator(24)]
+    )  # Hours for pickup and dropoff
     minimum_rest_stop = models.FloatField(
-        default=0.5
+        default=0.5, validators=[MinValueValidator(0), MaxValueValidator(2)]
     )  # Minimum rest stop duration in hours
+
+
+class IdempotencyKey(models.Model):
+    """
+    Remembers the response to a log generation request, so that a retry
+    carrying the same Idempotency-Key header gets the same answer back without
+    generating the logs again.
+    """
+
+    trip = models.ForeignKey(Trip, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)  # Value of the Idempotency-Key header
+    response_status = models.PositiveSmallIntegerField()
+    response_body = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["trip", "key"], name="unique_idempotency_key_per_trip"
+            )
+        ]
+
+    def __str__(self):
+        return f"Idempotency key {self.key} for trip {self.trip_id}"
+
+
+class RateLimitBucket(models.Model):
+    """
+    Shared token bucket for an upstream service (Nominatim, OSRM).  Every
+    worker and process draws from the same row; see ratelimit.py.
+    """
+
+    name = models.CharField(max_length=50, primary_key=True)
+    tokens = models.FloatField()  # Negative when callers are queued
+    updated_at = models.FloatField()  # Unix time of the last refill
+
+    def __str__(self):
+        return f"{self.name}: {self.tokens:.2f} tokens"
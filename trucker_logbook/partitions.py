@@ -0,0 +1,101 @@
+from datetime import date
+
+from django.db import connection
+
+from .models import LogEntry
+
+# LogEntry is range-partitioned by month on "timestamp" on PostgreSQL (see
+# migration 0004).  Rows outside every monthly partition land in the default
+# partition, so inserts never fail when a month hasn't been created yet.
+LOG_ENTRY_TABLE = LogEntry._meta.db_table
+DEFAULT_PARTITION = f"{LOG_ENTRY_TABLE}_default"
+
+
+def add_months(month, count):
+    years, month_index = divmod(month.month - 1 + count, 12)
+    return date(month.year + years, month_index + 1, 1)
+
+
+def partition_name(month):
+    return f"{LOG_ENTRY_TABLE}_y{month.year}m{month.month:02d}"
+
+
+def is_partitioned():
+    """
+    True when the LogEntry table is a partitioned PostgreSQL table.
+    """
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass",
+            [LOG_ENTRY_TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def create_month_partition(month):
+    """
+    Creates the partition holding ``month``'s log entries.  Returns False when
+    rows for that month already sit in the default partition, in which case
+    PostgreSQL would refuse the new partition and the month stays there.
+    """
+    bounds = [month.isoformat(), add_months(month, 1).isoformat()]
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT 1 FROM {quote(DEFAULT_PARTITION)} "
+            'WHERE "timestamp" >= %s AND "timestamp" < %s LIMIT 1',
+            bounds,
+        )
+        if cursor.fetchone():
+            return False
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {quote(partition_name(month))} "
+            f"PARTITION OF {quote(LOG_ENTRY_TABLE)} FOR VALUES FROM (%s) TO (%s)",
+            bounds,
+        )
+    return True
+
+
+def ensure_log_partitions(months_ahead=3):
+    """
+    Makes sure the current month and the next ``months_ahead`` months have
+    their own partitions.  Returns the names of the partitions available.
+    """
+    if not is_partitioned():
+        return []
+    month = date.today().replace(day=1)
+    created = []
+    for offset in range(months_ahead + 1):
+        if create_month_partition(add_months(month, offset)):
+            created.append(partition_name(add_months(month, offset)))
+    return created
+
+
+def drop_empty_partitions(before):
+    """
+    Drops monthly partitions that end before ``before`` and no longer hold any
+    rows, typically because their trips were archived.  Returns their names.
+    """
+    if not is_partitioned():
+        return []
+    quote = connection.ops.quote_name
+    dropped = []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = %s::regclass AND child.relname <> %s",
+            [LOG_ENTRY_TABLE, DEFAULT_PARTITION],
+        )
+        for (name,) in cursor.fetchall():
+            suffix = name[len(LOG_ENTRY_TABLE) + 2 :]  # "2025m01"
+            month = date(int(suffix[:4]), int(suffix[5:]), 1)
+            if add_months(month, 1) > before:
+                continue
+            cursor.execute(f"SELECT 1 FROM {quote(name)} LIMIT 1")
+            if cursor.fetchone() is None:
+                cursor.execute(f"DROP TABLE {quote(name)}")
+                dropped.append(name)
+    return dropped
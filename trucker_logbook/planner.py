@@ -0,0 +1,332 @@
+"""
+Configuration-driven trip planner.
+
+A trip's Configuration is compiled once into a TripPlan: its Hours of Service
+limits, stop durations and stop templates, memoized per distinct
+configuration.  Running a plan over a trip's route legs walks the legs in
+driving segments, each ending at whichever comes first of the leg's end, the
+next fuel stop, the 30-minute break, the 11-hour driving limit or the 14-hour
+duty window.  The entries come out as PlannedEntry tuples; callers turn them
+into LogEntry rows only when they insert them.
+"""
+
+import math
+from collections import namedtuple
+from datetime import timedelta
+from functools import lru_cache
+
+from django.core.exceptions import ValidationError
+
+from .models import Configuration
+
+PlannedEntry = namedtuple(
+    "PlannedEntry", "timestamp duty_status location remarks latitude longitude"
+)
+
+PlanSettings = namedtuple(
+    "PlanSettings", "fuel_stop_frequency pickup_dropoff_time minimum_rest_stop"
+)
+
+# A stretch of the route between two stops.  ``arrival`` is "pickup",
+# "dropoff" or None for a city the truck only drives through.
+Leg = namedtuple(
+    "Leg", "target miles hours origin_coordinates target_coordinates arrival"
+)
+
+# Property-carrying driver limits (49 CFR 395.3), in hours.
+MAX_DRIVING_HOURS = 11
+DUTY_WINDOW_HOURS = 14
+DRIVING_BEFORE_BREAK_HOURS = 8
+OFF_DUTY_RESET_HOURS = 10
+
+# Route estimates for locations outside the city matrix.
+ROAD_FACTOR = 1.25
+AVERAGE_MPH = 55
+
+# Longest leg between matrix cities when a closer city is available, and the
+# most days a planned trip may take.
+MAX_LEG_HOURS = 3.5
+MAX_TRIP_DAYS = 30
+
+
+class TripTooLong(Exception):
+    """
+    Raised when a trip can't be delivered within MAX_TRIP_DAYS.
+    """
+
+
+def invalid_settings(settings):
+    """
+    Returns the names of the PlanSettings fields the planner can't run with:
+    values that aren't finite or that fail the Configuration field's
+    validators, which keep every matrix trip within MAX_TRIP_DAYS.
+    """
+    invalid = []
+    for name, value in settings._asdict().items():
+        try:
+            Configuration._meta.get_field(name).run_validators(value)
+        except ValidationError:
+            invalid.append(name)
+        else:
+            if not math.isfinite(value):
+                invalid.append(name)
+    return invalid
+
+
+def plan_settings(configuration=None):
+    """
+    Returns the hashable planner settings of a Configuration, or the model's
+    defaults without one.  Values the planner can't run with, saved before the
+    model validated them, are replaced by the defaults.
+    """
+    defaults = PlanSettings(
+        *(Configuration._meta.get_field(name).default for name in PlanSettings._fields)
+    )
+    if configuration is None:
+        return defaults
+    settings = PlanSettings(
+        *(getattr(configuration, name) for name in PlanSettings._fields)
+    )
+    return settings._replace(
+        **{name: getattr(defaults, name) for name in invalid_settings(settings)}
+    )
+
+
+class TripPlan:
+    """
+    The schedule template compiled from one configuration.
+    """
+
+    def __init__(self, settings):
+        invalid = invalid_settings(settings)
+        if invalid:
+            # Too frequent fuel stops or too long stops leave no time to
+            # drive, and a negative duration would move time backwards.
+            raise ValueError(f"Invalid planner settings: {', '.join(invalid)}")
+        self.settings = settings
+        self.fuel_stop_miles = settings.fuel_stop_frequency
+        self.service_hours = settings.pickup_dropoff_time
+        rest_hours = max(0.5, settings.minimum_rest_stop)
+
+        # Stop templates: (duty status, remarks, duration in hours).
+        self.fuel_stop = ("ON", "Fuel stop and 30-minute break", rest_hours)
+        self.rest_break = ("OD", "30-minute break", rest_hours)
+        self.stops = {
+            "pickup": ("ON", "Loading/Unloading Freight", self.service_hours),
+            "dropoff": ("ON", "Dropoff", self.service_hours),
+        }
+
+    def run(self, legs, start_time, rng, load_at_start=False):
+        """
+        Plans the trip over ``legs`` from ``start_time`` and returns its
+        PlannedEntry tuples.  ``rng`` varies the start of each day, the
+        pre-trip inspection and the traffic on each driving segment.  Raises
+        TripTooLong when the dropoff isn't reached within MAX_TRIP_DAYS.
+        """
+        entries = []
+        emit = entries.append
+        time = start_time
+        location = None
+        coordinates = legs[0].origin_coordinates if legs else (None, None)
+        leg_index = 0
+        leg_miles = 0.0  # Miles driven on the current leg
+        miles_since_fuel = 0.0
+        loaded = False
+        days = 0
+
+        while days < MAX_TRIP_DAYS:
+            days += 1
+            here = location or self._en_route(legs, leg_index)
+            emit(PlannedEntry(time, "OD", here, "Start of day", *coordinates))
+            time += timedelta(minutes=rng.randint(0, 60))
+            emit(PlannedEntry(time, "ON", here, "Pre-trip inspection", *coordinates))
+            window_end = time + timedelta(hours=DUTY_WINDOW_HOURS)
+            time += timedelta(minutes=rng.randint(0, 30))
+            if load_at_start and not loaded:
+                time = self._stop(emit, self.stops["pickup"], time, here, coordinates)
+                loaded = True
+
+            driven_today = 0.0
+            since_break = 0.0
+            while leg_index < len(legs):
+                leg = legs[leg_index]
+                mph = leg.miles / leg.hours / rng.uniform(0.9, 1.2) if leg.hours else 1
+                hours_left = (window_end - time) / timedelta(hours=1)
+                limits = (
+                    (leg.miles - leg_miles) / mph,
+                    (self.fuel_stop_miles - miles_since_fuel) / mph,
+                    DRIVING_BEFORE_BREAK_HOURS - since_break,
+                    MAX_DRIVING_HOURS - driven_today,
+                    hours_left,
+                )
+                # The first limit reached ends the segment; on a tie the leg's
+                # end wins, then the fuel stop, then the break.
+                reason = min(range(len(limits)), key=limits.__getitem__)
+                hours = limits[reason]
+
+                if hours > 1e-6:
+                    # Driving on through a city continues the same entry.
+                    if entries[-1].duty_status != "DR":
+                        emit(
+                            PlannedEntry(
+                                time, "DR", "En Route", "Driving", *coordinates
+                            )
+                        )
+                    time += timedelta(hours=hours)
+                    driven_today += hours
+                    since_break += hours
+                    leg_miles += hours * mph
+                    miles_since_fuel += hours * mph
+
+                if reason == 0:
+                    # Arrived at the end of the leg.
+                    leg_index += 1
+                    leg_miles = 0.0
+                    location = leg.target
+                    coordinates = leg.target_coordinates
+                    if leg.arrival == "dropoff" and not loaded:
+                        # Picked up and delivered at the same place.
+                        time = self._stop(
+                            emit, self.stops["pickup"], time, location, coordinates
+                        )
+                    if leg.arrival:
+                        time = self._stop(
+                            emit, self.stops[leg.arrival], time, location, coordinates
+                        )
+                        loaded = True
+                        since_break = 0.0
+                        if leg.arrival == "dropoff":
+                            emit(
+                                PlannedEntry(
+                                    time, "OD", location, "End of trip", *coordinates
+                                )
+                            )
+                            return entries
+                    continue
+
+                location = None
+                coordinates = self._position(leg, leg_miles)
+                here = self._en_route(legs, leg_index)
+                if reason == 1:
+                    time = self._stop(emit, self.fuel_stop, time, here, coordinates)
+                    miles_since_fuel = 0.0
+                    since_break = 0.0
+                elif reason == 2:
+                    time = self._stop(emit, self.rest_break, time, here, coordinates)
+                    since_break = 0.0
+                else:
+                    break  # Daily driving limit or duty window reached
+
+            if leg_index == len(legs):
+                return entries  # No legs left to drive
+            here = location or self._en_route(legs, leg_index)
+            emit(PlannedEntry(time, "OD", here, "End of day", *coordinates))
+            time += timedelta(hours=OFF_DUTY_RESET_HOURS)
+        raise TripTooLong(
+            f"The trip can't be delivered within {MAX_TRIP_DAYS} days of driving"
+        )
+
+    def _stop(self, emit, stop, time, location, coordinates):
+        duty_status, remarks, hours = stop
+        emit(PlannedEntry(time, duty_status, location, remarks, *coordinates))
+        return time + timedelta(hours=hours)
+
+    def _en_route(self, legs, leg_index):
+        if leg_index < len(legs):
+            return f"En route to {legs[leg_index].target}"
+        return legs[-1].target
+
+    def _position(self, leg, leg_miles):
+        (lat1, lon1), (lat2, lon2) = leg.origin_coordinates, leg.target_coordinates
+        fraction = leg_miles / leg.miles if leg.miles else 1
+        return lat1 + (lat2 - lat1) * fraction, lon1 + (lon2 - lon1) * fraction
+
+
+@lru_cache(maxsize=256)
+def compile_plan(settings):
+    """
+    Returns the TripPlan of a PlanSettings, compiling it on first use.
+    """
+    return TripPlan(settings)
+
+
+def estimate_leg(origin, destination):
+    """
+    Estimates road miles and driving hours between two (lat, lon) points.
+    """
+    lat1, lon1 = map(math.radians, origin)
+    lat2, lon2 = map(math.radians, destination)
+    haversine = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    miles = 2 * 3958.8 * math.asin(math.sqrt(haversine)) * ROAD_FACTOR
+    return miles, miles / AVERAGE_MPH
+
+
+def build_legs(start, pickup, dropoff, coordinates, matrix=None):
+    """
+    Returns the legs from ``start`` through ``pickup`` to ``dropoff``.
+    ``coordinates`` maps each of them to (lat, lon).  Between cities of the
+    city matrix the route passes through the cities on the way, with matrix
+    distances and times; elsewhere it is estimated.
+    """
+    waypoints = [start, pickup, dropoff]
+    if matrix and all(location in matrix for location in waypoints):
+        path = matrix.plan_path(waypoints, MAX_LEG_HOURS)
+        origins = [start] + path
+        legs = [
+            Leg(
+                target,
+                matrix.miles(origin, target),
+                matrix.hours(origin, target),
+                matrix.coordinates(origin),
+                matrix.coordinates(target),
+                None,
+            )
+            for origin, target in zip(origins, path)
+        ]
+    else:
+        legs = [
+            Leg(
+                target,
+                *estimate_leg(coordinates[origin], coordinates[target]),
+                coordinates[origin],
+                coordinates[target],
+                None,
+            )
+            for origin, target in zip(waypoints, waypoints[1:])
+            if origin != target
+        ]
+
+    # Mark where the freight is loaded and delivered.
+    legs = list(legs)
+    if pickup != start:
+        for i, leg in enumerate(legs):
+            if leg.target == pickup:
+                legs[i] = leg._replace(arrival="pickup")
+                break
+    if legs:
+        legs[-1] = legs[-1]._replace(arrival="dropoff")
+    return legs
+
+
+def plan_trip(
+    configuration, start, pickup, dropoff, coordinates, start_time, rng, matrix=None
+):
+    """
+    Plans a trip with the compiled plan of ``configuration`` (a Configuration,
+    a PlanSettings or None for the defaults) and returns its PlannedEntry
+    tuples.
+    """
+    if not isinstance(configuration, PlanSettings):
+        configuration = plan_settings(configuration)
+    legs = build_legs(start, pickup, dropoff, coordinates, matrix)
+    if not legs:
+        # Everything happens in one place.
+        return [
+            PlannedEntry(start_time, "ON", dropoff, "Dropoff", *coordinates[dropoff])
+        ]
+    return compile_plan(configuration).run(
+        legs, start_time, rng, load_at_start=pickup == start
+    )
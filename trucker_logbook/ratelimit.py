@@ -0,0 +1,129 @@
+"""
+Token-bucket rate limiting of outbound calls to Nominatim and OSRM, shared by
+every worker and process through the database (or the configured cache).
+
+Each upstream has a bucket refilled at UPSTREAM_RATE_LIMITS[name]["rate"]
+tokens per second, up to "burst" tokens.  Interactive callers reserve a token
+even when none is left, which drives the bucket negative: every negative unit
+is a caller queued ahead of you, and you sleep until your token is due.  The
+queue is bounded by "max_queue", and a caller whose token would arrive after
+its deadline fails at once with UpstreamThrottled instead of piling up.
+
+Batch callers never queue.  They only take a token that is already available,
+polling until their (longer) deadline, so while any interactive caller is
+waiting the batch work is held back.
+"""
+
+import contextlib
+import contextvars
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import RateLimitBucket
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+_priority = contextvars.ContextVar("upstream_priority", default=INTERACTIVE)
+
+
+class UpstreamThrottled(Exception):
+    """
+    Raised when an upstream call can't be made before the caller's deadline.
+    """
+
+
+@contextlib.contextmanager
+def upstream_priority(priority):
+    """
+    Runs the enclosed upstream calls with the given priority.
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+@contextlib.contextmanager
+def _database_bucket(name, burst):
+    # The bucket lives behind its own connection, so its row lock is released
+    # right away even when the caller is inside a long transaction.
+    using = settings.UPSTREAM_RATE_LIMIT_DATABASE
+    with transaction.atomic(using=using):
+        buckets = RateLimitBucket.objects.using(using).select_for_update()
+        bucket, _ = buckets.get_or_create(
+            name=name, defaults={"tokens": burst, "updated_at": time.time()}
+        )
+        state = {"tokens": bucket.tokens, "updated_at": bucket.updated_at}
+        yield state
+        bucket.tokens = state["tokens"]
+        bucket.updated_at = state["updated_at"]
+        bucket.save(using=using, update_fields=["tokens", "updated_at"])
+
+
+@contextlib.contextmanager
+def _cache_bucket(name, burst):
+    # cache.add() is atomic on shared caches (Redis, Memcached, database), so
+    # it serves as a short-lived lock around the read-modify-write.
+    key = f"upstream-rate-limit:{name}"
+    lock_key = f"{key}:lock"
+    while not cache.add(lock_key, 1, timeout=5):
+        time.sleep(0.001)
+    try:
+        state = cache.get(key) or {"tokens": burst, "updated_at": time.time()}
+        yield state
+        cache.set(key, state, timeout=None)
+    finally:
+        cache.delete(lock_key)
+
+
+def _bucket(name, burst):
+    if settings.UPSTREAM_RATE_LIMIT_BACKEND == "cache":
+        return _cache_bucket(name, burst)
+    return _database_bucket(name, burst)
+
+
+def acquire(name, timeout=None):
+    """
+    Blocks until a call to the ``name`` upstream may be made, or raises
+    UpstreamThrottled when that can't happen within ``timeout`` seconds
+    (by default the deadline configured for the current priority).
+    """
+    limit = settings.UPSTREAM_RATE_LIMITS[name]
+    rate = limit["rate"]
+    burst = limit["burst"]
+    priority = _priority.get()
+    if timeout is None:
+        timeout = settings.UPSTREAM_DEADLINES[priority]
+    deadline = time.monotonic() + timeout
+
+    while True:
+        with _bucket(name, burst) as state:
+            now = time.time()
+            tokens = min(burst, state["tokens"] + (now - state["updated_at"]) * rate)
+            state["updated_at"] = now
+            state["tokens"] = tokens
+
+            if priority == BATCH:
+                wait = 0 if tokens >= 1 else (1 - tokens) / rate
+                if wait == 0:
+                    state["tokens"] = tokens - 1
+                    return
+            else:
+                if -tokens >= limit["max_queue"]:
+                    raise UpstreamThrottled(f"Too many queued {name} requests")
+                wait = max(0, (1 - tokens) / rate)
+                if time.monotonic() + wait > deadline:
+                    raise UpstreamThrottled(f"{name} is rate limited")
+                state["tokens"] = tokens - 1
+
+        if priority != BATCH:
+            time.sleep(wait)
+            return
+        if time.monotonic() + wait > deadline:
+            raise UpstreamThrottled(f"{name} is rate limited")
+        time.sleep(wait)
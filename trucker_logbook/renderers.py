@@ -0,0 +1,84 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from .timeline import CONTENT_TYPE
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class TimelineRenderer(BaseRenderer):
+    """
+    Passes a packed trip timeline snapshot through untouched.
+    """
+
+    media_type = CONTENT_TYPE
+    format = "timeline"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """
+    JSON with every list of records turned into one array per field, e.g.
+    ``[{"id": 1, "duty_status": "OD"}, {"id": 2, "duty_status": "DR"}]``
+    becomes ``{"id": [1, 2], "duty_status": ["OD", "DR"]}``.  Field names are
+    sent once instead of once per record, and clients can read each column
+    straight into a typed array.
+    """
+
+    media_type = "application/vnd.spotter.columnar+json"
+    format = "columnar"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(to_columns(data), accepted_media_type, renderer_context)
+
+
+def to_columns(data):
+    if isinstance(data, dict):
+        return {key: to_columns(value) for key, value in data.items()}
+    if isinstance(data, list):
+        items = [to_columns(item) for item in data]
+        if items and all(isinstance(item, dict) for item in items):
+            fields = list(items[0])
+            if all(list(item) == fields for item in items):
+                return {field: [item[field] for item in items] for field in fields}
+        return items
+    return data
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    MessagePack encoding of the response data.  Only offered when the msgpack
+    package is installed.
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+    available = msgpack is not None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        # Dates, decimals and the like are sent as their JSON strings.
+        return msgpack.packb(data, default=DjangoJSONEncoder().default)
+
+
+class ContentNegotiation(DefaultContentNegotiation):
+    """
+    Skips the renderers whose optional dependency isn't installed.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        renderers = [
+            renderer for renderer in renderers if getattr(renderer, "available", True)
+        ]
+        return super().select_renderer(request, renderers, format_suffix)
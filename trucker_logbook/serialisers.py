@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from .models import Trip, LogEntry, DailySummary, Configuration
+from .models import Trip, LogEntry, DailySummary, Configuration, Driver
+from .archive import get_log_entries
+from .dutycycle import hours_available, hours_used
 
 
 class LogEntrySerializer(serializers.ModelSerializer):
@@ -29,6 +31,35 @@ class TripSerializer(serializers.ModelSerializer):
     class Meta:
         model = Trip
         fields = "__all__"  # Or specify individual fields if needed
+        read_only_fields = (
+            "logs_generated_at",
+            "archived_at",
+            "created_at",
+        )  # Managed by the server
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if instance.archived_at:
+            # The entries were moved out of LogEntry, read them from the archive.
+            data["log_entries"] = LogEntrySerializer(
+                get_log_entries(instance), many=True
+            ).data
+        return data
+
+
+class DriverSerializer(serializers.ModelSerializer):
+    cycle_hours_used = serializers.SerializerMethodField()
+    hours_available = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Driver
+        fields = ["id", "name", "created_at", "cycle_hours_used", "hours_available"]
+
+    def get_cycle_hours_used(self, obj):
+        return hours_used(obj)
+
+    def get_hours_available(self, obj):
+        return hours_available(obj)
 
 
 class DailySummarySerializer(serializers.ModelSerializer):
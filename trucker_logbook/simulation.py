@@ -0,0 +1,165 @@
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+
+from .helper import compute_daily_summaries, generate_log_rows, trip_start_time
+from .models import Configuration
+from .planner import plan_settings
+from .ratelimit import BATCH, upstream_priority
+
+# Percentiles reported for every Monte Carlo metric.
+PERCENTILES = (50, 75, 90, 95)
+
+_executor = None
+
+
+def no_geocode(location):
+    """
+    Geocoder used by the simulation workers.  Scenario statistics don't depend
+    on coordinates, so we never call Nominatim from a worker process.
+    """
+    return None
+
+
+def get_executor():
+    """
+    Returns the process pool shared by all Monte Carlo runs in this process.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.SIMULATION_WORKERS)
+    return _executor
+
+
+def summarise_scenario(log_entries):
+    """
+    Reduces a simulated list of log entries to the metrics we report on:
+    the arrival time (the last entry), total hours spent driving and the
+    number of rest stops (sleeper berth periods and entries marked as breaks).
+    """
+    drive_hours = 0
+    rest_stops = 0
+    for i, entry in enumerate(log_entries):
+        if entry.duty_status == "DR" and i + 1 < len(log_entries):
+            time_diff = log_entries[i + 1].timestamp - entry.timestamp
+            drive_hours += time_diff.total_seconds() / 3600
+        if entry.duty_status == "SB" or "break" in (entry.remarks or ""):
+            rest_stops += 1
+    return log_entries[-1].timestamp, drive_hours, rest_stops
+
+
+def simulate_scenario(scenario):
+    """
+    Runs a single seeded scenario.  This is executed in a worker process, so it
+    only receives and returns plain picklable values.
+    """
+    (
+        start_date,
+        start_location,
+        pickup_location,
+        dropoff_location,
+        plan,
+        seed,
+    ) = scenario
+    log_entries = generate_log_rows(
+        start_date,
+        start_location,
+        pickup_location,
+        dropoff_location,
+        rng=random.Random(seed),
+        geocoder=no_geocode,
+        configuration=plan,
+    )
+    return summarise_scenario(log_entries)
+
+
+def percentiles(values, points=PERCENTILES):
+    """
+    Linear-interpolated percentiles of ``values`` keyed as "p50", "p90", ...
+    """
+    ordered = sorted(values)
+    result = {}
+    for point in points:
+        rank = (len(ordered) - 1) * point / 100
+        lower = int(rank)
+        upper = min(lower + 1, len(ordered) - 1)
+        result[f"p{point}"] = ordered[lower] + (ordered[upper] - ordered[lower]) * (
+            rank - lower
+        )
+    return result
+
+
+def run_monte_carlo(trip, runs, seed=None):
+    """
+    Simulates ``runs`` variants of a trip on the process pool and returns the
+    distribution of arrival time, driving hours and rest stops.  Scenario
+    ``i`` is seeded with ``seed + i``, so the same seed always gives the same
+    distribution.  Nothing is written to the database.
+    """
+    if seed is None:
+        seed = random.SystemRandom().randrange(2**32)
+
+    # Workers get the configuration as plain PlanSettings, which also key
+    # their compiled plans.
+    plan = plan_settings(Configuration.objects.filter(trip=trip).first())
+    scenarios = [
+        (
+            trip.start_date,
+            trip.start_location,
+            trip.pickup_location,
+            trip.dropoff_location,
+            plan,
+            seed + i,
+        )
+        for i in range(runs)
+    ]
+    chunksize = max(1, runs // (settings.SIMULATION_WORKERS * 4))
+    results = list(
+        get_executor().map(simulate_scenario, scenarios, chunksize=chunksize)
+    )
+
+    start_time = trip_start_time(trip.start_date)
+    arrival_hours = [
+        (arrival - start_time).total_seconds() / 3600 for arrival, _, _ in results
+    ]
+    arrival = {
+        key: {
+            "hours": hours,
+            "timestamp": (start_time + timedelta(hours=hours)).isoformat(),
+        }
+        for key, hours in percentiles(arrival_hours).items()
+    }
+    return {
+        "runs": runs,
+        "seed": seed,
+        "arrival": arrival,
+        "total_driving_hours": percentiles([hours for _, hours, _ in results]),
+        "rest_stops": percentiles([stops for _, _, stops in results]),
+    }
+
+
+def simulate_trip_rows(tasks):
+    """
+    Simulates a shard of trips for the ``simulate_fleet`` command.  Each task is
+    ``(trip_id, start_date, start, pickup, dropoff, plan, seed)``, with the
+    trip's PlanSettings; the result holds, per trip, its log entries as plain
+    tuples and its daily summary totals.
+    """
+    results = []
+    # Fleet simulation is batch work: should it ever call an upstream, it
+    # yields to interactive requests.
+    with upstream_priority(BATCH):
+        for trip_id, start_date, start, pickup, dropoff, plan, seed in tasks:
+            rows = generate_log_rows(
+                start_date,
+                start,
+                pickup,
+                dropoff,
+                rng=random.Random(seed),
+                geocoder=no_geocode,
+                configuration=plan,
+            )
+            results.append((trip_id, rows, compute_daily_summaries(rows)))
+    return results
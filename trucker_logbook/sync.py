@@ -0,0 +1,135 @@
+"""
+Delta sync of log entries and daily summaries.
+
+Every change to a LogEntry or DailySummary bumps its ``updated_at``, and
+deletions leave a tombstone (``deleted_at`` set) instead of removing the row.
+Clients pull the rows of their trips changed since a cursor, as one stream
+ordered by (updated_at, kind, id), and get the cursor of the last row back.
+
+Rows are only handed out once they are SYNC_SETTLE_SECONDS old, so that a
+transaction committing shortly after a later one can't slip in behind a
+cursor that has already moved past it.  Sync reads always go to the primary:
+a lagging read replica could be missing rows older than the settle window, and
+the cursor would then skip them for good.  Tombstones are purged after
+SYNC_TOMBSTONE_RETENTION_DAYS; clients holding an older cursor must resync
+from scratch.
+"""
+
+import base64
+import heapq
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import DailySummary, LogEntry
+from .serialisers import DailySummarySerializer, LogEntrySerializer
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+PRIMARY = "default"  # Database sync reads from, never a replica
+
+# Stream kinds, in their order among rows updated at the same instant.
+KINDS = (
+    ("log_entry", LogEntry, LogEntrySerializer),
+    ("daily_summary", DailySummary, DailySummarySerializer),
+)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorExpired(Exception):
+    """
+    Raised for a cursor older than the tombstone retention period.
+    """
+
+
+def encode_cursor(updated_at, kind, pk):
+    microseconds = (updated_at - EPOCH) // timedelta(microseconds=1)
+    return base64.urlsafe_b64encode(f"{microseconds}:{kind}:{pk}".encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        microseconds, kind, pk = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        )
+        return EPOCH + timedelta(microseconds=int(microseconds)), int(kind), int(pk)
+    except (ValueError, UnicodeError, OverflowError):
+        raise InvalidCursor("Invalid cursor")
+
+
+def tombstone_horizon():
+    return timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+
+
+def changes_since(trip_ids, cursor=None, limit=500):
+    """
+    Returns ``(changes, next_cursor, has_more)`` for the log entries and daily
+    summaries of ``trip_ids`` changed after ``cursor``.  Without a cursor the
+    stream starts from the beginning and skips tombstones.
+    """
+    if cursor:
+        updated_at, kind, pk = decode_cursor(cursor)
+        if updated_at < tombstone_horizon():
+            raise CursorExpired("Cursor is too old, resync from scratch")
+
+    settled = timezone.now() - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+    streams = []
+    for rank, (name, model, serializer_class) in enumerate(KINDS):
+        rows = model.all_objects.using(PRIMARY).filter(
+            trip_id__in=trip_ids, updated_at__lte=settled
+        )
+        if cursor:
+            after = Q(updated_at__gt=updated_at)
+            if rank > kind:
+                after |= Q(updated_at=updated_at)
+            elif rank == kind:
+                after |= Q(updated_at=updated_at, id__gt=pk)
+            rows = rows.filter(after)
+        else:
+            rows = rows.filter(deleted_at__isnull=True)
+        rows = rows.order_by("updated_at", "id")[: limit + 1]
+        streams.append(
+            [
+                ((row.updated_at, rank, row.id), name, row, serializer_class)
+                for row in rows
+            ]
+        )
+
+    changes = []
+    next_cursor = cursor
+    has_more = False
+    for key, name, row, serializer_class in heapq.merge(
+        *streams, key=lambda item: item[0]
+    ):
+        if len(changes) == limit:
+            has_more = True
+            break
+        deleted = row.deleted_at is not None
+        changes.append(
+            {
+                "type": name,
+                "id": row.id,
+                "trip": row.trip_id,
+                "updated_at": row.updated_at,
+                "deleted": deleted,
+                "data": None if deleted else serializer_class(row).data,
+            }
+        )
+        next_cursor = encode_cursor(*key)
+    return changes, next_cursor, has_more
+
+
+def purge_tombstones():
+    """
+    Deletes the tombstones older than the retention period.  Returns the
+    number of rows removed.
+    """
+    horizon = tombstone_horizon()
+    purged = 0
+    for _, model, _ in KINDS:
+        purged += model.all_objects.filter(deleted_at__lt=horizon).delete()[0]
+    return purged
@@ -0,0 +1,79 @@
+import datetime
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from trucker_logbook.archive import (
+    archive_trip,
+    decode_log_entries,
+    encode_log_entries,
+    get_log_entries,
+)
+from trucker_logbook.models import LogArchive, LogEntry, Trip
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.trip = Trip.objects.create(
+            start_location="Dallas, TX",
+            pickup_location="Austin, TX",
+            dropoff_location="Houston, TX",
+            start_date=datetime.date(2025, 1, 6),
+        )
+        start = datetime.datetime(2025, 1, 6, 6, tzinfo=datetime.timezone.utc)
+        self.entries = [
+            LogEntry.objects.create(
+                trip=self.trip,
+                timestamp=start + datetime.timedelta(hours=hours),
+                duty_status=duty_status,
+                location="Dallas, TX",
+                remarks=remarks,
+                latitude=32.7767,
+                longitude=-96.797,
+            )
+            for hours, duty_status, remarks in (
+                (0, "ON", "Pre-trip inspection"),
+                (0.5, "DR", "Driving"),
+                (4, "OD", None),
+            )
+        ]
+
+    def fields(self, entries):
+        return [
+            (e.id, e.timestamp, e.duty_status, e.remarks, e.latitude) for e in entries
+        ]
+
+    def test_encode_decode_round_trip(self):
+        decoded = decode_log_entries(self.trip, encode_log_entries(self.entries))
+        self.assertEqual(self.fields(decoded), self.fields(self.entries))
+
+    def test_archived_entries_are_served_from_the_archive(self):
+        self.assertEqual(archive_trip(self.trip), 3)
+        self.assertFalse(LogEntry.all_objects.filter(trip=self.trip).exists())
+
+        response = self.client.get(f"/api/trips/{self.trip.id}/logs/")
+        self.assertEqual([e["id"] for e in response.data], [e.id for e in self.entries])
+
+        entry = self.entries[1]
+        response = self.client.get(f"/api/logs/{entry.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["remarks"], "Driving")
+
+        response = self.client.patch(
+            f"/api/logs/{entry.id}/", {"remarks": "Edited"}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get("/api/logs/999999/").status_code, 404)
+
+    def test_archived_at_without_an_archive_falls_back_to_live_rows(self):
+        self.trip.archived_at = timezone.now()
+        self.trip.save()
+        self.assertFalse(LogArchive.objects.filter(trip=self.trip).exists())
+        self.assertEqual(
+            self.fields(get_log_entries(self.trip)), self.fields(self.entries)
+        )
+        response = self.client.get(f"/api/trips/{self.trip.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["log_entries"]), 3)
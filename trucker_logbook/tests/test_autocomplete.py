@@ -0,0 +1,59 @@
+import datetime
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from trucker_logbook import autocomplete
+from trucker_logbook.autocomplete import LocationIndex, get_location_index
+from trucker_logbook.models import Trip
+
+
+def create_trip(dropoff_location):
+    return Trip.objects.create(
+        start_location="Dallas, TX",
+        pickup_location="Austin, TX",
+        dropoff_location=dropoff_location,
+        start_date=datetime.date(2025, 1, 6),
+    )
+
+
+@override_settings(AUTOCOMPLETE_REFRESH_INTERVAL=3600)
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        autocomplete._index = None
+        self.addCleanup(setattr, autocomplete, "_index", None)
+
+    def test_completions_are_ranked_by_use(self):
+        index = LocationIndex()
+        for location, count in (
+            ("Dallas, TX", 1),
+            ("Dalhart, TX", 3),
+            ("Denver, CO", 5),
+        ):
+            index.add(location, count)
+        self.assertEqual(
+            index.complete("dal"),
+            [
+                {"location": "Dalhart, TX", "count": 3},
+                {"location": "Dallas, TX", "count": 1},
+            ],
+        )
+        self.assertEqual(index.complete("x"), [])
+
+    def test_first_query_sees_existing_trips(self):
+        create_trip("1200 Depot Rd, Waco, TX")
+        response = APIClient().get("/api/locations/autocomplete/", {"q": "1200 dep"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [match["location"] for match in response.data],
+            ["1200 Depot Rd, Waco, TX"],
+        )
+
+    def test_refresh_only_adds_new_rows(self):
+        index = get_location_index()
+        dallas = index.complete("Dallas, TX")[0]["count"]
+        create_trip("Houston, TX")
+        index.refresh()
+        index.refresh()
+        self.assertEqual(index.complete("Dallas, TX")[0]["count"], dallas + 1)
+        self.assertIs(get_location_index(), index)
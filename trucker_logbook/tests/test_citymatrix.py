@@ -0,0 +1,84 @@
+import os
+import tempfile
+from array import array
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from trucker_logbook.citymatrix import (
+    CITY_COORDINATES,
+    MATRIX_PATH,
+    CityMatrix,
+    estimate_matrix,
+    load_city_matrix,
+)
+from trucker_logbook.helper import CITIES
+
+
+class CityMatrixTests(SimpleTestCase):
+    def setUp(self):
+        self.matrix = estimate_matrix(CITY_COORDINATES)
+
+    def test_cities_come_from_the_matrix_coordinates(self):
+        self.assertEqual(CITIES, list(CITY_COORDINATES))
+        shipped = load_city_matrix()
+        self.assertEqual(shipped.names, CITIES)
+
+    def test_bytes_round_trip(self):
+        decoded = CityMatrix.from_bytes(self.matrix.to_bytes())
+        self.assertEqual(decoded.names, self.matrix.names)
+        for origin in ("Dallas, TX", "Boston, MA"):
+            self.assertEqual(
+                decoded.coordinates(origin), self.matrix.coordinates(origin)
+            )
+            self.assertEqual(
+                decoded.hours(origin, "Austin, TX"),
+                self.matrix.hours(origin, "Austin, TX"),
+            )
+
+    def test_rejects_other_files(self):
+        with self.assertRaises(ValueError):
+            CityMatrix.from_bytes(b"TLN1\x00\x00\x00\x00")
+
+    def test_estimates_are_symmetric_and_zero_on_the_diagonal(self):
+        self.assertEqual(self.matrix.miles("Dallas, TX", "Dallas, TX"), 0)
+        self.assertAlmostEqual(
+            self.matrix.miles("Dallas, TX", "Austin, TX"),
+            self.matrix.miles("Austin, TX", "Dallas, TX"),
+            places=3,
+        )
+
+    def test_plan_path_stops_between_distant_waypoints(self):
+        waypoints = ["San Antonio, TX", "Dallas, TX", "Houston, TX"]
+        self.assertEqual(
+            self.matrix.plan_path(waypoints, 2.0),
+            ["Austin, TX", "Dallas, TX", "Houston, TX"],
+        )
+        # A long enough leg limit drives straight through.
+        self.assertEqual(
+            self.matrix.plan_path(waypoints, 24), ["Dallas, TX", "Houston, TX"]
+        )
+
+    def test_load_is_cached_per_path(self):
+        small = CityMatrix(
+            ["A", "B"],
+            array("f", [0, 1]),
+            array("f", [0, 1]),
+            array("f", [0, 10, 10, 0]),
+            array("f", [0, 1, 1, 0]),
+        )
+        path = os.path.join(tempfile.mkdtemp(), "matrix.bin")
+        with open(path, "wb") as f:
+            f.write(small.to_bytes())
+
+        self.assertEqual(load_city_matrix(path).names, ["A", "B"])
+        self.assertIs(load_city_matrix(path), load_city_matrix(path))
+        self.assertIs(load_city_matrix(), load_city_matrix(MATRIX_PATH))
+        self.assertEqual(load_city_matrix().names, CITIES)
+        self.assertIsNone(load_city_matrix(path + ".missing"))
+
+    def test_build_command_writes_a_loadable_matrix(self):
+        path = os.path.join(tempfile.mkdtemp(), "matrix.bin")
+        call_command("build_city_matrix", source="stub", output=path, stdout=StringIO())
+        self.assertEqual(load_city_matrix(path).names, CITIES)
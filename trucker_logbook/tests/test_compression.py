@@ -0,0 +1,78 @@
+import gzip
+import json
+from unittest import mock
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from spotter_ai_trucker_logbook import compression
+from spotter_ai_trucker_logbook.compression import (
+    CompressionMiddleware,
+    _accepted_encodings,
+    _preferred_encoding,
+)
+
+BODY = json.dumps([{"location": "En Route", "duty_status": "DR"}] * 100).encode()
+
+
+def request(accept_encoding=None):
+    headers = {}
+    if accept_encoding is not None:
+        headers["HTTP_ACCEPT_ENCODING"] = accept_encoding
+    return RequestFactory().get("/api/logs/", **headers)
+
+
+class AcceptEncodingTests(SimpleTestCase):
+    def preferred(self, header):
+        return _preferred_encoding(request(header), ("br", "gzip"))
+
+    def test_parses_codings_and_q_values(self):
+        self.assertEqual(
+            _accepted_encodings("gzip;q=0.5, BR ; q=0.9,identity;q=x, *;q=0"),
+            {"gzip": 0.5, "br": 0.9, "*": 0.0},
+        )
+
+    def test_fractional_q_values_are_accepted(self):
+        self.assertEqual(self.preferred("gzip;q=0.5"), "gzip")
+        self.assertEqual(self.preferred("gzip;q=0.001"), "gzip")
+
+    def test_highest_q_value_wins(self):
+        self.assertEqual(self.preferred("br;q=0.9, gzip;q=0.8"), "br")
+        self.assertEqual(self.preferred("br;q=0.8, gzip;q=0.9"), "gzip")
+
+    def test_ties_prefer_the_first_encoding(self):
+        self.assertEqual(self.preferred("gzip, deflate, br"), "br")
+
+    def test_refusals(self):
+        self.assertIsNone(self.preferred("gzip;q=0, br;q=0.000"))
+        self.assertIsNone(self.preferred("identity"))
+        self.assertIsNone(self.preferred(""))
+        self.assertIsNone(_preferred_encoding(request(), ("gzip",)))
+
+    def test_wildcard(self):
+        self.assertEqual(self.preferred("*"), "br")
+        self.assertEqual(self.preferred("br;q=0, *;q=0.5"), "gzip")
+        self.assertIsNone(self.preferred("*;q=0"))
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    def respond(self, accept_encoding, body=BODY):
+        middleware = CompressionMiddleware(
+            lambda request: HttpResponse(body, content_type="application/json")
+        )
+        return middleware(request(accept_encoding))
+
+    def test_compresses_with_a_fractional_q_value(self):
+        with mock.patch.object(compression, "brotli", None):
+            response = self.respond("br;q=0.9, gzip;q=0.8")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), BODY)
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_leaves_refused_and_small_responses_alone(self):
+        response = self.respond("gzip;q=0")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response.content, BODY)
+
+        response = self.respond("gzip", body=b"[]")
+        self.assertFalse(response.has_header("Content-Encoding"))
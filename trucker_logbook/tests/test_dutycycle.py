@@ -0,0 +1,126 @@
+import datetime
+import random
+
+from django.test import TestCase
+
+from trucker_logbook.dutycycle import (
+    CYCLE_DAYS,
+    apply_duty_deltas,
+    hours_available,
+    hours_used,
+    rebuild_duty_cycle,
+    summary_deltas,
+)
+from trucker_logbook.models import DailySummary, Driver, Trip
+
+DAY = datetime.date(2025, 3, 1)
+
+
+def days(offset):
+    return DAY + datetime.timedelta(days=offset)
+
+
+class DutyCycleTests(TestCase):
+    def setUp(self):
+        self.driver = Driver.objects.create(name="Ann")
+
+    def used(self, today):
+        self.driver.refresh_from_db()
+        return hours_used(self.driver, today)
+
+    def test_new_driver_has_the_whole_cycle(self):
+        self.assertEqual(hours_used(self.driver, DAY), 0)
+        self.assertEqual(hours_available(self.driver, DAY), 70)
+
+    def test_window_is_eight_days(self):
+        apply_duty_deltas({self.driver.id: {days(0): 10, days(3): 5}})
+        self.assertAlmostEqual(self.used(days(3)), 15)
+        self.assertAlmostEqual(self.used(days(7)), 15)
+        self.assertAlmostEqual(self.used(days(8)), 5)
+        self.assertAlmostEqual(self.used(days(11)), 0)
+        # Looking back before the latest day only counts the days up to then.
+        self.assertAlmostEqual(self.used(days(1)), 10)
+
+    def test_ring_buffer_wraps_around(self):
+        rng = random.Random(3)
+        applied = {}
+        for _ in range(200):
+            latest = max(applied, default=DAY)
+            day = latest + datetime.timedelta(days=rng.randint(-10, 3))
+            delta = round(rng.uniform(-2, 8), 2)
+            apply_duty_deltas({self.driver.id: {day: delta}})
+            applied[day] = applied.get(day, 0) + delta
+
+        self.driver.refresh_from_db()
+        anchor = self.driver.cycle_anchor
+        self.assertGreater((anchor - DAY).days, 3 * CYCLE_DAYS)
+        for offset in range(-CYCLE_DAYS - 2, CYCLE_DAYS + 2):
+            today = anchor + datetime.timedelta(days=offset)
+            window_start = today - datetime.timedelta(days=CYCLE_DAYS - 1)
+            expected = sum(
+                hours
+                for day, hours in applied.items()
+                if window_start <= day <= today and (anchor - day).days < CYCLE_DAYS
+            )
+            self.assertAlmostEqual(hours_used(self.driver, today), expected, places=2)
+
+    def test_future_trip_keeps_the_past_days(self):
+        today = days(20)
+        apply_duty_deltas(
+            {self.driver.id: {days(offset): 10 for offset in range(15, 21)}},
+            today=today,
+        )
+        # A trip starting ten days from now.
+        apply_duty_deltas({self.driver.id: {days(30): 11, days(31): 9}}, today=today)
+        self.driver.refresh_from_db()
+        self.assertEqual(self.driver.cycle_anchor, today)
+        self.assertAlmostEqual(hours_used(self.driver, today), 60)
+        self.assertAlmostEqual(hours_available(self.driver, today), 10)
+        # The planned days count once they come.
+        self.assertAlmostEqual(hours_used(self.driver, days(30)), 11)
+        self.assertAlmostEqual(hours_used(self.driver, days(31)), 20)
+
+        # A later write moves the days that have come into the ring buffer.
+        apply_duty_deltas({self.driver.id: {days(31): 1}}, today=days(31))
+        self.driver.refresh_from_db()
+        self.assertEqual(self.driver.cycle_anchor, days(31))
+        self.assertEqual(self.driver.cycle_pending, {})
+        self.assertAlmostEqual(hours_used(self.driver, days(31)), 21)
+        self.assertAlmostEqual(hours_used(self.driver, days(33)), 21)
+
+    def test_hours_available_never_goes_negative(self):
+        apply_duty_deltas({self.driver.id: {DAY: 50, days(1): 30}})
+        self.driver.refresh_from_db()
+        self.assertEqual(hours_available(self.driver, days(1)), 0)
+
+    def test_summary_deltas(self):
+        self.assertEqual(
+            summary_deltas({DAY: 10, days(1): 4}, {days(1): 6, days(2): 3}),
+            {DAY: -10, days(1): 2, days(2): 3},
+        )
+
+    def test_incremental_updates_match_a_rebuild(self):
+        trip = Trip.objects.create(
+            start_location="Dallas, TX",
+            pickup_location="Austin, TX",
+            dropoff_location="Houston, TX",
+            start_date=DAY,
+            driver=self.driver,
+        )
+        today = days(5)
+        for offset, hours in ((0, 11.5), (1, 9), (9, 12.25), (12, 4)):
+            DailySummary.objects.create(
+                trip=trip, date=days(offset), total_lines_3_4=hours
+            )
+            apply_duty_deltas({self.driver.id: {days(offset): hours}}, today=today)
+
+        incremental = Driver.objects.get(id=self.driver.id)
+        rebuilt = rebuild_duty_cycle(self.driver.id, today=today)
+        self.assertEqual(incremental.cycle_anchor, rebuilt.cycle_anchor)
+        self.assertEqual(incremental.cycle_pending, rebuilt.cycle_pending)
+        for offset in range(0, 16):
+            self.assertAlmostEqual(
+                hours_used(incremental, days(offset)),
+                hours_used(rebuilt, days(offset)),
+                places=4,
+            )
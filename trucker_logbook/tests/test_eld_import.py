@@ -0,0 +1,121 @@
+import datetime
+import io
+import json
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from trucker_logbook.eld_import import import_log_entries
+from trucker_logbook.models import LogEntry, Trip
+
+HEADER = "trip,timestamp,duty_status,location,remarks,latitude,longitude\n"
+
+
+class EldImportTests(TestCase):
+    def setUp(self):
+        self.trip = Trip.objects.create(
+            start_location="Dallas, TX",
+            pickup_location="Austin, TX",
+            dropoff_location="Houston, TX",
+            start_date=datetime.date(2025, 1, 6),
+        )
+
+    def import_csv(self, rows, **kwargs):
+        content = HEADER + "".join(f"{row}\n" for row in rows)
+        return import_log_entries(io.BytesIO(content.encode()), "csv", **kwargs)
+
+    def rejected(self, report):
+        return {error["row"]: set(error["errors"]) for error in report["errors"]}
+
+    def test_imports_valid_rows_and_marks_the_trip_generated(self):
+        report = self.import_csv(
+            [
+                f'{self.trip.id},2025-01-06T06:00:00Z,off duty,"Dallas, TX",,32.78,-96.8',
+                f"{self.trip.id},2025-01-06 | 07:00:00,D,En Route,Driving,,",
+            ]
+        )
+        self.assertEqual(report["imported"], 2, report["errors"])
+        self.assertEqual(report["trips"], [self.trip.id])
+        self.assertEqual(
+            list(
+                LogEntry.objects.filter(trip=self.trip)
+                .order_by("timestamp")
+                .values_list("duty_status", flat=True)
+            ),
+            ["OD", "DR"],
+        )
+        self.trip.refresh_from_db()
+        self.assertIsNotNone(self.trip.logs_generated_at)
+
+    def test_rejects_invalid_rows(self):
+        LogEntry.objects.create(
+            trip=self.trip,
+            timestamp=timezone.make_aware(datetime.datetime(2025, 1, 6, 12)),
+            duty_status="ON",
+            location="Austin, TX",
+        )
+        report = self.import_csv(
+            [
+                "²,2025-01-06T13:00:00,ON,Austin,,,",
+                "999999,2025-01-06T13:00:00,ON,Austin,,,",
+                f"{self.trip.id},yesterday,ON,Austin,,,",
+                f"{self.trip.id},2025-01-06T11:00:00,ON,Austin,,,",
+                f"{self.trip.id},2025-01-06T13:00:00,XX,,,91,181",
+            ]
+        )
+        self.assertEqual(report["imported"], 0)
+        self.assertEqual(
+            self.rejected(report),
+            {
+                2: {"trip"},
+                3: {"trip"},
+                4: {"timestamp"},
+                5: {"timestamp"},
+                6: {"duty_status", "location", "latitude", "longitude"},
+            },
+        )
+
+    def test_timestamps_must_increase_within_the_file(self):
+        report = self.import_csv(
+            [
+                f"{self.trip.id},2025-01-06T08:00:00,ON,Austin,,,",
+                f"{self.trip.id},2025-01-06T08:00:00,DR,En Route,,,",
+            ],
+            batch_size=1,
+        )
+        self.assertEqual(report["imported"], 1)
+        self.assertEqual(self.rejected(report), {3: {"timestamp"}})
+
+    def test_archived_trips_are_rejected(self):
+        Trip.objects.filter(id=self.trip.id).update(archived_at=timezone.now())
+        report = self.import_csv([f"{self.trip.id},2025-01-06T08:00:00,ON,Austin,,,"])
+        self.assertEqual(report["errors"][0]["errors"]["trip"], "Trip is archived")
+
+    def test_endpoint_with_ndjson_and_a_default_trip(self):
+        body = "\n".join(
+            [
+                json.dumps(
+                    {
+                        "timestamp": "2025-01-06T08:00:00Z",
+                        "duty_status": "ON",
+                        "location": "Austin, TX",
+                    }
+                ),
+                "[1, 2]",
+                "{not json",
+            ]
+        )
+        response = APIClient().post(
+            f"/api/logs/import/?trip={self.trip.id}",
+            body,
+            content_type="application/x-ndjson",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["imported"], 1)
+        self.assertEqual(self.rejected(response.data), {2: {"row"}, 3: {"row"}})
+
+        response = APIClient().post(
+            "/api/logs/import/", body, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,68 @@
+import datetime
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from trucker_logbook import planner
+from trucker_logbook.models import IdempotencyKey, LogEntry, Trip
+
+
+class GenerateLogsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.trip = Trip.objects.create(
+            start_location="Dallas, TX",
+            pickup_location="Austin, TX",
+            dropoff_location="Houston, TX",
+            start_date=datetime.date(2025, 1, 6),
+        )
+        self.url = f"/api/trips/{self.trip.id}/generate_logs/"
+
+    def entry_ids(self):
+        return set(LogEntry.objects.filter(trip=self.trip).values_list("id", flat=True))
+
+    def test_generation_marks_the_trip_generated(self):
+        response = self.client.post(self.url, {"seed": 1}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.trip.refresh_from_db()
+        self.assertIsNotNone(self.trip.logs_generated_at)
+        self.assertTrue(self.entry_ids())
+
+    def test_a_trip_that_cannot_be_delivered_keeps_its_logs(self):
+        self.client.post(self.url, {"seed": 1}, format="json")
+        entries = self.entry_ids()
+        with mock.patch.object(planner, "MAX_TRIP_DAYS", 0):
+            response = self.client.post(self.url, {"seed": 2}, format="json")
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self.entry_ids(), entries)
+
+    def test_a_retry_with_the_same_idempotency_key_is_not_regenerated(self):
+        first = self.client.post(self.url, HTTP_IDEMPOTENCY_KEY="abc")
+        entries = self.entry_ids()
+        retry = self.client.post(self.url, HTTP_IDEMPOTENCY_KEY="abc")
+
+        self.assertEqual(retry.status_code, first.status_code)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(self.entry_ids(), entries)
+        self.assertEqual(IdempotencyKey.objects.filter(trip=self.trip).count(), 1)
+
+    def test_a_new_idempotency_key_regenerates(self):
+        self.client.post(self.url, HTTP_IDEMPOTENCY_KEY="abc")
+        entries = self.entry_ids()
+        self.client.post(self.url, HTTP_IDEMPOTENCY_KEY="def")
+        self.assertTrue(self.entry_ids().isdisjoint(entries))
+
+    def test_server_managed_fields_are_read_only(self):
+        response = self.client.patch(
+            f"/api/trips/{self.trip.id}/",
+            {
+                "archived_at": "2026-01-01T00:00:00Z",
+                "logs_generated_at": "2026-01-01T00:00:00Z",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.trip.refresh_from_db()
+        self.assertIsNone(self.trip.archived_at)
+        self.assertIsNone(self.trip.logs_generated_at)
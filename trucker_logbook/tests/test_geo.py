@@ -0,0 +1,100 @@
+import datetime
+import random
+
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from trucker_logbook.geo import (
+    covering_prefixes,
+    encode_geohash,
+    haversine_km,
+    radius_bounding_box,
+)
+from trucker_logbook.models import LogEntry, Trip
+
+
+def covered(prefixes, latitude, longitude):
+    geohash = encode_geohash(latitude, longitude)
+    return any(geohash.startswith(prefix) for prefix in prefixes)
+
+
+class GeohashTests(SimpleTestCase):
+    def test_encode_geohash(self):
+        self.assertEqual(encode_geohash(57.64911, 10.40744), "u4pruydqq")
+        self.assertEqual(encode_geohash(-90, -180, precision=1), "0")
+        self.assertEqual(encode_geohash(90, 180, precision=1), "z")
+
+    def test_prefixes_cover_every_point_of_the_box(self):
+        rng = random.Random(1)
+        for _ in range(200):
+            min_lat = rng.uniform(-89, 85)
+            min_lon = rng.uniform(-179, 170)
+            max_lat = min_lat + rng.uniform(0.001, 4)
+            max_lon = min_lon + rng.uniform(0.001, 9)
+            prefixes = covering_prefixes(min_lat, min_lon, max_lat, max_lon)
+            self.assertLessEqual(len(prefixes), 16)
+            for _ in range(20):
+                latitude = rng.uniform(min_lat, min(max_lat, 90))
+                longitude = rng.uniform(min_lon, min(max_lon, 180))
+                self.assertTrue(covered(prefixes, latitude, longitude))
+
+    def test_radius_box_across_the_antimeridian(self):
+        box = radius_bounding_box(10.0, 179.95, 25)
+        self.assertGreater(box[3], 180)
+        prefixes = covering_prefixes(*box)
+        self.assertTrue(covered(prefixes, 10.0, 179.9))
+        self.assertTrue(covered(prefixes, 10.0, -179.9))
+        self.assertFalse(covered(prefixes, 10.0, 0.0))
+
+    def test_box_with_min_lon_above_max_lon_crosses_the_antimeridian(self):
+        prefixes = covering_prefixes(-1, 179, 1, -179)
+        self.assertTrue(covered(prefixes, 0, 179.5))
+        self.assertTrue(covered(prefixes, 0, -179.5))
+        self.assertFalse(covered(prefixes, 0, 90))
+
+    def test_huge_boxes_scan_everything(self):
+        self.assertEqual(covering_prefixes(-90, -180, 90, 180, max_cells=1), [""])
+
+    def test_haversine(self):
+        distances = haversine_km(0, 179.9, [0, 0], [-179.9, 179.9])
+        self.assertAlmostEqual(distances[0], 22.24, places=1)
+        self.assertEqual(distances[1], 0)
+
+
+class StopSearchTests(TestCase):
+    def setUp(self):
+        trip = Trip.objects.create(
+            start_location="Suva",
+            pickup_location="Taveuni",
+            dropoff_location="Apia",
+            start_date=datetime.date(2025, 1, 6),
+        )
+        start = datetime.datetime(2025, 1, 6, tzinfo=datetime.timezone.utc)
+        for hours, duty_status, longitude in (
+            (0, "ON", 179.95),
+            (1, "DR", 179.99),
+            (2, "OD", -179.95),
+            (3, "OD", 170.0),
+        ):
+            LogEntry.objects.create(
+                trip=trip,
+                timestamp=start + datetime.timedelta(hours=hours),
+                duty_status=duty_status,
+                location="Stop",
+                latitude=-16.5,
+                longitude=longitude,
+            )
+
+    def search(self, **params):
+        response = APIClient().get("/api/stops/search/", params)
+        self.assertEqual(response.status_code, 200)
+        return [stop["longitude"] for stop in response.data]
+
+    def test_radius_search_across_the_antimeridian(self):
+        self.assertEqual(
+            self.search(lat=-16.5, lon=179.99, radius_km=20), [179.95, -179.95]
+        )
+
+    def test_box_search_across_the_antimeridian(self):
+        found = self.search(min_lat=-17, min_lon=179.5, max_lat=-16, max_lon=-179.5)
+        self.assertEqual(sorted(found), [-179.95, 179.95])
@@ -0,0 +1,216 @@
+import datetime
+import itertools
+import random
+
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from trucker_logbook.citymatrix import load_city_matrix
+from trucker_logbook.models import Configuration, Trip
+from trucker_logbook.planner import (
+    DRIVING_BEFORE_BREAK_HOURS,
+    DUTY_WINDOW_HOURS,
+    MAX_DRIVING_HOURS,
+    OFF_DUTY_RESET_HOURS,
+    Leg,
+    PlanSettings,
+    TripPlan,
+    TripTooLong,
+    build_legs,
+    compile_plan,
+    plan_settings,
+)
+
+START = datetime.datetime(2025, 1, 6, 6, tzinfo=datetime.timezone.utc)
+EPSILON = 1e-6
+
+
+def hours(delta):
+    return delta / datetime.timedelta(hours=1)
+
+
+def with_durations(entries):
+    """
+    Pairs each entry with the hours until the next one.
+    """
+    return [
+        (entry, hours(following.timestamp - entry.timestamp))
+        for entry, following in zip(entries, entries[1:])
+    ]
+
+
+class TripPlanTests(SimpleTestCase):
+    def plan(self, start, pickup, dropoff, settings=None, seed=0):
+        legs = build_legs(start, pickup, dropoff, {}, load_city_matrix())
+        plan = TripPlan(settings or plan_settings())
+        return legs, plan.run(legs, START, random.Random(seed))
+
+    def test_long_trip_respects_the_hours_of_service_limits(self):
+        for seed in range(5):
+            _, entries = self.plan("Seattle, WA", "Denver, CO", "Boston, MA", seed=seed)
+            self.assertEqual(entries[-1].remarks, "End of trip")
+            self.assertEqual(
+                entries, sorted(entries, key=lambda entry: entry.timestamp)
+            )
+
+            since_break = 0.0
+            driven_today = 0.0
+            window_end = None
+            for entry, duration in with_durations(entries):
+                if entry.remarks == "Pre-trip inspection":
+                    window_end = entry.timestamp + datetime.timedelta(
+                        hours=DUTY_WINDOW_HOURS
+                    )
+                    driven_today = 0.0
+                elif entry.remarks == "End of day":
+                    self.assertGreaterEqual(duration, OFF_DUTY_RESET_HOURS)
+                if entry.duty_status == "DR":
+                    since_break += duration
+                    driven_today += duration
+                    end = entry.timestamp + datetime.timedelta(hours=duration)
+                    self.assertLessEqual(
+                        hours(end - window_end), EPSILON, "14-hour window"
+                    )
+                    self.assertLessEqual(
+                        since_break, DRIVING_BEFORE_BREAK_HOURS + EPSILON
+                    )
+                    self.assertLessEqual(driven_today, MAX_DRIVING_HOURS + EPSILON)
+                elif duration >= 0.5 - EPSILON:
+                    since_break = 0.0
+
+    def test_fuel_stops_follow_the_fuel_stop_frequency(self):
+        for frequency in (200, 1000):
+            settings = plan_settings()._replace(fuel_stop_frequency=frequency)
+            legs, entries = self.plan(
+                "Dallas, TX", "Atlanta, GA", "Chicago, IL", settings
+            )
+            miles = sum(leg.miles for leg in legs)
+            fuel_stops = [
+                entry for entry in entries if entry.remarks.startswith("Fuel stop")
+            ]
+            self.assertGreater(len(fuel_stops), 0)
+            self.assertLessEqual(abs(len(fuel_stops) - int(miles // frequency)), 1)
+
+    def test_pickup_and_dropoff_take_the_configured_time(self):
+        settings = plan_settings()._replace(pickup_dropoff_time=2.5)
+        _, entries = self.plan("Dallas, TX", "Austin, TX", "Houston, TX", settings)
+        durations = {
+            entry.remarks: duration for entry, duration in with_durations(entries)
+        }
+        self.assertEqual(durations["Loading/Unloading Freight"], 2.5)
+        self.assertEqual(durations["Dropoff"], 2.5)
+        self.assertEqual(
+            [entry.location for entry in entries if entry.duty_status == "ON"][-1],
+            "Houston, TX",
+        )
+
+    def test_every_valid_configuration_delivers(self):
+        cities = load_city_matrix().names
+        routes = [
+            ("San Francisco, CA", "Boston, MA", "San Francisco, CA"),
+            ("Seattle, WA", "San Diego, CA", "Boston, MA"),
+            ("Dallas, TX", "Dallas, TX", "Austin, TX"),
+        ]
+        rng = random.Random(7)
+        routes += [tuple(rng.sample(cities, 3)) for _ in range(10)]
+        # The bounds of the Configuration validators, and values in between.
+        grid = list(itertools.product((100, 1000, 5000), (0, 24), (0, 2)))
+        grid += [
+            (rng.uniform(100, 2000), rng.uniform(0, 24), rng.uniform(0, 2))
+            for _ in range(10)
+        ]
+        for route, values in itertools.product(routes, grid):
+            settings = PlanSettings(*values)
+            with self.subTest(route=route, settings=settings):
+                _, entries = self.plan(*route, settings, seed=rng.randrange(100))
+                self.assertEqual(entries[-1].remarks, "End of trip")
+                self.assertEqual(entries[-2].remarks, "Dropoff")
+
+    def test_a_limit_reached_at_a_city_takes_its_stop(self):
+        # The fuel stop falls a hair after the first city; the day goes on.
+        legs = [
+            Leg("Austin, TX", 100 - 1e-9, 2, (32.8, -96.8), (30.3, -97.7), None),
+            Leg("Houston, TX", 160, 3, (30.3, -97.7), (29.8, -95.4), "dropoff"),
+        ]
+        settings = plan_settings()._replace(fuel_stop_frequency=100)
+        entries = TripPlan(settings).run(legs, START, random.Random(0), True)
+        remarks = [entry.remarks for entry in entries]
+        self.assertNotIn("End of day", remarks)
+        self.assertTrue(remarks[remarks.index("Driving") + 1].startswith("Fuel stop"))
+        self.assertEqual(remarks[-1], "End of trip")
+
+    def test_a_trip_longer_than_the_day_cap_raises(self):
+        legs = [Leg("Anchorage, AK", 40000, 800, (0, 0), (61.2, -149.9), "dropoff")]
+        with self.assertRaises(TripTooLong):
+            TripPlan(plan_settings()).run(legs, START, random.Random(0))
+
+    def test_compiled_plans_are_memoized(self):
+        settings = plan_settings()
+        self.assertIs(compile_plan(settings), compile_plan(PlanSettings(*settings)))
+        self.assertIsNot(
+            compile_plan(settings),
+            compile_plan(settings._replace(fuel_stop_frequency=500)),
+        )
+
+    def test_rejects_settings_it_cannot_run_with(self):
+        for invalid in (
+            {"fuel_stop_frequency": 0},
+            {"fuel_stop_frequency": 5},
+            {"fuel_stop_frequency": -100},
+            {"fuel_stop_frequency": float("nan")},
+            {"pickup_dropoff_time": -1},
+            {"pickup_dropoff_time": 48},
+            {"minimum_rest_stop": float("inf")},
+            {"minimum_rest_stop": 12},
+        ):
+            with self.assertRaisesMessage(ValueError, next(iter(invalid))):
+                TripPlan(plan_settings()._replace(**invalid))
+
+
+class PlanSettingsTests(TestCase):
+    def setUp(self):
+        self.trip = Trip.objects.create(
+            start_location="Dallas, TX",
+            pickup_location="Austin, TX",
+            dropoff_location="Houston, TX",
+            start_date=START.date(),
+        )
+
+    def test_invalid_saved_values_fall_back_to_the_defaults(self):
+        configuration = Configuration.objects.create(
+            trip=self.trip,
+            fuel_stop_frequency=0,
+            pickup_dropoff_time=-1,
+            minimum_rest_stop=0.75,
+        )
+        self.assertEqual(
+            plan_settings(configuration),
+            PlanSettings(
+                fuel_stop_frequency=1000, pickup_dropoff_time=1, minimum_rest_stop=0.75
+            ),
+        )
+
+    def test_api_rejects_invalid_values(self):
+        configuration = Configuration.objects.create(trip=self.trip)
+        client = APIClient()
+        for field, value in (
+            ("fuel_stop_frequency", 0),
+            ("fuel_stop_frequency", 5),
+            ("pickup_dropoff_time", -1),
+            ("minimum_rest_stop", -0.5),
+            ("minimum_rest_stop", 12),
+        ):
+            response = client.patch(
+                f"/api/configurations/{configuration.id}/",
+                {field: value},
+                format="json",
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(field, response.data)
+
+        response = client.patch(
+            f"/api/configurations/{configuration.id}/",
+            {"fuel_stop_frequency": 250},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from trucker_logbook.ratelimit import (
+    BATCH,
+    UpstreamThrottled,
+    acquire,
+    upstream_priority,
+)
+
+# One token, refilled so slowly that no test ever sees it come back.
+SLOW = {"rate": 0.001, "burst": 1, "max_queue": 2}
+
+
+@override_settings(
+    UPSTREAM_RATE_LIMIT_BACKEND="cache",
+    UPSTREAM_RATE_LIMITS={"nominatim": SLOW, "osrm": SLOW},
+)
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_interactive_callers_fail_fast_past_their_deadline(self):
+        acquire("nominatim")
+        with self.assertRaises(UpstreamThrottled):
+            acquire("nominatim", timeout=0.1)
+
+    def test_batch_callers_only_take_available_tokens(self):
+        with upstream_priority(BATCH):
+            acquire("nominatim", timeout=0.1)
+            with self.assertRaises(UpstreamThrottled):
+                acquire("nominatim", timeout=0.1)
+
+    def test_batch_callers_leave_tokens_reserved_by_interactive_ones(self):
+        acquire("nominatim")
+        with upstream_priority(BATCH), self.assertRaises(UpstreamThrottled):
+            acquire("nominatim", timeout=0.05)
+
+    def test_buckets_are_per_upstream(self):
+        acquire("nominatim")
+        acquire("osrm")
+
+    def test_city_matrix_build_reports_throttling(self):
+        acquire("osrm")
+        with self.assertRaisesMessage(CommandError, "rate limited"):
+            call_command("build_city_matrix", source="osrm", timeout=0.05)
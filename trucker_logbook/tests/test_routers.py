@@ -0,0 +1,98 @@
+import datetime
+from unittest import mock
+
+from django.db import connections
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from spotter_ai_trucker_logbook import routers
+from trucker_logbook.models import Trip
+
+# The rate limiter's second connection to the primary is a test mirror of
+# "default", set up like the replicas of DATABASE_REPLICA_URLS.
+REPLICA = "ratelimit"
+
+
+# Mirrors only see committed rows, hence a TransactionTestCase.
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaRoutingTests(TransactionTestCase):
+    databases = {"default", REPLICA}
+
+    def setUp(self):
+        routers._replica_lag.clear()
+        self.trip = Trip.objects.create(
+            start_location="Dallas, TX",
+            pickup_location="Austin, TX",
+            dropoff_location="Houston, TX",
+            start_date=datetime.date(2025, 1, 6),
+        )
+
+    def handle(self, method, view):
+        """
+        Runs ``view`` as a request through the routing middleware and returns
+        the SQL it ran on the primary and on the replica.
+        """
+        middleware = routers.ReplicaRoutingMiddleware(lambda request: view())
+        request = getattr(RequestFactory(), method.lower())("/")
+        with CaptureQueriesContext(connections["default"]) as primary:
+            with CaptureQueriesContext(connections[REPLICA]) as replica:
+                middleware(request)
+        return (
+            [query["sql"] for query in primary.captured_queries],
+            [query["sql"] for query in replica.captured_queries],
+        )
+
+    def read(self):
+        return list(Trip.objects.filter(id=self.trip.id))
+
+    def test_safe_requests_read_from_the_replica(self):
+        client = APIClient()
+        with CaptureQueriesContext(connections["default"]) as primary:
+            with CaptureQueriesContext(connections[REPLICA]) as replica:
+                response = client.get(f"/api/trips/{self.trip.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["id"], self.trip.id)
+        self.assertEqual(len(primary), 0)
+        self.assertGreater(len(replica), 0)
+
+    def test_the_replica_is_chosen_once_per_request(self):
+        with mock.patch.object(
+            routers, "choose_replica", wraps=routers.choose_replica
+        ) as choose:
+            primary, replica = self.handle(
+                "GET", lambda: [self.read() for _ in range(3)]
+            )
+        self.assertEqual(choose.call_count, 1)
+        self.assertEqual((len(primary), len(replica)), (0, 3))
+
+    def test_a_write_pins_the_rest_of_the_request_to_the_primary(self):
+        def view():
+            self.read()
+            Trip.objects.filter(id=self.trip.id).update(current_cycle_hours=5)
+            self.read()
+
+        primary, replica = self.handle("GET", view)
+        self.assertEqual(len(replica), 1)
+        self.assertEqual(len(primary), 2)
+        self.assertTrue(primary[0].startswith("UPDATE"))
+        self.assertTrue(primary[1].startswith("SELECT"))
+
+    def test_unsafe_requests_use_the_primary(self):
+        for method in ("POST", "PUT", "PATCH", "DELETE"):
+            with self.subTest(method=method):
+                primary, replica = self.handle(method, self.read)
+                self.assertEqual((len(primary), len(replica)), (1, 0))
+
+    @override_settings(DATABASE_REPLICA_MAX_LAG=5)
+    def test_a_lagging_replica_falls_back_to_the_primary(self):
+        for lag in (60, float("inf")):
+            with self.subTest(lag=lag):
+                with mock.patch.object(routers, "replica_lag", return_value=lag):
+                    primary, replica = self.handle("GET", self.read)
+                self.assertEqual((len(primary), len(replica)), (1, 0))
+
+    def test_reads_outside_a_request_use_the_primary(self):
+        with CaptureQueriesContext(connections[REPLICA]) as replica:
+            self.read()
+        self.assertEqual(len(replica), 0)
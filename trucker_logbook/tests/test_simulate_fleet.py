@@ -0,0 +1,74 @@
+import datetime
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from trucker_logbook.management.commands.simulate_fleet import Command
+from trucker_logbook.models import Configuration, DailySummary, LogEntry, Trip
+from trucker_logbook.planner import plan_settings
+from trucker_logbook.simulation import simulate_trip_rows
+
+
+class SimulateFleetTests(TestCase):
+    def setUp(self):
+        self.trip = Trip.objects.create(
+            start_location="Dallas, TX",
+            pickup_location="Austin, TX",
+            dropoff_location="Houston, TX",
+            start_date=datetime.date(2025, 1, 6),
+        )
+
+    def simulate(self, seed=1):
+        trip = self.trip
+        task = (
+            trip.id,
+            trip.start_date,
+            trip.start_location,
+            trip.pickup_location,
+            trip.dropoff_location,
+            plan_settings(),
+            seed,
+        )
+        return simulate_trip_rows([task])
+
+    def test_write_shard_replaces_logs_and_marks_the_trip_generated(self):
+        LogEntry.objects.create(
+            trip=self.trip,
+            timestamp=datetime.datetime(2025, 1, 6, tzinfo=datetime.timezone.utc),
+            duty_status="OD",
+            location="Dallas, TX",
+        )
+        results = self.simulate()
+        Command(stdout=StringIO()).write_shard(results, batch_size=100)
+
+        rows = results[0][1]
+        self.assertEqual(LogEntry.objects.filter(trip=self.trip).count(), len(rows))
+        self.assertEqual(
+            DailySummary.objects.filter(trip=self.trip).count(), len(results[0][2])
+        )
+        self.trip.refresh_from_db()
+        self.assertIsNotNone(self.trip.logs_generated_at)
+
+    def test_trips_use_their_configuration(self):
+        Configuration.objects.create(
+            trip=self.trip, fuel_stop_frequency=100, pickup_dropoff_time=2
+        )
+        checkpoint = os.path.join(tempfile.mkdtemp(), "checkpoint")
+        call_command(
+            "simulate_fleet",
+            workers=1,
+            seed=1,
+            checkpoint=checkpoint,
+            stdout=StringIO(),
+        )
+        remarks = list(
+            LogEntry.objects.filter(trip=self.trip).values_list("remarks", flat=True)
+        )
+        self.assertIn("Fuel stop and 30-minute break", remarks)
+        self.assertFalse(os.path.exists(checkpoint))
+
+    def test_seeded_shards_are_reproducible(self):
+        self.assertEqual(self.simulate(seed=5), self.simulate(seed=5))
@@ -0,0 +1,63 @@
+import datetime
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from trucker_logbook.models import LogEntry, Trip
+from trucker_logbook.simulation import percentiles, simulate_scenario
+
+START_DATE = datetime.date(2025, 1, 6)
+
+
+class SimulationTests(TestCase):
+    def test_seeded_scenarios_are_reproducible(self):
+        scenario = (START_DATE, "Dallas, TX", "Austin, TX", "Houston, TX", None, 7)
+        self.assertEqual(simulate_scenario(scenario), simulate_scenario(scenario))
+
+    def test_percentiles_interpolate(self):
+        self.assertEqual(
+            percentiles([1, 2, 3, 4, 5], points=(0, 50, 75, 100)),
+            {"p0": 1, "p50": 3, "p75": 4, "p100": 5},
+        )
+
+
+class SeedValidationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.trip = Trip.objects.create(
+            start_location="Dallas, TX",
+            pickup_location="Austin, TX",
+            dropoff_location="Houston, TX",
+            start_date=START_DATE,
+        )
+
+    def test_generate_logs_rejects_a_non_integer_seed(self):
+        for seed in ([1], "abc", {"a": 1}):
+            response = self.client.post(
+                f"/api/trips/{self.trip.id}/generate_logs/",
+                {"seed": seed},
+                format="json",
+            )
+            self.assertEqual(response.status_code, 400, seed)
+        self.assertFalse(LogEntry.objects.filter(trip=self.trip).exists())
+
+    def test_generate_logs_is_reproducible_with_a_seed(self):
+        def generate():
+            self.client.post(
+                f"/api/trips/{self.trip.id}/generate_logs/",
+                {"seed": "3"},
+                format="json",
+            )
+            return list(
+                LogEntry.objects.filter(trip=self.trip)
+                .order_by("timestamp")
+                .values_list("timestamp", "duty_status", "remarks")
+            )
+
+        self.assertEqual(generate(), generate())
+
+    def test_simulate_rejects_a_non_integer_seed(self):
+        response = self.client.post(
+            f"/api/trips/{self.trip.id}/simulate/", {"seed": [1]}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,119 @@
+import datetime
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from trucker_logbook.models import DailySummary, Driver, LogEntry, Trip
+from trucker_logbook.sync import (
+    InvalidCursor,
+    changes_since,
+    decode_cursor,
+    encode_cursor,
+)
+
+START = datetime.datetime(2025, 1, 6, tzinfo=datetime.timezone.utc)
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class SyncTests(TestCase):
+    def setUp(self):
+        self.driver = Driver.objects.create(name="Ann")
+        self.trip = Trip.objects.create(
+            start_location="Dallas, TX",
+            pickup_location="Austin, TX",
+            dropoff_location="Houston, TX",
+            start_date=START.date(),
+            driver=self.driver,
+        )
+        self.entries = [
+            LogEntry.objects.create(
+                trip=self.trip,
+                timestamp=START + datetime.timedelta(hours=hours),
+                duty_status="DR",
+                location="En Route",
+            )
+            for hours in range(5)
+        ]
+        self.summary = DailySummary.objects.create(
+            trip=self.trip, date=START.date(), total_lines_3_4=11
+        )
+
+    def sync(self, **params):
+        return APIClient().get("/api/sync/", params)
+
+    def pull(self, cursor=None, limit=500):
+        return changes_since([self.trip.id], cursor=cursor, limit=limit)
+
+    def test_cursor_round_trip(self):
+        updated_at = datetime.datetime(
+            2025, 1, 6, 12, 0, 0, 123456, tzinfo=datetime.timezone.utc
+        )
+        self.assertEqual(
+            decode_cursor(encode_cursor(updated_at, 1, 42)), (updated_at, 1, 42)
+        )
+        for cursor in ("", "bm9wZQ==", "not base64!"):
+            with self.assertRaises(InvalidCursor):
+                decode_cursor(cursor)
+
+    def test_pages_cover_every_row_once(self):
+        seen = []
+        cursor, has_more = None, True
+        while has_more:
+            changes, cursor, has_more = self.pull(cursor, limit=2)
+            self.assertLessEqual(len(changes), 2)
+            seen += [(change["type"], change["id"]) for change in changes]
+
+        expected = [("log_entry", entry.id) for entry in self.entries]
+        expected.append(("daily_summary", self.summary.id))
+        self.assertCountEqual(seen, expected)
+        self.assertEqual(len(seen), len(set(seen)))
+        # Nothing changed since, so the cursor stays put.
+        self.assertEqual(self.pull(cursor), ([], cursor, False))
+
+    def test_changes_and_tombstones_after_the_cursor(self):
+        _, cursor, _ = self.pull()
+        LogEntry.objects.filter(id=self.entries[0].id).soft_delete()
+        self.entries[1].remarks = "Detour"
+        self.entries[1].save()
+
+        changes, cursor, _ = self.pull(cursor)
+        self.assertEqual({change["type"] for change in changes}, {"log_entry"})
+        by_id = {change["id"]: change for change in changes}
+        self.assertEqual(set(by_id), {self.entries[0].id, self.entries[1].id})
+        self.assertTrue(by_id[self.entries[0].id]["deleted"])
+        self.assertIsNone(by_id[self.entries[0].id]["data"])
+        self.assertEqual(by_id[self.entries[1].id]["data"]["remarks"], "Detour")
+
+        # A full resync leaves the tombstone out.
+        changes, _, _ = self.pull()
+        self.assertNotIn(
+            ("log_entry", self.entries[0].id),
+            [(change["type"], change["id"]) for change in changes],
+        )
+
+    @override_settings(SYNC_SETTLE_SECONDS=60)
+    def test_recent_rows_are_held_back(self):
+        self.assertEqual(self.pull(), ([], None, False))
+
+    def test_endpoint(self):
+        response = self.sync(driver=self.driver.id, limit=4)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["changes"]), 4)
+        self.assertTrue(response.data["has_more"])
+
+        response = self.sync(trips=str(self.trip.id), cursor=response.data["cursor"])
+        self.assertEqual(len(response.data["changes"]), 2)
+        self.assertFalse(response.data["has_more"])
+
+    def test_endpoint_errors(self):
+        self.assertEqual(self.sync().status_code, 400)
+        self.assertEqual(self.sync(trips="1,x").status_code, 400)
+        self.assertEqual(
+            self.sync(trips=self.trip.id, cursor="garbage").status_code, 400
+        )
+
+        expired = encode_cursor(timezone.now() - datetime.timedelta(days=31), 0, 1)
+        response = self.sync(trips=self.trip.id, cursor=expired)
+        self.assertEqual(response.status_code, 410)
+        self.assertTrue(response.data["reset"])
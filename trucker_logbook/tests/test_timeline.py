@@ -0,0 +1,77 @@
+import datetime
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from trucker_logbook.models import LogEntry, Trip
+from trucker_logbook.serialisers import LogEntrySerializer
+from trucker_logbook.timeline import (
+    CONTENT_TYPE,
+    decode_timeline,
+    encode_timeline,
+    get_timeline,
+)
+
+
+class TimelineTests(TestCase):
+    def setUp(self):
+        self.trip = Trip.objects.create(
+            start_location="Dallas, TX",
+            pickup_location="Austin, TX",
+            dropoff_location="Houston, TX",
+            start_date=datetime.date(2025, 1, 6),
+        )
+        start = datetime.datetime(2025, 1, 6, 6, 30, 15, tzinfo=datetime.timezone.utc)
+        self.entries = [
+            LogEntry.objects.create(
+                trip=self.trip,
+                timestamp=start + datetime.timedelta(hours=hours),
+                duty_status=duty_status,
+                location=location,
+                remarks=remarks,
+                latitude=latitude,
+                longitude=longitude,
+            )
+            for hours, duty_status, location, remarks, latitude, longitude in (
+                (0, "OD", "Dallas, TX", "Start of day", 32.7767, -96.797),
+                (1, "DR", "En Route", "Driving", 32.7767, -96.797),
+                (4, "SB", "Waco, TX — rest área", None, None, None),
+                (
+                    12,
+                    "ON",
+                    "Austin, TX",
+                    "Loading/Unloading Freight",
+                    30.2672,
+                    -97.7431,
+                ),
+            )
+        ]
+
+    def test_round_trip_matches_the_serializer(self):
+        self.assertEqual(
+            decode_timeline(encode_timeline(self.entries)),
+            LogEntrySerializer(self.entries, many=True).data,
+        )
+
+    def test_empty_timeline(self):
+        self.assertEqual(decode_timeline(encode_timeline([])), [])
+
+    def test_rejects_other_data(self):
+        with self.assertRaises(ValueError):
+            decode_timeline(b"JSON\x00\x00\x00\x00")
+
+    def test_snapshot_is_rebuilt_when_an_entry_changes(self):
+        get_timeline(self.trip.id)
+        client = APIClient()
+        client.patch(
+            f"/api/logs/{self.entries[1].id}/", {"remarks": "Detour"}, format="json"
+        )
+        decoded = decode_timeline(get_timeline(self.trip.id))
+        self.assertEqual(decoded[1]["remarks"], "Detour")
+
+    def test_endpoint_serves_the_packed_format(self):
+        response = APIClient().get(
+            f"/api/trips/{self.trip.id}/timeline/", HTTP_ACCEPT=CONTENT_TYPE
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(decode_timeline(response.content)), 4)
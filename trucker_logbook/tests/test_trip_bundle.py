@@ -0,0 +1,84 @@
+import datetime
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from trucker_logbook.models import Driver, LogEntry, Trip
+
+TRIP = {
+    "start_location": "Dallas, TX",
+    "pickup_location": "Austin, TX",
+    "dropoff_location": "Houston, TX",
+    "start_date": "2025-01-06",
+}
+
+
+class TripBundleTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def bundle(self):
+        return self.client.post("/api/trips/bundle/", TRIP, format="json")
+
+    def test_creates_and_generates_a_new_trip(self):
+        response = self.bundle()
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(response.data["created"])
+        self.assertTrue(response.data["generated"])
+        self.assertTrue(response.data["trip"]["log_entries"])
+        self.assertTrue(response.data["daily_summaries"])
+
+    def test_returns_an_existing_trip_as_is(self):
+        first = self.bundle()
+        second = self.bundle()
+        self.assertEqual(second.status_code, 200)
+        self.assertFalse(second.data["created"])
+        self.assertFalse(second.data["generated"])
+        self.assertEqual(second.data["trip"]["id"], first.data["trip"]["id"])
+        self.assertEqual(
+            second.data["trip"]["log_entries"], first.data["trip"]["log_entries"]
+        )
+        self.assertEqual(Trip.objects.count(), 1)
+
+    def test_keeps_logs_that_were_not_generated(self):
+        # E.g. imported from an ELD export, logs_generated_at stays unset.
+        trip = Trip.objects.create(**{**TRIP, "start_date": datetime.date(2025, 1, 6)})
+        entry = LogEntry.objects.create(
+            trip=trip,
+            timestamp=datetime.datetime(2025, 1, 6, 8, tzinfo=datetime.timezone.utc),
+            duty_status="DR",
+            location="Boston MA",
+        )
+        response = self.bundle()
+        self.assertFalse(response.data["generated"])
+        self.assertEqual(
+            [e["id"] for e in response.data["trip"]["log_entries"]], [entry.id]
+        )
+
+    def test_existing_trip_takes_four_queries(self):
+        self.bundle()
+        with CaptureQueriesContext(connection) as queries:
+            self.bundle()
+        self.assertEqual(len([q for q in queries if "SAVEPOINT" not in q["sql"]]), 4)
+
+    def test_duplicate_routes_are_allowed(self):
+        first = self.bundle()
+        response = self.client.post("/api/trips/", TRIP, format="json")
+        self.assertEqual(response.status_code, 201)
+        # The bundle keeps finding the first trip.
+        self.assertEqual(self.bundle().data["trip"]["id"], first.data["trip"]["id"])
+
+    def test_each_driver_gets_their_own_trip(self):
+        ann = Driver.objects.create(name="Ann")
+        bob = Driver.objects.create(name="Bob")
+        trips = [
+            self.client.post(
+                "/api/trips/bundle/", {**TRIP, "driver": driver.id}, format="json"
+            ).data["trip"]
+            for driver in (ann, bob, ann)
+        ]
+        self.assertEqual([trip["driver"] for trip in trips], [ann.id, bob.id, ann.id])
+        self.assertNotEqual(trips[0]["id"], trips[1]["id"])
+        self.assertEqual(trips[0]["id"], trips[2]["id"])
@@ -0,0 +1,175 @@
+import struct
+import sys
+from array import array
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from .archive import get_log_entries
+from .models import Trip, TripTimeline
+
+# Packed, column-oriented snapshot of a trip's log entries:
+#
+#   header        magic "TLN1", uint32 entry count
+#   id            int64[count]
+#   timestamp     int64[count]   microseconds since the epoch (UTC)
+#   duty_status   uint8[count]   index into STATUS_CODES
+#   latitude      float32[count] NaN when missing
+#   longitude     float32[count] NaN when missing
+#   location      uint32[count]  index into the location dictionary
+#   remarks       uint32[count]  index into the remarks dictionary, NO_VALUE when missing
+#   dictionaries  location then remarks, each as uint32 size, uint32[size]
+#                 byte lengths and the concatenated UTF-8 strings
+#
+# Everything is little-endian.
+CONTENT_TYPE = "application/vnd.spotter.timeline"
+MAGIC = b"TLN1"
+HEADER = struct.Struct("<4sI")
+STATUS_CODES = ("OD", "SB", "DR", "ON")
+NO_VALUE = 0xFFFFFFFF
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _to_bytes(values):
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_bytes(typecode, data, offset, count):
+    values = array(typecode)
+    end = offset + values.itemsize * count
+    values.frombytes(data[offset:end])
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values, end
+
+
+def _encode_strings(strings):
+    encoded = [string.encode() for string in strings]
+    lengths = array("I", (len(string) for string in encoded))
+    return struct.pack("<I", len(encoded)) + _to_bytes(lengths) + b"".join(encoded)
+
+
+def _decode_strings(data, offset):
+    (count,) = struct.unpack_from("<I", data, offset)
+    lengths, offset = _from_bytes("I", data, offset + 4, count)
+    strings = []
+    for length in lengths:
+        strings.append(bytes(data[offset : offset + length]).decode())
+        offset += length
+    return strings, offset
+
+
+def encode_timeline(log_entries):
+    """
+    Packs log entries, ordered by timestamp, into a timeline snapshot.
+    """
+    ids = array("q")
+    timestamps = array("q")
+    statuses = array("B")
+    latitudes = array("f")
+    longitudes = array("f")
+    locations = array("I")
+    remarks = array("I")
+    location_index = {}
+    remarks_index = {}
+
+    for entry in log_entries:
+        ids.append(entry.id)
+        timestamps.append((entry.timestamp - EPOCH) // timedelta(microseconds=1))
+        statuses.append(STATUS_CODES.index(entry.duty_status))
+        latitudes.append(float("nan") if entry.latitude is None else entry.latitude)
+        longitudes.append(float("nan") if entry.longitude is None else entry.longitude)
+        locations.append(location_index.setdefault(entry.location, len(location_index)))
+        if entry.remarks is None:
+            remarks.append(NO_VALUE)
+        else:
+            remarks.append(remarks_index.setdefault(entry.remarks, len(remarks_index)))
+
+    return b"".join(
+        [
+            HEADER.pack(MAGIC, len(ids)),
+            *(
+                _to_bytes(column)
+                for column in (
+                    ids,
+                    timestamps,
+                    statuses,
+                    latitudes,
+                    longitudes,
+                    locations,
+                    remarks,
+                )
+            ),
+            _encode_strings(location_index),
+            _encode_strings(remarks_index),
+        ]
+    )
+
+
+def decode_timeline(data):
+    """
+    Unpacks a timeline snapshot into the same list of dicts LogEntrySerializer
+    produces for the trip's log entries.
+    """
+    data = memoryview(data)
+    magic, count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a trip timeline snapshot")
+
+    offset = HEADER.size
+    ids, offset = _from_bytes("q", data, offset, count)
+    timestamps, offset = _from_bytes("q", data, offset, count)
+    statuses, offset = _from_bytes("B", data, offset, count)
+    latitudes, offset = _from_bytes("f", data, offset, count)
+    longitudes, offset = _from_bytes("f", data, offset, count)
+    locations, offset = _from_bytes("I", data, offset, count)
+    remarks, offset = _from_bytes("I", data, offset, count)
+    location_strings, offset = _decode_strings(data, offset)
+    remarks_strings, offset = _decode_strings(data, offset)
+
+    def coordinate(value):
+        # float32 keeps about 7 significant digits, don't print more.
+        return None if value != value else float(f"{value:.7g}")
+
+    return [
+        {
+            "id": ids[i],
+            "timestamp": (EPOCH + timedelta(microseconds=timestamps[i])).strftime(
+                "%Y-%m-%d | %H:%M:%S"
+            ),
+            "duty_status": STATUS_CODES[statuses[i]],
+            "location": location_strings[locations[i]],
+            "remarks": None if remarks[i] == NO_VALUE else remarks_strings[remarks[i]],
+            "latitude": coordinate(latitudes[i]),
+            "longitude": coordinate(longitudes[i]),
+        }
+        for i in range(count)
+    ]
+
+
+def build_timeline(trip):
+    """
+    Rebuilds and stores the timeline snapshot of a trip.  Returns its bytes.
+    """
+    log_entries = list(get_log_entries(trip))
+    data = encode_timeline(log_entries)
+    TripTimeline.objects.update_or_create(
+        trip=trip, defaults={"data": data, "entry_count": len(log_entries)}
+    )
+    return data
+
+
+def get_timeline(trip_id):
+    """
+    Returns the timeline snapshot of a trip, building it on first use.  A trip
+    that already has a snapshot costs a single row fetch.
+    """
+    data = (
+        TripTimeline.objects.filter(trip_id=trip_id)
+        .values_list("data", flat=True)
+        .first()
+    )
+    if data is None:
+        data = build_timeline(Trip.objects.get(id=trip_id))
+    return bytes(data)
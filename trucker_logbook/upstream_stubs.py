@@ -0,0 +1,156 @@
+"""
+Local stand-ins for the Nominatim search and OSRM route/table APIs, so the
+app can be load tested without touching the public services.  Answers are
+plausible rather than real: known cities resolve to their coordinates, other
+queries to a stable point in the continental US, and routes follow the great
+circle at a typical road detour and speed.  Every response can be delayed and
+made to fail at a configurable rate.
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from .citymatrix import CITY_COORDINATES
+from .geo import haversine_km
+
+ROAD_FACTOR = 1.25
+AVERAGE_KMH = 88.5  # 55 mph
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+        super().__init__(address, StubHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        delay = server.rng.gauss(server.latency, server.jitter)
+        time.sleep(max(0.0, delay))
+        if server.rng.random() < server.error_rate:
+            return self.send_json(503, {"error": "Injected failure"})
+
+        url = urlparse(self.path)
+        if url.path == "/search":
+            query = parse_qs(url.query).get("q", [""])[0]
+            return self.send_json(200, search(query))
+        for service in ("route", "table"):
+            prefix = f"/{service}/v1/driving/"
+            if url.path.startswith(prefix):
+                try:
+                    points = [
+                        tuple(float(value) for value in point.split(","))
+                        for point in url.path[len(prefix) :].split(";")
+                    ]
+                except ValueError:
+                    return self.send_json(400, {"code": "InvalidUrl"})
+                handler = route if service == "route" else table
+                return self.send_json(200, handler(points))
+        return self.send_json(404, {"error": "Not found"})
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # Keep the load test output readable
+
+
+def search(query):
+    """
+    Nominatim search results for a query.
+    """
+    if query in CITY_COORDINATES:
+        latitude, longitude = CITY_COORDINATES[query]
+    else:
+        # A stable point somewhere in the continental US.
+        digest = hashlib.sha256(query.encode()).digest()
+        latitude = 30 + digest[0] / 255 * 15
+        longitude = -120 + digest[1] / 255 * 45
+    return [{"lat": str(latitude), "lon": str(longitude), "display_name": query}]
+
+
+def _leg(origin, destination):
+    # OSRM coordinates are longitude,latitude.
+    (kilometers,) = haversine_km(
+        origin[1], origin[0], [destination[1]], [destination[0]]
+    )
+    meters = kilometers * 1000 * ROAD_FACTOR
+    return meters, meters / 1000 / AVERAGE_KMH * 3600
+
+
+def route(points):
+    """
+    OSRM route response through ``points`` ((lon, lat) pairs).
+    """
+    legs = []
+    for origin, destination in zip(points, points[1:]):
+        distance, duration = _leg(origin, destination)
+        legs.append(
+            {
+                "distance": distance,
+                "duration": duration,
+                "weight": duration,
+                "summary": "",
+                "steps": [],
+            }
+        )
+    distance = sum(leg["distance"] for leg in legs)
+    duration = sum(leg["duration"] for leg in legs)
+    return {
+        "code": "Ok",
+        "routes": [
+            {
+                "distance": distance,
+                "duration": duration,
+                "weight": duration,
+                "weight_name": "routability",
+                "legs": legs,
+            }
+        ],
+        "waypoints": [{"location": list(point), "name": ""} for point in points],
+    }
+
+
+def table(points):
+    """
+    OSRM table response between every pair of ``points`` ((lon, lat) pairs).
+    """
+    legs = [[_leg(origin, destination) for destination in points] for origin in points]
+    return {
+        "code": "Ok",
+        "distances": [[distance for distance, _ in row] for row in legs],
+        "durations": [[duration for _, duration in row] for row in legs],
+    }
+
+
+def start_stub_server(host="127.0.0.1", port=0, **options):
+    """
+    Starts a stub server on a background thread and returns it.  ``options``
+    are the latency, jitter (both in seconds), error_rate and seed.
+    """
+    server = StubServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -13,14 +13,22 @@ urlpatterns = [
         views.LogEntryListCreateView.as_view(),
         name="logentry-list-create",
     ),
+    path("trips/<int:trip_id>/timeline/", views.trip_timeline, name="trip-timeline"),
     path(
         "logs/<int:pk>/",
         views.LogEntryRetrieveUpdateDestroyView.as_view(),
         name="logentry-retrieve-update-destroy",
     ),
+    path("logs/import/", views.import_logs, name="import-logs"),
     path(
         "trips/<int:trip_id>/generate_logs/", views.generate_logs, name="generate-logs"
     ),  # Custom endpoint
+    path(
+        "trips/<int:trip_id>/generate_logs/stream/",
+        views.generate_logs_stream,
+        name="generate-logs-stream",
+    ),
+    path("trips/<int:trip_id>/simulate/", views.simulate_trip, name="simulate-trip"),
     path(
         "trips/<int:trip_id>/configurations/",
         views.ConfigurationListCreateView.as_view(),
@@ -34,6 +42,7 @@ urlpatterns = [
     path(
         "trips/check_existing/", views.check_existing_trip, name="check-existing-trip"
     ),  # New endpoint
+    path("trips/bundle/", views.trip_bundle, name="trip-bundle"),
     path(
         "trips/<int:trip_id>/daily_summary/",
         views.DailySummaryListView.as_view(),
@@ -44,5 +53,23 @@ urlpatterns = [
         views.DailySummaryDetailView.as_view(),
         name="daily-summary-detail",
     ),  # New endpoint
+    path("drivers/", views.DriverListCreateView.as_view(), name="driver-list-create"),
+    path(
+        "drivers/available_hours/",
+        views.drivers_available_hours,
+        name="drivers-available-hours",
+    ),
+    path(
+        "drivers/<int:pk>/",
+        views.DriverRetrieveUpdateDestroyView.as_view(),
+        name="driver-retrieve-update-destroy",
+    ),
+    path(
+        "locations/autocomplete/",
+        views.autocomplete_locations,
+        name="autocomplete-locations",
+    ),
+    path("sync/", views.sync_changes, name="sync-changes"),
+    path("stops/search/", views.search_stops, name="search-stops"),
     path("get-osrm-route/", views.get_osrm_route, name="get_osrm_route"),
 ]
@@ -1,23 +1,55 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, renderer_classes
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+from rest_framework.exceptions import ValidationError
 from .models import (
     Trip,
     LogEntry,
     DailySummary,
     Configuration,
+    IdempotencyKey,
+    LogArchive,
+    Driver,
 )
 from .serialisers import (
     TripSerializer,
     LogEntrySerializer,
     DailySummarySerializer,
     ConfigurationSerializer,
+    DriverSerializer,
 )
 from django.shortcuts import get_object_or_404
-from datetime import timedelta
-from .helper import generate_dummy_logs, delete_all_data
+from .helper import generate_dummy_logs, calculate_daily_summary, delete_all_data
+from .archive import get_archived_log_entry, get_log_entries
+from .autocomplete import get_location_index
+from .dutycycle import hours_available, hours_used, rebuild_duty_cycle
+from .eld_import import FORMATS, detect_format, import_log_entries
+from .geo import (
+    covering_prefixes,
+    haversine_km,
+    longitude_ranges,
+    radius_bounding_box,
+)
+from .planner import TripTooLong
+from .ratelimit import UpstreamThrottled, acquire
+from .renderers import ColumnarJSONRenderer, MessagePackRenderer, TimelineRenderer
+from .simulation import run_monte_carlo
+from .sync import CursorExpired, InvalidCursor, changes_since
+from .timeline import build_timeline, decode_timeline, get_timeline
+import asyncio
+import hashlib
+import json
+import random
 import requests
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Prefetch, Q, prefetch_related_objects
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
 
 delete_all_data()
 
@@ -41,6 +73,76 @@ class TripRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Trip.objects.all()
     serializer_class = TripSerializer
 
+    def perform_update(self, serializer):
+        previous_driver_id = serializer.instance.driver_id
+        trip = serializer.save()
+        if trip.driver_id != previous_driver_id:
+            # The trip's hours move from one driver's cycle to the other's.
+            for driver_id in (previous_driver_id, trip.driver_id):
+                if driver_id:
+                    rebuild_duty_cycle(driver_id)
+
+    def perform_destroy(self, instance):
+        driver_id = instance.driver_id
+        instance.delete()
+        if driver_id:
+            rebuild_duty_cycle(driver_id)
+
+
+class DriverListCreateView(generics.ListCreateAPIView):
+    """
+    API endpoint to list all drivers or create a new driver.
+    """
+
+    queryset = Driver.objects.all()
+    serializer_class = DriverSerializer
+
+
+class DriverRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+    """
+    API endpoint to retrieve, update, or delete a specific driver.
+    """
+
+    queryset = Driver.objects.all()
+    serializer_class = DriverSerializer
+
+
+@api_view(["GET"])
+def drivers_available_hours(request):
+    """
+    API endpoint returning the hours used and available in the current
+    70-hour/8-day cycle of many drivers at once.
+    Expects an optional comma-separated "ids" query parameter, all drivers
+    are returned without it.  Each driver costs a constant-time lookup of its
+    ring buffer, with a single query for all of them.
+    """
+    drivers = Driver.objects.only(
+        "id", "name", "cycle_hours", "cycle_anchor", "cycle_total"
+    ).order_by("id")
+    ids = request.query_params.get("ids")
+    if ids:
+        try:
+            drivers = drivers.filter(id__in=[int(i) for i in ids.split(",")])
+        except ValueError:
+            return Response(
+                {"error": "ids must be comma-separated integers"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+    today = timezone.localdate()
+    return Response(
+        [
+            {
+                "id": driver.id,
+                "name": driver.name,
+                "cycle_hours_used": hours_used(driver, today),
+                "hours_available": hours_available(driver, today),
+            }
+            for driver in drivers
+        ],
+        status=status.HTTP_200_OK,
+    )
+
 
 class LogEntryListCreateView(generics.ListCreateAPIView):
     """
@@ -51,12 +153,19 @@ class LogEntryListCreateView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         trip_id = self.kwargs.get("trip_id")
-        return LogEntry.objects.filter(trip_id=trip_id).order_by("timestamp")
+        trip = Trip.objects.filter(id=trip_id).first()
+        if trip is None:
+            return LogEntry.objects.none()
+        # Archived trips are read back from their compressed archive.
+        return get_log_entries(trip)
 
     def perform_create(self, serializer):
         trip_id = self.kwargs.get("trip_id")
         trip = get_object_or_404(Trip, id=trip_id)
+        if trip.archived_at:
+            raise ValidationError({"error": "This trip's logs are archived"})
         serializer.save(trip=trip)
+        build_timeline(trip)
 
 
 class LogEntryRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
@@ -67,6 +176,32 @@ class LogEntryRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     queryset = LogEntry.objects.all()
     serializer_class = LogEntrySerializer
 
+    def get_object(self):
+        """
+        Falls back to the archives, like the list endpoint.  Archived entries
+        can be read but not changed.
+        """
+        try:
+            return super().get_object()
+        except Http404:
+            entry = get_archived_log_entry(self.kwargs["pk"])
+            if entry is None:
+                raise
+            if self.request.method not in ("GET", "HEAD", "OPTIONS"):
+                raise ValidationError({"error": "This trip's logs are archived"})
+            return entry
+
+    def perform_update(self, serializer):
+        log_entry = serializer.save()
+        build_timeline(log_entry.trip)
+
+    def perform_destroy(self, instance):
+        trip = instance.trip
+        # Leave a tombstone for delta sync clients.
+        instance.deleted_at = timezone.now()
+        instance.save(update_fields=["deleted_at", "updated_at"])
+        build_timeline(trip)
+
 
 class DailySummaryListView(generics.ListAPIView):
     serializer_class = DailySummarySerializer
@@ -128,16 +263,182 @@ def check_existing_trip(request):
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def lock_trip_lookup(lookup):
+    """
+    Serialises the trip bundles looking up the same trip until the end of the
+    transaction, with a PostgreSQL advisory lock keyed on the lookup.  SQLite
+    needs none, it lets one write transaction through at a time.
+    """
+    if connection.vendor != "postgresql":
+        return
+    key = json.dumps(lookup, sort_keys=True, cls=DjangoJSONEncoder).encode()
+    lock_id = int.from_bytes(
+        hashlib.blake2b(key, digest_size=8).digest(), "big", signed=True
+    )
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [lock_id])
+
+
+def find_trip(lookup):
+    return Trip.objects.filter(**lookup).order_by("id").first()
+
+
+def has_logs(trip):
+    """
+    Whether a trip has log entries, however they were written: generated,
+    imported, simulated or archived.
+    """
+    return bool(trip.archived_at) or LogEntry.objects.filter(trip=trip).exists()
+
+
+@api_view(["POST"])
+def trip_bundle(request):
+    """
+    API endpoint that finds or creates a trip, generates its logs if it has
+    none yet, and returns the trip with its ordered log entries and all of its
+    daily summaries in a single response.
+
+    Replaces the check_existing -> create -> generate_logs -> logs ->
+    daily_summary sequence.  An existing trip with logs is returned with four
+    queries: the lookup, the log check, its log entries and its summaries.
+    """
+    serializer = TripSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    lookup = {
+        field: serializer.validated_data[field]
+        for field in (
+            "start_location",
+            "pickup_location",
+            "dropoff_location",
+            "start_date",
+        )
+    }
+    # Drivers may run the same route on the same day, each has their own trip.
+    driver = serializer.validated_data.get("driver")
+    lookup["driver_id"] = driver.pk if driver else None
+
+    try:
+        with transaction.atomic():
+            trip = find_trip(lookup)
+            created = False
+            if trip is None:
+                # Take the lookup lock and look again, a concurrent bundle may
+                # have created the trip in the meantime.
+                lock_trip_lookup(lookup)
+                trip = find_trip(lookup)
+                if trip is None:
+                    trip = Trip.objects.create(
+                        **lookup,
+                        current_cycle_hours=serializer.validated_data.get(
+                            "current_cycle_hours", 0
+                        ),
+                    )
+                    created = True
+
+            generated = False
+            if not has_logs(trip):
+                # Take the generation lock and re-check, another request may
+                # have generated the logs while we were looking the trip up.
+                trip = Trip.objects.select_for_update().get(pk=trip.pk)
+                if not has_logs(trip):
+                    generate_trip_logs(trip)
+                    generated = True
+    except TripTooLong as e:
+        # Rolled back along with a trip created for it.
+        return Response({"error": str(e)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    prefetch_related_objects(
+        [trip],
+        Prefetch("log_entries", queryset=LogEntry.objects.order_by("timestamp")),
+    )
+    daily_summaries = DailySummary.objects.filter(trip=trip).order_by("date")
+    return Response(
+        {
+            "created": created,
+            "generated": generated,
+            "trip": TripSerializer(trip).data,
+            "daily_summaries": DailySummarySerializer(daily_summaries, many=True).data,
+        },
+        status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+    )
+
+
+def parse_seed(value):
+    """
+    Returns a request's optional simulation seed as an int, or None.  Raises
+    ValueError for anything else.
+    """
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError("seed must be an integer")
+
+
 # Custom Log Generation Endpoint
 @api_view(["POST"])
 def generate_logs(request, trip_id):
     """
     API endpoint to generate daily logs for a given trip.
     This is where the core logic for simulating the driver's journey resides.
+
+    Generation runs in a transaction holding a row lock on the trip, so
+    concurrent calls for the same trip never interleave their writes.  A
+    request that had to wait for another generation of the same trip shares
+    that result instead of recomputing it, and a retry carrying the same
+    ``Idempotency-Key`` header gets the stored response back.
     """
-    trip = get_object_or_404(Trip, id=trip_id)
-    # Clear any existing logs.
-    LogEntry.objects.filter(trip=trip).delete()
+    idempotency_key = request.headers.get("Idempotency-Key")
+    requested_at = timezone.now()
+    try:
+        seed = parse_seed(request.data.get("seed"))
+    except ValueError:
+        return Response(
+            {"error": "seed must be an integer"}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        with transaction.atomic():
+            trip = get_object_or_404(Trip.objects.select_for_update(), id=trip_id)
+
+            if idempotency_key:
+                previous = IdempotencyKey.objects.filter(
+                    trip=trip, key=idempotency_key
+                ).first()
+                if previous:
+                    return Response(
+                        previous.response_body, status=previous.response_status
+                    )
+
+            # Logs generated after we arrived were produced by a concurrent
+            # duplicate that held the lock while we waited.
+            if not (trip.logs_generated_at and trip.logs_generated_at >= requested_at):
+                generate_trip_logs(trip, seed=seed)
+
+            body = {"status": "Logs generated successfully"}
+            if idempotency_key:
+                IdempotencyKey.objects.create(
+                    trip=trip,
+                    key=idempotency_key,
+                    response_status=status.HTTP_201_CREATED,
+                    response_body=body,
+                )
+    except TripTooLong as e:
+        # The transaction rolled back, the trip keeps its previous logs.
+        return Response({"error": str(e)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    return Response(body, status=status.HTTP_201_CREATED)
+
+
+def generate_trip_logs(trip, seed=None, on_progress=None):
+    """
+    Replaces a trip's log entries with freshly generated ones and recalculates
+    its daily summaries.  Callers are expected to hold the trip's row lock.
+    ``on_progress`` receives the simulation events of generate_dummy_logs
+    followed by "rows_written" and "summaries_calculated".
+    """
+    if on_progress is None:
+        on_progress = lambda event, payload: None
 
     # 1. Get trip details from the Trip object.
     start_location = trip.start_location
@@ -150,87 +451,339 @@ def generate_logs(request, trip_id):
     if not configuration:
         configuration = Configuration.objects.create(trip=trip)
 
+    # An optional seed makes the generated logs reproducible.
+    rng = random.Random(seed) if seed is not None else None
+
     # Generate our logs, using the helper function
     log_entries = generate_dummy_logs(
-        trip, start_date, start_location, pickup_location, dropoff_location
+        trip,
+        start_date,
+        start_location,
+        pickup_location,
+        dropoff_location,
+        rng=rng,
+        on_progress=on_progress,
+        configuration=configuration,
     )
 
+    # Replace any existing logs, including an archived copy.  The old entries
+    # are soft-deleted just before the new ones are written, so their
+    # tombstones are stamped as late as possible for delta sync.
+    LogEntry.objects.filter(trip=trip).soft_delete()
+    if trip.archived_at:
+        LogArchive.objects.filter(trip=trip).delete()
+        trip.archived_at = None
+
     LogEntry.objects.bulk_create(log_entries)
+    on_progress("rows_written", {"count": len(log_entries)})
 
     # 4. Calculate and Save daily summary
     calculate_daily_summary(trip)
+    on_progress("summaries_calculated", {})
+    build_timeline(trip)
+
+    trip.logs_generated_at = timezone.now()
+    trip.save(update_fields=["logs_generated_at", "archived_at"])
+
+
+async def generate_logs_stream(request, trip_id):
+    """
+    Server-Sent Events variant of generate_logs.  Generation runs on a worker
+    thread while this view streams its progress: one event per geocoded
+    location, one per simulated day carrying that day's (not yet saved) log
+    entries, then "rows_written", "summaries_calculated" and finally "done" or
+    "error".  Served under ASGI the open connection holds no worker thread.
+    """
+    if not await Trip.objects.filter(id=trip_id).aexists():
+        return JsonResponse({"error": "Trip not found"}, status=404)
+    try:
+        seed = parse_seed(request.GET.get("seed"))
+    except ValueError:
+        return JsonResponse({"error": "seed must be an integer"}, status=400)
+
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    requested_at = timezone.now()
+
+    def emit(event, payload):
+        if "log_entries" in payload:
+            payload = {
+                **payload,
+                "log_entries": LogEntrySerializer(
+                    payload["log_entries"], many=True
+                ).data,
+            }
+        loop.call_soon_threadsafe(queue.put_nowait, (event, payload))
+
+    def generate():
+        try:
+            with transaction.atomic():
+                trip = Trip.objects.select_for_update().get(id=trip_id)
+                # Share the result of a generation that finished while we
+                # were waiting for the lock, like generate_logs does.
+                if not (
+                    trip.logs_generated_at and trip.logs_generated_at >= requested_at
+                ):
+                    generate_trip_logs(trip, seed=seed, on_progress=emit)
+            emit("done", {"status": "Logs generated successfully"})
+        except Exception as e:
+            emit("error", {"error": str(e)})
+        finally:
+            connection.close()
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    async def events():
+        worker = asyncio.ensure_future(
+            sync_to_async(generate, thread_sensitive=False)()
+        )
+        while (message := await queue.get()) is not None:
+            event, payload = message
+            data = json.dumps(payload, cls=DjangoJSONEncoder)
+            yield f"event: {event}\ndata: {data}\n\n"
+        await worker
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # Don't let proxies buffer the stream
+    return response
+
+
+@api_view(["GET"])
+@renderer_classes(
+    [
+        JSONRenderer,
+        BrowsableAPIRenderer,
+        TimelineRenderer,
+        ColumnarJSONRenderer,
+        MessagePackRenderer,
+    ]
+)
+def trip_timeline(request, trip_id):
+    """
+    API endpoint returning all log entries of a trip from its timeline
+    snapshot.  Clients sending ``Accept: application/vnd.spotter.timeline``
+    get the packed binary snapshot as is; everyone else gets it decoded to the
+    same JSON as the trip's logs endpoint.
+    """
+    try:
+        data = get_timeline(trip_id)
+    except Trip.DoesNotExist:
+        return Response({"error": "Trip not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    if isinstance(request.accepted_renderer, TimelineRenderer):
+        return Response(data)
+    return Response(decode_timeline(data))
+
+
+@api_view(["GET"])
+def search_stops(request):
+    """
+    API endpoint to find stops (log entries that are not driving) near a point
+    or inside a bounding box, across every trip.
+    Expects either lat, lon and radius_km, or min_lat, min_lon, max_lat and
+    max_lon, plus an optional limit.  Radius results are ordered by distance.
+    A box with min_lon greater than max_lon crosses the antimeridian.
+
+    Candidates are narrowed with the geohash index, then filtered exactly in
+    memory.  Archived trips are not searched.
+    """
+    params = request.query_params
+    try:
+        limit = min(int(params.get("limit", 500)), 5000)
+        if "radius_km" in params:
+            latitude = float(params["lat"])
+            longitude = float(params["lon"])
+            radius_km = float(params["radius_km"])
+            bounding_box = radius_bounding_box(latitude, longitude, radius_km)
+        else:
+            bounding_box = tuple(
+                float(params[name])
+                for name in ("min_lat", "min_lon", "max_lat", "max_lon")
+            )
+    except (KeyError, ValueError):
+        return Response(
+            {
+                "error": "Provide lat, lon and radius_km, or min_lat, min_lon, "
+                "max_lat and max_lon"
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    prefix_filter = Q()
+    for prefix in covering_prefixes(*bounding_box):
+        prefix_filter |= Q(geohash__startswith=prefix)
+    fields = (
+        "id",
+        "trip_id",
+        "timestamp",
+        "duty_status",
+        "location",
+        "remarks",
+        "latitude",
+        "longitude",
+    )
+    candidates = list(
+        LogEntry.objects.filter(prefix_filter, geohash__isnull=False)
+        .exclude(duty_status="DR")
+        .values_list(*fields)
+    )
+
+    # Exact filtering over the candidate columns.
+    latitudes = [row[6] for row in candidates]
+    longitudes = [row[7] for row in candidates]
+    if "radius_km" in params:
+        distances = haversine_km(latitude, longitude, latitudes, longitudes)
+        matches = sorted(
+            (
+                (distance, row)
+                for distance, row in zip(distances, candidates)
+                if distance <= radius_km
+            ),
+            key=lambda match: match[0],
+        )
+    else:
+        min_lat, min_lon, max_lat, max_lon = bounding_box
+        ranges = longitude_ranges(min_lon, max_lon)
+        matches = [
+            (None, row)
+            for lat, lon, row in zip(latitudes, longitudes, candidates)
+            if min_lat <= lat <= max_lat
+            and any(low <= lon <= high for low, high in ranges)
+        ]
+
+    stops = []
+    for distance, row in matches[:limit]:
+        stop = dict(zip(fields, row))
+        stop["timestamp"] = stop["timestamp"].strftime("%Y-%m-%d | %H:%M:%S")
+        if distance is not None:
+            stop["distance_km"] = distance
+        stops.append(stop)
+    return Response(stops, status=status.HTTP_200_OK)
+
+
+@api_view(["POST"])
+def import_logs(request):
+    """
+    API endpoint to import an ELD log export, sent as the raw request body in
+    CSV (text/csv) or NDJSON (application/x-ndjson) format.  Optional query
+    parameters: "format" to override the content type, and "trip", the trip
+    of rows that don't name one.
+
+    The body is streamed and imported in batches; returns the number of rows
+    imported and rejected, the affected trips and the errors of the rejected
+    rows.
+    """
+    fmt = request.query_params.get("format") or detect_format(
+        content_type=request.content_type
+    )
+    if fmt not in FORMATS:
+        return Response(
+            {"error": "Send text/csv or application/x-ndjson, or pass format"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    try:
+        trip_id = request.query_params.get("trip")
+        trip_id = int(trip_id) if trip_id else None
+    except ValueError:
+        return Response(
+            {"error": "trip must be an integer"}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    report = import_log_entries(request.stream, fmt, default_trip_id=trip_id)
+    return Response(report, status=status.HTTP_200_OK)
+
+
+@api_view(["GET"])
+def sync_changes(request):
+    """
+    API endpoint returning the log entries and daily summaries changed since
+    a cursor, across all trips of a driver or a list of trips.
+    Expects "driver" or a comma-separated "trips" list, plus optional
+    "cursor" (from the previous response) and "limit" (default 500, at most
+    2000) query parameters.
+
+    Changes come as one stream ordered by modification time.  Deleted rows
+    are tombstones with "deleted": true and no data.  Keep calling with the
+    returned cursor while "has_more" is true.  An expired cursor gets a 410,
+    after which the client should resync without a cursor.
+    """
+    params = request.query_params
+    try:
+        limit = min(max(int(params.get("limit", 500)), 1), 2000)
+        if "driver" in params:
+            trip_ids = Trip.objects.filter(driver_id=int(params["driver"])).values("id")
+        elif "trips" in params:
+            trip_ids = [int(trip_id) for trip_id in params["trips"].split(",")]
+        else:
+            raise KeyError("driver")
+    except (KeyError, ValueError):
+        return Response(
+            {"error": "Provide a driver id or a comma-separated list of trip ids"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        changes, cursor, has_more = changes_since(
+            trip_ids, cursor=params.get("cursor"), limit=limit
+        )
+    except InvalidCursor as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except CursorExpired as e:
+        return Response({"error": str(e), "reset": True}, status=status.HTTP_410_GONE)
     return Response(
-        {"status": "Logs generated successfully"}, status=status.HTTP_201_CREATED
+        {"changes": changes, "cursor": cursor, "has_more": has_more},
+        status=status.HTTP_200_OK,
     )
 
 
-def calculate_daily_summary(trip):
+@api_view(["GET"])
+def autocomplete_locations(request):
     """
-    Calculates and saves the daily summary information for a trip.
+    API endpoint suggesting locations that start with the "q" query parameter,
+    most used first.  Expects an optional "limit" (default 10, at most 50).
+    Answered from the in-memory location index, without touching the database.
     """
-    log_entries = trip.log_entries.all().order_by("timestamp")
-    if not log_entries:
-        return
+    try:
+        limit = min(max(int(request.query_params.get("limit", 10)), 1), 50)
+    except ValueError:
+        return Response(
+            {"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST
+        )
+    query = request.query_params.get("q", "")
+    return Response(
+        get_location_index().complete(query, limit=limit), status=status.HTTP_200_OK
+    )
 
-    # Group log entries by date
-    daily_logs = {}
-    for entry in log_entries:
-        date = entry.timestamp.date()
-        if date not in daily_logs:
-            daily_logs[date] = []
-        daily_logs[date].append(entry)
-
-    # Iterate through each day
-    for date, entries in daily_logs.items():
-        # Initialize values
-        total_miles_driving = 0
-        total_off_duty_hours = 0
-        total_sleeper_berth_hours = 0
-        total_driving_hours = 0
-        total_on_duty_hours = 0
-
-        # Get previous day's summary to increment total miles driving
-        previous_day = date - timedelta(days=1)
-        previous_summary = DailySummary.objects.filter(
-            trip=trip, date=previous_day
-        ).first()
-        if previous_summary:
-            total_miles_driving = previous_summary.total_miles_driving
-
-        # Iterate through each log entry to get totals.
-        for i in range(len(entries)):
-            entry = entries[i]
-            if i > 0:
-                previous_entry = entries[i - 1]
-                time_diff = entry.timestamp - previous_entry.timestamp
-                hours = time_diff.total_seconds() / 3600
-
-                if previous_entry.duty_status == "OD":
-                    total_off_duty_hours += hours
-                elif previous_entry.duty_status == "SB":
-                    total_sleeper_berth_hours += hours
-                elif previous_entry.duty_status == "DR":
-                    total_driving_hours += hours
-                    # TODO: This requires us to get the miles from the MAP API.
-                    total_miles_driving += (
-                        100  # Dummy value until we have that API working
-                    )
-                elif previous_entry.duty_status == "ON":
-                    total_on_duty_hours += hours
-
-        # Create or update the daily summary object
-        DailySummary.objects.update_or_create(
-            trip=trip,
-            date=date,
-            defaults={
-                "total_miles_driving": total_miles_driving,
-                "total_off_duty_hours": total_off_duty_hours,
-                "total_sleeper_berth_hours": total_sleeper_berth_hours,
-                "total_driving_hours": total_driving_hours,
-                "total_on_duty_hours": total_on_duty_hours,
-                "total_lines_3_4": total_driving_hours + total_on_duty_hours,
-            },
+
+@api_view(["POST"])
+def simulate_trip(request, trip_id):
+    """
+    API endpoint to run a Monte Carlo simulation of a trip.
+    Expects optional "runs" and "seed" values and returns percentiles of the
+    arrival time, total driving hours and number of rest stops.  The simulated
+    scenarios are not saved.
+    """
+    trip = get_object_or_404(Trip, id=trip_id)
+
+    try:
+        runs = int(request.data.get("runs", 200))
+        seed = parse_seed(request.data.get("seed"))
+    except (TypeError, ValueError):
+        return Response(
+            {"error": "runs and seed must be integers"},
+            status=status.HTTP_400_BAD_REQUEST,
         )
+    if not 1 <= runs <= settings.SIMULATION_MAX_RUNS:
+        return Response(
+            {"error": f"runs must be between 1 and {settings.SIMULATION_MAX_RUNS}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        result = run_monte_carlo(trip, runs, seed=seed)
+    except TripTooLong as e:
+        return Response({"error": str(e)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    return Response(result, status=status.HTTP_200_OK)
 
 
 class ConfigurationListCreateView(generics.ListCreateAPIView):
@@ -266,6 +819,7 @@ def get_osrm_route(request):
     API endpoint to fetch a route from OSRM.
     Expects query parameters: start, via, end.
     Example: /get-osrm-route/?start=-80.1936,25.7742&via=-81.379,28.5421&end=-81.6556,30.3322
+    Routes are cached, and clients may ask for MessagePack or columnar JSON.
     """
 
     start = request.GET.get("start")  # e.g., "-80.1936,25.7742"
@@ -277,11 +831,22 @@ def get_osrm_route(request):
 
     # Construct the OSRM URL dynamically
     coordinates = f"{start};{via};{end}" if via else f"{start};{end}"
-    osrm_url = f"https://router.project-osrm.org/route/v1/driving/{coordinates}?overview=false&alternatives=true&steps=true"
+    osrm_url = f"{settings.OSRM_URL}/route/v1/driving/{coordinates}?overview=false&alternatives=true&steps=true"
+
+    # Routes don't change from one request to the next, reuse them.
+    cache_key = "osrm:" + hashlib.sha1(osrm_url.encode()).hexdigest()
+    route = cache.get(cache_key)
+    if route is not None:
+        return Response(route)
 
     try:
-        response = requests.get(osrm_url)
+        acquire("osrm")
+        response = requests.get(osrm_url, timeout=settings.UPSTREAM_REQUEST_TIMEOUT)
         response.raise_for_status()  # Raise an error for non-200 responses
-        return JsonResponse(response.json(), safe=False)
+        route = response.json()
+        cache.set(cache_key, route, timeout=settings.OSRM_CACHE_TIMEOUT)
+        return Response(route)
+    except UpstreamThrottled as e:
+        return JsonResponse({"error": str(e)}, status=503)
     except requests.RequestException as e:
         return JsonResponse({"error": str(e)}, status=500)